@@ -0,0 +1,244 @@
+"""
+Portfolio analytics cubes
+
+Each cube is a materialized view holding artifact counts at the finest grain
+of its dimensions (one row per distinct combination). Any pivot - a group-by
+over some dimensions, filtered on others - is answered by re-aggregating that
+small view instead of scanning the artifact tables, so it takes milliseconds
+regardless of portfolio size. The views live in the database and therefore
+are also served by read replicas. Archived business apps and tech debt are
+counted too, so moving them to the archive tables leaves the totals as they
+were.
+
+PostgreSQL cannot maintain materialized views incrementally, so committed
+writes to a cube's source tables (see write_tracking.py) enqueue a debounced
+refresh_analytics job (coalesced to one queued job per cube) that runs
+REFRESH MATERIALIZED VIEW CONCURRENTLY; readers are never blocked while it
+runs.
+"""
+import csv
+import hashlib
+import io
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal, engine
+from db_models import Job
+from jobs import enqueue
+from write_tracking import write_tracker
+
+# Dimension values are stored with NULL mapped to this marker, so the unique
+# index REFRESH ... CONCURRENTLY needs covers every row
+NONE_VALUE = ""
+
+
+@dataclass
+class Cube:
+    name: str
+    view: str
+    source: str  # FROM clause the view aggregates
+    dimensions: Dict[str, str]  # dimension name -> SQL expression over the source
+    tables: Tuple[str, ...]  # tables whose writes make the cube stale
+
+    def create_sql(self) -> List[str]:
+        columns = ",\n    ".join(f"COALESCE(({expr})::text, '') AS {name}" for name, expr in self.dimensions.items())
+        group_by = ", ".join(str(i + 1) for i in range(len(self.dimensions)))
+        return [
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {self.view} AS\n"
+            f"SELECT\n    {columns},\n    COUNT(*) AS n\nFROM {self.source}\nGROUP BY {group_by}",
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {self.view}_dims ON {self.view} ({', '.join(self.dimensions)})"
+        ]
+
+
+def _with_archive(table: str, columns: str) -> str:
+    """The rows of a hot table and of its archive (see services/db_archive_service.py): counts include archived items"""
+    return f"SELECT {columns} FROM {table} UNION ALL SELECT {columns} FROM {table}_archive"
+
+
+_APP_COLUMNS = "status, hosting_type, resilience_category, development_type, cloud_provider, architectural_owner, " \
+               "product_id"
+_DEBT_COLUMNS = "priority, status, owner, target_resolution_date"
+
+CUBES: Dict[str, Cube] = {
+    "business_apps": Cube(
+        name="business_apps",
+        view="analytics_business_apps",
+        source=f"({_with_archive('business_apps', _APP_COLUMNS)}) a "
+               "LEFT JOIN products p ON p.id = a.product_id LEFT JOIN suppliers s ON s.id = p.supplier_id",
+        dimensions={
+            "status": "a.status",
+            "hosting_type": "a.hosting_type",
+            "resilience_category": "a.resilience_category",
+            "development_type": "a.development_type",
+            "cloud_provider": "a.cloud_provider",
+            "architectural_owner": "a.architectural_owner",
+            "supplier": "s.name"
+        },
+        tables=("business_apps", "business_apps_archive", "products", "suppliers")
+    ),
+    "tech_debt": Cube(
+        name="tech_debt",
+        view="analytics_tech_debt",
+        source=f"({_with_archive('tech_debt', _DEBT_COLUMNS)}) d",
+        dimensions={
+            "priority": "d.priority",
+            "status": "d.status",
+            "owner": "d.owner",
+            "target_quarter": "to_char(d.target_resolution_date, 'YYYY-\"Q\"Q')"
+        },
+        tables=("tech_debt", "tech_debt_archive")
+    )
+}
+
+
+def create_cube_views(conn: Connection):
+    """Create the cube views and their unique indexes if missing, and recreate those whose definition changed"""
+    for cube in CUBES.values():
+        statements = cube.create_sql()
+        # The view is tagged with a hash of its definition, since CREATE ... IF NOT EXISTS keeps an outdated one
+        version = hashlib.sha256("\n".join(statements).encode()).hexdigest()[:16]
+        current = conn.execute(text("SELECT obj_description(to_regclass(:view), 'pg_class')"),
+                               {"view": cube.view}).scalar()
+        if current != version:
+            conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS {cube.view}"))
+        for statement in statements:
+            conn.execute(text(statement))
+        conn.execute(text(f"COMMENT ON MATERIALIZED VIEW {cube.view} IS '{version}'"))
+
+
+def refresh_cube(name: str):
+    """Recompute one cube without blocking readers"""
+    cube = CUBES[name]
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        # CONCURRENTLY needs a populated view; the first refresh after creation is a plain one
+        populated = conn.execute(text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :view"),
+                                 {"view": cube.view}).scalar()
+        concurrently = "CONCURRENTLY " if populated else ""
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW {concurrently}{cube.view}"))
+
+
+def refresh_all_cubes():
+    for name in CUBES:
+        refresh_cube(name)
+
+
+def schedule_refresh(db: Session, name: str):
+    """Queue a refresh of a cube unless one is already waiting to run"""
+    queued = db.query(Job.id).filter(
+        Job.job_type == "refresh_analytics",
+        Job.status == "queued",
+        Job.payload["cube"].as_string() == name
+    ).first()
+    if queued is None:
+        run_after = datetime.utcnow() + timedelta(seconds=settings.analytics_refresh_delay_seconds)
+        enqueue(db, "refresh_analytics", {"cube": name}, run_after=run_after)
+
+
+def query_cube(db: Session, name: str, group_by: List[str], pivot: Optional[str] = None,
+               filters: Optional[Dict[str, List[str]]] = None) -> Dict:
+    """
+    Aggregate a cube over the given dimensions. With a pivot dimension, each
+    row carries one count per pivot value ("values") plus a row total.
+    Dimension names must be validated against the cube by the caller.
+    """
+    cube = CUBES[name]
+    dims = group_by + ([pivot] if pivot else [])
+    params = {}
+    where = []
+    for i, (dim, values) in enumerate((filters or {}).items()):
+        params[f"f{i}"] = [_to_stored(value) for value in values]
+        where.append(f"{dim} = ANY(:f{i})")
+
+    select_dims = ", ".join(dims)
+    sql = f"SELECT {select_dims + ', ' if dims else ''}SUM(n) AS count FROM {cube.view}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if dims:
+        sql += f" GROUP BY {select_dims} ORDER BY {select_dims}"
+    rows = db.execute(text(sql), params).all()
+
+    if not pivot:
+        result_rows = [{**{dim: _from_stored(row[i]) for i, dim in enumerate(group_by)}, "count": int(row[-1])}
+                       for row in rows]
+        return {"cube": name, "group_by": group_by, "pivot": None, "filters": filters or {},
+                "rows": result_rows, "total": sum(row["count"] for row in result_rows)}
+
+    columns: List[Optional[str]] = []
+    pivoted: Dict[tuple, Dict] = {}
+    for row in rows:
+        key = tuple(row[:len(group_by)])
+        column = _from_stored(row[len(group_by)])
+        if column not in columns:
+            columns.append(column)
+        entry = pivoted.setdefault(key, {
+            **{dim: _from_stored(value) for dim, value in zip(group_by, key)}, "values": {}, "total": 0
+        })
+        entry["values"][column] = int(row[-1])
+        entry["total"] += int(row[-1])
+    columns.sort(key=lambda value: (value is None, value))
+    column_totals = {column: sum(entry["values"].get(column, 0) for entry in pivoted.values()) for column in columns}
+    return {"cube": name, "group_by": group_by, "pivot": pivot, "filters": filters or {},
+            "columns": columns, "rows": list(pivoted.values()), "column_totals": column_totals,
+            "total": sum(column_totals.values())}
+
+
+def result_to_csv(result: Dict) -> str:
+    """Render a query_cube() result as CSV (pivot columns become CSV columns)"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    group_by = result["group_by"]
+    if result["pivot"] is None:
+        writer.writerow(group_by + ["count"])
+        for row in result["rows"]:
+            writer.writerow([_csv_value(row[dim]) for dim in group_by] + [row["count"]])
+        writer.writerow(["Total"] + [""] * max(len(group_by) - 1, 0) + [result["total"]])
+    else:
+        columns = result["columns"]
+        writer.writerow(group_by + [_csv_value(column) for column in columns] + ["total"])
+        for row in result["rows"]:
+            writer.writerow([_csv_value(row[dim]) for dim in group_by]
+                            + [row["values"].get(column, 0) for column in columns] + [row["total"]])
+        writer.writerow(["Total"] + [""] * max(len(group_by) - 1, 0)
+                        + [result["column_totals"][column] for column in columns] + [result["total"]])
+    return output.getvalue()
+
+
+def _to_stored(value: str) -> str:
+    return NONE_VALUE if value in ("", "none", "null") else value
+
+
+def _from_stored(value: str) -> Optional[str]:
+    return None if value == NONE_VALUE else value
+
+
+def _csv_value(value: Optional[str]) -> str:
+    return "(none)" if value is None else value
+
+
+# Stale-cube tracking for committed writes
+_CUBES_BY_TABLE: Dict[str, List[str]] = {}
+for _cube in CUBES.values():
+    for _table in _cube.tables:
+        _CUBES_BY_TABLE.setdefault(_table, []).append(_cube.name)
+
+
+def _refresh_stale_cubes(session, tables):
+    """Schedule a refresh of the cubes built on the tables a commit wrote to"""
+    stale = {name for table in tables for name in _CUBES_BY_TABLE.get(table, ())}
+    if not stale:
+        return
+    # The write is already committed; a failure here only leaves the cube stale until the next write
+    try:
+        with SessionLocal() as db:
+            for name in sorted(stale):
+                schedule_refresh(db, name)
+    except Exception as e:
+        print(f"⚠️  Could not schedule analytics refresh for {', '.join(sorted(stale))}: {e}")
+
+
+write_tracker.subscribe(_refresh_stale_cubes)
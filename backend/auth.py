@@ -0,0 +1,54 @@
+"""Access tokens and FastAPI dependencies for authenticated endpoints"""
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt, JWTError
+from sqlalchemy.orm import Session
+from config import settings
+from database import get_db
+from db_models import User
+
+ALGORITHM = "HS256"
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def create_access_token(user: User) -> str:
+    """Create a signed access token for a user"""
+    expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+    payload = {"sub": str(user.id), "role": user.role, "exp": expire}
+    return jwt.encode(payload, settings.secret_key, algorithm=ALGORITHM)
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode an access token, returning None if it is invalid or expired"""
+    try:
+        return jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+
+def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Dependency returning the user identified by the bearer token"""
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    payload = decode_access_token(credentials.credentials)
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user = db.query(User).filter(User.id == int(payload["sub"])).first()
+    if not user or user.status != "active":
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return user
+
+
+def require_admin(user: User = Depends(get_current_user)) -> User:
+    """Dependency restricting an endpoint to admin users"""
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
@@ -0,0 +1,405 @@
+"""
+Load-test harness and p95 regression gate for the EA Direct API
+
+Starts the API against a local PostgreSQL database seeded at a chosen scale,
+drives a weighted mix of realistic requests from concurrent clients and
+reports throughput, latency percentiles and SQL statements per request
+(from the X-Query-Count response header) for each endpoint.
+
+Usage (from the backend directory):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.loadtest --scale 10k --duration 60 --concurrency 20
+    python -m benchmarks.loadtest --scale 10k --save-baseline
+    python -m benchmarks.loadtest --base-url http://localhost:8000 --no-seed
+
+Results are written to benchmarks/results/ and compared against
+benchmarks/baselines/<scale>.json. The process exits with status 1 when any
+endpoint's p95 latency regresses by more than --max-regression percent.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+import httpx
+from query_stats import percentile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCHMARK_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = BENCHMARK_DIR / "baselines"
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+SCALES = ["1k", "10k", "100k", "1m"]
+
+# Scenario weights (relative). There is no server-side /search route yet,
+# so searching is modelled the way the UI filters today: list + detail.
+DEFAULT_MIX = {
+    "dashboard": 20,
+    "list": 25,
+    "detail": 35,
+    "login": 5,
+    "write": 5,
+    "supplier_products": 10,
+    "suggest": 10
+}
+
+LIST_ENDPOINTS = ["/business-apps", "/adrs", "/tech-debt", "/suppliers", "/products"]
+SUGGEST_FIELDS = ["owner", "technology", "cloud_provider", "tag", "app_name"]
+
+
+class Recorder:
+    """Collects latency and query-count samples per endpoint"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, elapsed_ms, response):
+        self.latencies[name].append(elapsed_ms)
+        if response is None or response.status_code >= 400:
+            self.errors[name] += 1
+            return
+        count = response.headers.get("x-query-count")
+        if count is not None:
+            self.queries[name].append(int(count))
+
+    def summary(self, duration_s):
+        endpoints = {}
+        all_latencies = []
+        for name, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            all_latencies.extend(values)
+            queries = self.queries.get(name)
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": round(len(values) / duration_s, 2),
+                "mean_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(percentile(ordered, 50), 2),
+                "p90_ms": round(percentile(ordered, 90), 2),
+                "p95_ms": round(percentile(ordered, 95), 2),
+                "p99_ms": round(percentile(ordered, 99), 2),
+                "max_ms": round(ordered[-1], 2),
+                "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None
+            }
+        ordered = sorted(all_latencies)
+        total = {
+            "requests": len(ordered),
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(len(ordered) / duration_s, 2),
+            "p50_ms": round(percentile(ordered, 50), 2),
+            "p95_ms": round(percentile(ordered, 95), 2),
+            "p99_ms": round(percentile(ordered, 99), 2)
+        }
+        return endpoints, total
+
+
+class Workload:
+    """Weighted mix of user scenarios against the API"""
+
+    def __init__(self, client, recorder, rng, mix, login_email, login_password):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+        self.scenarios = list(mix.keys())
+        self.weights = list(mix.values())
+        self.login_email = login_email
+        self.login_password = login_password
+        self.ids = {}
+
+    async def request(self, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.recorder.record(name, (time.perf_counter() - start) * 1000, response)
+        return response
+
+    async def discover_ids(self):
+        """Collect entity IDs for detail views (not recorded)"""
+        for key, url in [("apps", "/business-apps"), ("adrs", "/adrs"), ("tech_debt", "/tech-debt"),
+                         ("suppliers", "/suppliers")]:
+            response = await self.client.get(url, timeout=600)
+            response.raise_for_status()
+            self.ids[key] = [item["id"] for item in response.json()] or [None]
+
+    def _pick(self, key):
+        return self.rng.choice(self.ids[key])
+
+    async def run_one(self):
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        await getattr(self, f"scenario_{scenario}")()
+
+    async def scenario_dashboard(self):
+        await self.request("GET /dashboard", "GET", "/dashboard")
+
+    async def scenario_list(self):
+        url = self.rng.choice(LIST_ENDPOINTS)
+        await self.request(f"GET {url}", "GET", url)
+
+    async def scenario_detail(self):
+        kind = self.rng.choice(["apps", "adrs", "tech_debt", "adr_tech_debt"])
+        if kind == "apps":
+            await self.request("GET /business-apps/{id}", "GET", f"/business-apps/{self._pick('apps')}")
+        elif kind == "adrs":
+            await self.request("GET /adrs/{id}", "GET", f"/adrs/{self._pick('adrs')}")
+        elif kind == "tech_debt":
+            await self.request("GET /tech-debt/{id}", "GET", f"/tech-debt/{self._pick('tech_debt')}")
+        else:
+            await self.request("GET /adrs/{id}/tech-debt", "GET", f"/adrs/{self._pick('adrs')}/tech-debt")
+
+    async def scenario_supplier_products(self):
+        await self.request("GET /suppliers/{id}/products", "GET",
+                           f"/suppliers/{self._pick('suppliers')}/products")
+
+    async def scenario_suggest(self):
+        # Typing into a form field: one request per keystroke of a short prefix
+        field = self.rng.choice(SUGGEST_FIELDS)
+        word = self.rng.choice(["ja", "pay", "post", "se", "az", "cu", "a", "mi"])
+        for length in range(1, len(word) + 1):
+            await self.request("GET /suggest", "GET", "/suggest", params={"field": field, "prefix": word[:length]})
+
+    async def scenario_login(self):
+        await self.request("POST /auth/login", "POST", "/auth/login",
+                           json={"email": self.login_email, "password": self.login_password})
+
+    async def scenario_write(self):
+        suffix = f"{self.rng.getrandbits(48):012x}"
+        response = await self.request("POST /tech-debt", "POST", "/tech-debt", json={
+            "title": f"Load test {suffix}",
+            "description": "Created by the load-test harness",
+            "owner": "Load Test",
+            "priority": self.rng.choice(["low", "medium", "high", "critical"])
+        })
+        if response is None or response.status_code != 201:
+            return
+        debt_id = response.json()["id"]
+        await self.request("PUT /tech-debt/{id}", "PUT", f"/tech-debt/{debt_id}", json={"status": "in-progress"})
+        await self.request("DELETE /tech-debt/{id}", "DELETE", f"/tech-debt/{debt_id}")
+
+
+async def drive(base_url, duration, concurrency, warmup, mix, seed, login_email, login_password):
+    """Run the workload for `duration` seconds after a warmup period"""
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        workloads = [Workload(client, recorder, random.Random(seed + i), mix, login_email, login_password)
+                     for i in range(concurrency)]
+        await workloads[0].discover_ids()
+        for workload in workloads[1:]:
+            workload.ids = workloads[0].ids
+
+        async def worker(workload, until):
+            while time.perf_counter() < until:
+                await workload.run_one()
+
+        if warmup > 0:
+            warmup_until = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(w, warmup_until) for w in workloads))
+            recorder.reset()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(w, started + duration) for w in workloads))
+        elapsed = time.perf_counter() - started
+
+    return recorder.summary(elapsed)
+
+
+def compare(baseline, current, max_regression_pct, min_delta_ms):
+    """Return p95 regressions beyond the allowed threshold"""
+    regressions = []
+    for name, base in baseline["endpoints"].items():
+        result = current["endpoints"].get(name)
+        if not result or not base.get("p95_ms"):
+            continue
+        change_pct = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        if change_pct > max_regression_pct and result["p95_ms"] - base["p95_ms"] > min_delta_ms:
+            regressions.append({
+                "endpoint": name,
+                "baseline_p95_ms": base["p95_ms"],
+                "current_p95_ms": result["p95_ms"],
+                "change_pct": round(change_pct, 1)
+            })
+    return regressions
+
+
+def print_report(endpoints, total, baseline=None):
+    header = f"{'endpoint':<32}{'reqs':>7}{'err':>5}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>7}"
+    if baseline:
+        header += f"{'base p95':>10}{'Δ%':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, row in endpoints.items():
+        queries = f"{row['queries_per_request']:.1f}" if row["queries_per_request"] is not None else "-"
+        line = (f"{name:<32}{row['requests']:>7}{row['errors']:>5}{row['throughput_rps']:>8.1f}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{queries:>7}")
+        base = baseline["endpoints"].get(name) if baseline else None
+        if base and base.get("p95_ms"):
+            change = (row["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+            line += f"{base['p95_ms']:>10.1f}{change:>+7.1f}"
+        print(line)
+    print("-" * len(header))
+    print(f"{'TOTAL':<32}{total['requests']:>7}{total['errors']:>5}{total['throughput_rps']:>8.1f}"
+          f"{total['p50_ms']:>9.1f}{total['p95_ms']:>9.1f}{total['p99_ms']:>9.1f}")
+
+
+def run_step(description, args, env):
+    print(f"==> {description}")
+    subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def start_api(port, workers, env):
+    """Start uvicorn in a subprocess and wait until it answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("API process exited during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("API did not become ready within 60s")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(values):
+    mix = dict(DEFAULT_MIX)
+    for value in values or []:
+        name, _, weight = value.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown scenario '{name}'. Available: {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the EA Direct API")
+    parser.add_argument("--scale", choices=SCALES, default="1k", help="Seeded dataset size (artifacts)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for data and workload")
+    parser.add_argument("--duration", type=float, default=30, help="Measured run time in seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured warmup in seconds")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent simulated clients")
+    parser.add_argument("--mix", action="append", metavar="SCENARIO=WEIGHT",
+                        help=f"Override scenario weights ({', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--base-url", help="Target an already running API instead of starting one")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-name", default="ea_loadtest",
+                        help="Database the harness initializes, seeds and starts the API against")
+    parser.add_argument("--no-seed", action="store_true", help="Skip database initialization and seeding")
+    parser.add_argument("--login-email", default="admin@ea.com")
+    parser.add_argument("--login-password", default="admin")
+    parser.add_argument("--baseline", type=Path, help="Baseline file (default: baselines/<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=15.0,
+                        help="Fail when an endpoint's p95 grows by more than this percentage")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore p95 increases smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    process = None
+    if not args.base_url:
+        # Pin every connection setting explicitly so a database.config.json
+        # fallback can never point the (destructive) seeding step elsewhere
+        from config import settings
+        env.update({
+            "DATABASE_HOST": settings.database_host,
+            "DATABASE_PORT": str(settings.database_port),
+            "DATABASE_USER": settings.database_user,
+            "DATABASE_PASSWORD": settings.database_password,
+            "DATABASE_NAME": args.database_name
+        })
+        env.setdefault("QUERY_STATS_ENABLED", "true")
+        # Every simulated user shares one address; measure the endpoints, not the limiter
+        env.setdefault("RATE_LIMIT_ENABLED", "false")
+        if not args.no_seed:
+            run_step("Initializing database", ["init_db.py"], env)
+            run_step(f"Generating {args.scale} artifacts", ["synthetic_data.py", "--scale", args.scale,
+                                                             "--seed", str(args.seed), "--yes"], env)
+        print(f"==> Starting API on port {args.port} ({args.workers} worker(s))")
+        process = start_api(args.port, args.workers, env)
+        base_url = f"http://127.0.0.1:{args.port}"
+    else:
+        base_url = args.base_url.rstrip("/")
+
+    try:
+        mix = parse_mix(args.mix)
+        print(f"==> Driving {args.concurrency} clients for {args.duration:.0f}s (warmup {args.warmup:.0f}s)")
+        endpoints, total = asyncio.run(drive(base_url, args.duration, args.concurrency, args.warmup, mix,
+                                             args.seed, args.login_email, args.login_password))
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    result = {
+        "meta": {
+            "scale": args.scale,
+            "seed": args.seed,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "mix": mix,
+            "git_revision": git_revision(),
+            "timestamp": datetime.utcnow().isoformat()
+        },
+        "endpoints": endpoints,
+        "total": total
+    }
+
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.scale}.json"
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+
+    print()
+    print_report(endpoints, total, baseline)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    result_path = RESULTS_DIR / f"{args.scale}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    result_path.write_text(json.dumps(result, indent=2))
+    print(f"\nResults written to {result_path}")
+
+    if args.save_baseline:
+        baseline_path.parent.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(result, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return
+
+    if baseline:
+        regressions = compare(baseline, result, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ p95 regressions beyond {args.max_regression:.0f}%:")
+            for r in regressions:
+                print(f"   {r['endpoint']}: {r['baseline_p95_ms']}ms → {r['current_p95_ms']}ms ({r['change_pct']:+.1f}%)")
+            sys.exit(1)
+        print(f"\n✅ No p95 regressions beyond {args.max_regression:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Micro-benchmarks for per-row hot paths
+
+Times the db-to-model converters, the BusinessApp enum validators (current
+dict lookup against the previous linear scan over enum members), full
+request-model validation, FastAPI's response-model revalidation and JSON
+rendering, and near-duplicate name matching (dedup.py), all on fixed in-memory
+fixtures (no database needed).
+
+Each run is appended to benchmarks/history/microbench.jsonl together with
+the git revision, and compared with the previous run (or --compare REV).
+
+Usage (from the backend directory):
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench -k convert --rounds 10
+    python -m benchmarks.microbench --compare a1b2c3d --fail-threshold 10
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+import fastapi.routing
+
+import dedup
+import main
+import synthetic_data
+from db_models import ADR as DBADR, BusinessApp as DBBusinessApp, Product as DBProduct, \
+    Supplier as DBSupplier, TechDebt as DBTechDebt
+from models import (
+    BusinessAppCreate, BusinessAppStatus, ResilienceCategory, HostingType, DevelopmentType,
+    normalize_business_app_enum
+)
+
+HISTORY_FILE = Path(__file__).resolve().parent / "history" / "microbench.jsonl"
+LIST_SIZE = 100
+DEDUP_SIZE = 1000
+NOW = datetime(2025, 1, 1, 12, 0, 0)
+
+
+# Fixtures
+def make_supplier():
+    return DBSupplier(id=1, supplier_id=uuid.UUID(int=1), name="Microsoft Corporation",
+                      description="Cloud and software", website="https://www.microsoft.com",
+                      created_at=NOW, updated_at=NOW)
+
+
+def make_product(supplier):
+    return DBProduct(id=1, product_id=uuid.UUID(int=2), name="Azure", version="2024",
+                     supplier=supplier, license_type="Subscription", created_at=NOW, updated_at=NOW)
+
+
+def make_app(product, i=0):
+    return DBBusinessApp(
+        id=i + 1, app_id=uuid.UUID(int=1000 + i), name=f"Customer Portal {i}",
+        description="Customer self-service portal " * 4, status="active",
+        architectural_owner="Enterprise Architecture", business_owner="Sales", product_owner="Alex Morgan",
+        system_owner="Sam Patel", resilience_category="gold", geographic_locations=["EMEA", "UK"],
+        hosting_type="cloud", cloud_provider="Azure", development_type="custom",
+        technologies=["React", "FastAPI", "PostgreSQL"], dependencies=[str(uuid.UUID(int=5000))],
+        product=product, created_at=NOW, updated_at=NOW
+    )
+
+
+def make_adr(i=0):
+    return DBADR(
+        id=i + 1, adr_id=f"20250101-use-postgres-{i}", title="Use PostgreSQL for persistence",
+        context="We need a relational database. " * 10,
+        options=[{"name": name, "description": f"Option {name}", "pros": ["Mature", "Open source"],
+                  "cons": ["Ops overhead"], "cost_estimate": "$10k", "effort_estimate": "2 weeks"}
+                 for name in ("PostgreSQL", "MySQL", "MongoDB")],
+        recommended_option="PostgreSQL", strategic_selection="PostgreSQL", interim_selection=None,
+        decision_rationale="Best fit for relational data. " * 5, consequences="Teams adopt PostgreSQL. " * 5,
+        stakeholders=["Platform Engineering", "DBA Team"], related_adrs=["20241201-microservices"],
+        status="accepted", author="Jordan Lee", created_at=NOW, updated_at=NOW
+    )
+
+
+def make_debt(adr, i=0):
+    return DBTechDebt(
+        id=i + 1, debt_id=f"debt-20250101-legacy-api-{i}", title="Retire legacy API",
+        description="The legacy SOAP API must be replaced. " * 5, linked_adr=adr, owner="Integration Team",
+        priority="high", status="in-progress", impact="Blocks upgrades", effort_estimate="1 quarter",
+        created_date=date(2024, 6, 1), target_resolution_date=date(2025, 6, 1),
+        affected_systems=["Customer Portal", "Billing Service"], tags=["legacy", "security"],
+        created_at=NOW, updated_at=NOW
+    )
+
+
+APP_PAYLOAD = {
+    "name": "Customer Portal", "description": "Self-service portal", "architectural_owner": "EA Team",
+    "status": "ACTIVE", "resilience_category": "Gold", "hosting_type": "ON_PREMISE",
+    "development_type": "open-source", "technologies": ["React"], "dependencies": []
+}
+
+ENUM_INPUTS = [("status", "ACTIVE"), ("status", "retired"), ("resilience_category", "Platinum"),
+               ("hosting_type", "MANAGED_HOSTING"), ("hosting_type", "on-premise"),
+               ("development_type", "LOW_CODE"), ("development_type", "internal")]
+
+
+def legacy_normalize_business_app_enum(v, field_name):
+    """The previous validator body: rebuilds the field map and scans enum members per call"""
+    if not isinstance(v, str):
+        return v
+    enum_map = {
+        'status': BusinessAppStatus,
+        'resilience_category': ResilienceCategory,
+        'hosting_type': HostingType,
+        'development_type': DevelopmentType
+    }
+    enum_class = enum_map.get(field_name)
+    if not enum_class:
+        return v.lower()
+    v_upper = v.upper()
+    for member in enum_class:
+        if member.name == v_upper:
+            return member.value
+    return v.lower()
+
+
+def build_benchmarks():
+    """Return {name: zero-argument callable}. Fixtures are built once, outside the timed code."""
+    supplier = make_supplier()
+    product = make_product(supplier)
+    app = make_app(product)
+    adr = make_adr()
+    debt = make_debt(adr)
+
+    app_models = [main.db_app_to_model(make_app(product, i)) for i in range(LIST_SIZE)]
+    list_route = next(route for route in main.app.routes
+                      if getattr(route, "path", None) == "/business-apps" and "GET" in route.methods)
+    encoded = jsonable_encoder(app_models)
+    loop = asyncio.new_event_loop()
+
+    def serialize_list():
+        return loop.run_until_complete(fastapi.routing.serialize_response(
+            field=list_route.response_field, response_content=app_models, is_coroutine=False
+        ))
+
+    supplier_names = [(i, synthetic_data.supplier_row(42, i, random.Random(i), {"suppliers": DEDUP_SIZE})["name"])
+                      for i in range(DEDUP_SIZE)]
+    microsoft, typo = dedup.Fingerprint("Microsoft Corporation"), dedup.Fingerprint("Microsft Corp.")
+
+    def run_enum(normalize):
+        def bench():
+            for field_name, value in ENUM_INPUTS:
+                normalize(value, field_name)
+        return bench
+
+    return {
+        "convert.db_adr_to_model": lambda: main.db_adr_to_model(adr),
+        "convert.db_app_to_model": lambda: main.db_app_to_model(app),
+        "convert.db_debt_to_model": lambda: main.db_debt_to_model(debt),
+        "convert.db_product_to_model": lambda: main.db_product_to_model(product),
+        "validate.enum_lookup": run_enum(normalize_business_app_enum),
+        "validate.enum_legacy_scan": run_enum(legacy_normalize_business_app_enum),
+        "validate.business_app_create": lambda: BusinessAppCreate(**APP_PAYLOAD),
+        f"response.serialize_business_apps_x{LIST_SIZE}": serialize_list,
+        f"response.json_render_business_apps_x{LIST_SIZE}": lambda: JSONResponse(encoded).body,
+        "dedup.similarity": lambda: dedup.similarity(microsoft, typo),
+        f"dedup.find_clusters_x{DEDUP_SIZE}": lambda: dedup.find_clusters(supplier_names, 0.8),
+    }
+
+
+def measure(func, rounds):
+    """Time func, returning per-call statistics in microseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    per_call = [t / number * 1e6 for t in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "min_us": round(min(per_call), 3),
+        "median_us": round(statistics.median(per_call), 3),
+        "mean_us": round(statistics.mean(per_call), 3),
+        "stddev_us": round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+        "ops_per_s": round(1e6 / statistics.median(per_call), 1),
+        "rounds": rounds,
+        "iterations": number
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history():
+    if not HISTORY_FILE.exists():
+        return []
+    return [json.loads(line) for line in HISTORY_FILE.read_text().splitlines() if line.strip()]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Run EA Direct micro-benchmarks")
+    parser.add_argument("-k", dest="keyword", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--compare", metavar="REV", help="Compare against the latest run at this git revision")
+    parser.add_argument("--fail-threshold", type=float, default=None,
+                        help="Exit 1 if any median is slower than the comparison by more than this percent")
+    parser.add_argument("--no-save", action="store_true", help="Do not append this run to the history")
+    args = parser.parse_args()
+
+    benchmarks = {name: func for name, func in build_benchmarks().items()
+                  if not args.keyword or args.keyword in name}
+
+    history = load_history()
+    if args.compare:
+        previous = next((run for run in reversed(history) if run["git_revision"] == args.compare), None)
+        if previous is None:
+            sys.exit(f"No recorded run for revision {args.compare}")
+    else:
+        previous = history[-1] if history else None
+
+    results = {}
+    print(f"{'benchmark':<44}{'median µs':>12}{'min µs':>10}{'stddev':>9}{'ops/s':>13}{'vs prev':>10}")
+    print("-" * 98)
+    regressions = []
+    for name, func in benchmarks.items():
+        stats = results[name] = measure(func, args.rounds)
+        change = ""
+        base = previous["results"].get(name) if previous else None
+        if base:
+            pct = (stats["median_us"] - base["median_us"]) / base["median_us"] * 100
+            change = f"{pct:+.1f}%"
+            if args.fail_threshold is not None and pct > args.fail_threshold:
+                regressions.append((name, pct))
+        print(f"{name:<44}{stats['median_us']:>12.2f}{stats['min_us']:>10.2f}{stats['stddev_us']:>9.2f}"
+              f"{stats['ops_per_s']:>13,.0f}{change:>10}")
+
+    lookup = results.get("validate.enum_lookup")
+    legacy = results.get("validate.enum_legacy_scan")
+    if lookup and legacy:
+        print(f"\nEnum lookup fast path: {legacy['median_us'] / lookup['median_us']:.1f}x faster than the member scan")
+    if previous:
+        print(f"Compared with {previous['git_revision']} ({previous['timestamp']})")
+
+    if not args.no_save:
+        HISTORY_FILE.parent.mkdir(exist_ok=True)
+        with HISTORY_FILE.open("a") as f:
+            f.write(json.dumps({
+                "git_revision": git_revision(),
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.node(),
+                "results": results
+            }) + "\n")
+
+    if regressions:
+        print("\n❌ Slower than comparison by more than "
+              f"{args.fail_threshold:.0f}%: " + ", ".join(f"{n} ({p:+.1f}%)" for n, p in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,71 @@
+"""
+In-process caches invalidated by committed writes
+
+A WriteInvalidatedCache holds values computed from a few tables. Committing
+a write to any of those tables (as recorded by write_tracking.py) clears it
+in the process that wrote; writes made by other processes, or with raw SQL
+not passed to note_writes(), are picked up once the TTL expires.
+
+Only values computed on the primary are stored. A replica may not have
+replayed the write that last cleared a cache yet, and a value read from it
+would be served for the whole TTL, to the writer too; reads on a replica
+use a stored value if there is one and otherwise compute it uncached.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from sqlalchemy.orm import Session
+from replicas import is_replica_session
+from write_tracking import write_tracker
+
+_caches_by_table: Dict[str, List["WriteInvalidatedCache"]] = {}
+
+
+class WriteInvalidatedCache:
+    """Values keyed by arguments, dropped on writes to the source tables or after ttl_seconds"""
+
+    def __init__(self, name: str, tables: Tuple[str, ...], ttl_seconds: float):
+        self.name = name
+        self.tables = tables
+        self.ttl_seconds = ttl_seconds
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        for table in tables:
+            _caches_by_table.setdefault(table, []).append(self)
+
+    def get(self, db: Session, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """The value for key, computed (with db) and stored if there is none"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+            generation = self._generation
+        value = compute()
+        if is_replica_session(db):
+            return value
+        with self._lock:
+            # A write committed while computing may not be reflected in the value
+            if generation == self._generation:
+                self._values[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._values.clear()
+            self._generation += 1
+
+
+def invalidate_tables(*tables: str):
+    """Clear the caches built on any of the tables"""
+    for table in tables:
+        for cache in _caches_by_table.get(table, ()):
+            cache.invalidate()
+
+
+def _invalidate_written(session, tables):
+    invalidate_tables(*tables)
+
+
+write_tracker.subscribe(_invalidate_written)
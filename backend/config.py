@@ -26,9 +26,78 @@ class Settings(BaseSettings):
     database_user: str = Field(default="postgres", alias="DATABASE_USER")
     database_password: str = Field(default="", alias="DATABASE_PASSWORD")
 
+    # Read replicas (comma-separated SQLAlchemy URLs; empty = all traffic to the primary)
+    database_replica_urls: str = Field(default="", alias="DATABASE_REPLICA_URLS")
+    replica_poll_interval_seconds: float = Field(default=0.5, alias="REPLICA_POLL_INTERVAL_SECONDS")
+    replica_max_lag_bytes: int = Field(default=16 * 1024 * 1024, alias="REPLICA_MAX_LAG_BYTES")  # Skip replicas further behind
+    read_your_writes_seconds: int = Field(default=60, alias="READ_YOUR_WRITES_SECONDS")  # Lifetime of the write-LSN cookie
+
     # Security settings
     secret_key: str = Field(default="your-secret-key-change-in-production", alias="SECRET_KEY")
     allowed_origins: str = Field(default="http://localhost:3000,http://localhost:5173", alias="ALLOWED_ORIGINS")
+    access_token_expire_minutes: int = Field(default=480, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+
+    # Upload settings
+    max_upload_bytes: int = Field(default=10 * 1024 * 1024, alias="MAX_UPLOAD_BYTES")
+    max_image_pixels: int = Field(default=24_000_000, alias="MAX_IMAGE_PIXELS")  # Decompression-bomb guard (width * height)
+    upload_url_expires_seconds: int = Field(default=900, alias="UPLOAD_URL_EXPIRES_SECONDS")
+
+    # Object storage settings
+    storage_backend: str = Field(default="local", alias="STORAGE_BACKEND")  # local or s3
+    s3_bucket: str = Field(default="ea-direct-uploads", alias="S3_BUCKET")
+    s3_endpoint_url: str = Field(default="", alias="S3_ENDPOINT_URL")  # e.g. http://minio:9000; empty for AWS
+    s3_region: str = Field(default="us-east-1", alias="S3_REGION")
+    s3_access_key_id: str = Field(default="", alias="S3_ACCESS_KEY_ID")
+    s3_secret_access_key: str = Field(default="", alias="S3_SECRET_ACCESS_KEY")
+    s3_public_url: str = Field(default="", alias="S3_PUBLIC_URL")  # Bucket or CDN base URL browsers load files from
+
+    # Background job settings
+    job_poll_interval_seconds: float = Field(default=1.0, alias="JOB_POLL_INTERVAL_SECONDS")
+    job_lease_seconds: int = Field(default=60, alias="JOB_LEASE_SECONDS")  # Running jobs without a heartbeat this long are requeued
+    job_retry_base_seconds: float = Field(default=10.0, alias="JOB_RETRY_BASE_SECONDS")  # Backoff: base * 2^(attempt - 1)
+    job_worker_concurrency: int = Field(default=4, alias="JOB_WORKER_CONCURRENCY")
+
+    # Analytics settings
+    analytics_refresh_delay_seconds: float = Field(default=2.0, alias="ANALYTICS_REFRESH_DELAY_SECONDS")  # Coalesces bursts of writes into one refresh
+    tech_debt_snapshot_time: str = Field(default="00:15", alias="TECH_DEBT_SNAPSHOT_TIME")  # Daily, HH:MM UTC
+    exposure_cache_seconds: float = Field(default=60.0, alias="EXPOSURE_CACHE_SECONDS")  # Upper bound on staleness after writes by other processes
+    adr_graph_cache_seconds: float = Field(default=60.0, alias="ADR_GRAPH_CACHE_SECONDS")  # Same, for ADR graph and supersession queries
+    suggest_cache_seconds: int = Field(default=30, alias="SUGGEST_CACHE_SECONDS")  # Browser max-age of /suggest responses (0 disables)
+    duplicate_similarity_threshold: float = Field(default=0.8, alias="DUPLICATE_SIMILARITY_THRESHOLD")  # 0-1, see dedup.py
+    duplicate_report_cache_seconds: float = Field(default=300.0, alias="DUPLICATE_REPORT_CACHE_SECONDS")  # Upper bound on staleness after writes by other processes
+
+    # Archival settings: retired apps and closed tech debt unchanged this long move to the archive tables (0 disables)
+    archive_time: str = Field(default="01:00", alias="ARCHIVE_TIME")  # Daily, HH:MM UTC
+    archive_retired_apps_after_days: int = Field(default=180, alias="ARCHIVE_RETIRED_APPS_AFTER_DAYS")
+    archive_closed_tech_debt_after_days: int = Field(default=90, alias="ARCHIVE_CLOSED_TECH_DEBT_AFTER_DAYS")
+    archive_batch_size: int = Field(default=1000, alias="ARCHIVE_BATCH_SIZE")  # Rows moved per transaction
+
+    # Rate limiting and admission control settings
+    rate_limit_enabled: bool = Field(default=True, alias="RATE_LIMIT_ENABLED")
+    rate_limit_backend: str = Field(default="memory", alias="RATE_LIMIT_BACKEND")  # memory (per process) or postgres (shared)
+    rate_limit_login_per_minute: int = Field(default=10, alias="RATE_LIMIT_LOGIN_PER_MINUTE")  # Per client address, and per email
+    rate_limit_read_per_minute: int = Field(default=600, alias="RATE_LIMIT_READ_PER_MINUTE")  # GET/HEAD, per user or address
+    rate_limit_write_per_minute: int = Field(default=120, alias="RATE_LIMIT_WRITE_PER_MINUTE")  # Other methods, per user or address
+    admission_max_in_flight: int = Field(default=256, alias="ADMISSION_MAX_IN_FLIGHT")  # Per process; 0 disables
+    admission_max_pool_wait_ms: float = Field(default=500.0, alias="ADMISSION_MAX_POOL_WAIT_MS")  # Mean over 5s; 0 disables
+    admission_retry_after_seconds: float = Field(default=2.0, alias="ADMISSION_RETRY_AFTER_SECONDS")
+
+    # Startup and health probe settings
+    fast_start: bool = Field(default=True, alias="FAST_START")  # Skip init_db.py when the stored schema version matches
+    startup_pool_connections: int = Field(default=5, alias="STARTUP_POOL_CONNECTIONS")  # Opened per engine before /readyz passes
+    readiness_cache_seconds: float = Field(default=2.0, alias="READINESS_CACHE_SECONDS")  # Probes within this share one check
+
+    # Query instrumentation settings
+    query_stats_enabled: bool = Field(default=True, alias="QUERY_STATS_ENABLED")
+    slow_query_threshold_ms: float = Field(default=200.0, alias="SLOW_QUERY_THRESHOLD_MS")
+    explain_sample_rate: float = Field(default=0.1, alias="EXPLAIN_SAMPLE_RATE")  # Fraction of slow SELECTs to EXPLAIN
+    explain_max_plans: int = Field(default=50, alias="EXPLAIN_MAX_PLANS")  # Maximum number of captured plans kept in memory
+
+    # Tracing settings
+    tracing_enabled: bool = Field(default=False, alias="TRACING_ENABLED")
+    tracing_exporter: str = Field(default="file", alias="TRACING_EXPORTER")  # file, otlp or console
+    tracing_file_path: str = Field(default="./traces/spans.jsonl", alias="TRACING_FILE_PATH")
+    tracing_service_name: str = Field(default="ea-direct-api", alias="TRACING_SERVICE_NAME")
 
     def load_database_config(self):
         """Load database configuration from database.config.json (fallback if env vars not set)"""
@@ -49,6 +118,10 @@ class Settings(BaseSettings):
         """Generate SQLAlchemy database URL"""
         return f"postgresql://{self.database_user}:{self.database_password}@{self.database_host}:{self.database_port}/{self.database_name}"
 
+    def get_replica_urls(self) -> List[str]:
+        """Parse read replica URLs from comma-separated string"""
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
     def get_cors_origins(self) -> List[str]:
         """Parse CORS origins from string or list"""
         if isinstance(self.allowed_origins, str):
@@ -1,26 +1,70 @@
 """Database connection and session management"""
-from sqlalchemy import create_engine
+import hashlib
+from contextlib import contextmanager
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlalchemy.orm import sessionmaker, Session
+from fastapi import Request
 from config import settings
-from typing import Generator
+from query_stats import QueryStatsCollector
+from rate_limit import TimedQueuePool
+from replicas import ReplicaRouter, READ_METHODS, LSN_COOKIE, parse_lsn
+from write_tracking import write_tracker
+from typing import Generator, Optional
+
+# pg_advisory_lock key held while one process initializes the schema
+SCHEMA_LOCK_KEY = 4_510_231
 
 # Create database engine
 engine = create_engine(
     settings.database_url,
+    poolclass=TimedQueuePool,  # Checkout waits feed admission control (see rate_limit.py)
     pool_pre_ping=True,  # Verify connections before using them
     echo=False  # Set to True to see SQL queries in logs
 )
 
+# Per-statement timing and slow query plan capture
+query_stats = QueryStatsCollector(
+    slow_threshold_ms=settings.slow_query_threshold_ms,
+    explain_sample_rate=settings.explain_sample_rate,
+    max_plans=settings.explain_max_plans
+)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Committed writes are reported to the replica router, analytics cubes and caches (see write_tracking.py)
+write_tracker.install(SessionLocal)
 
+# Read replicas for GET/HEAD requests (see replicas.py)
+replica_router = ReplicaRouter(
+    engine,
+    settings.get_replica_urls(),
+    poll_interval=settings.replica_poll_interval_seconds,
+    max_lag_bytes=settings.replica_max_lag_bytes,
+    pool_pre_ping=True
+)
+if replica_router.enabled:
+    write_tracker.subscribe(replica_router.record_write)
 
-def get_db() -> Generator[Session, None, None]:
+if settings.query_stats_enabled:
+    for instrumented_engine in [engine] + [replica.engine for replica in replica_router.replicas]:
+        query_stats.install(instrumented_engine)
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
     """
     Dependency function to get database session.
     Use with FastAPI Depends() to inject database session into endpoints.
+
+    Read-only requests get a session on a replica that has replayed the
+    client's last write (if any); everything else uses the primary.
     """
-    db = SessionLocal()
+    replica = None
+    if replica_router.enabled and request.method in READ_METHODS:
+        min_lsn = parse_lsn(request.headers.get("x-min-lsn") or request.cookies.get(LSN_COOKIE))
+        replica = replica_router.choose(min_lsn)
+    db = replica.session_factory() if replica else SessionLocal()
     try:
         yield db
     finally:
@@ -30,10 +74,123 @@ def get_db() -> Generator[Session, None, None]:
 def init_db():
     """Initialize database tables"""
     from db_models import Base
+    from analytics import create_cube_views
+    from services.db_adr_service import backfill_adr_links
+    from services.db_suggest_service import create_suggestion_indexes, rebuild_suggestions
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # create_all skips existing tables, including columns and indexes added to them since
+        add_missing_columns(connection, Base.metadata)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        create_cube_views(connection)
+        create_suggestion_indexes(connection)
+        backfill_adr_links(connection)
+        rebuild_suggestions(connection)
     print("Database tables created successfully!")
 
 
+def add_missing_columns(connection, metadata):
+    """
+    Add model columns missing from existing tables. New columns on existing
+    tables must be nullable or have a server_default.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column.name} " \
+                  f"{column.type.compile(dialect=connection.dialect)}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(str(default))}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            connection.execute(text(ddl))
+            print(f"➕ Added column {table.name}.{column.name}")
+
+
+def schema_fingerprint() -> str:
+    """
+    Hash of everything init_db() creates: table and index DDL, the cube
+    views and the suggestion lookup indexes. It changes whenever the models do, so a matching stored value means
+    init_db() has nothing to do. The gazetteer is included so that a new one
+    gets stored coordinates re-geocoded (see init_db.queue_regeocoding).
+    """
+    from db_models import Base
+    from geocoding import gazetteer_version
+    from analytics import CUBES
+    from services.db_suggest_service import PREFIX_INDEX_SQL, TRIGRAM_INDEX_SQL
+    dialect = postgresql.dialect()
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    for cube in CUBES.values():
+        for statement in cube.create_sql():
+            digest.update(statement.encode())
+    for statement in (PREFIX_INDEX_SQL,) + TRIGRAM_INDEX_SQL:
+        digest.update(statement.encode())
+    digest.update(gazetteer_version().encode())
+    return digest.hexdigest()
+
+
+def stored_schema_fingerprint() -> Optional[str]:
+    """The fingerprint recorded by the last completed initialization, or None (also when the database is missing)"""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text("SELECT fingerprint FROM schema_version WHERE id = 1")).scalar()
+    except Exception:
+        return None
+
+
+def record_schema_fingerprint(fingerprint: str):
+    with engine.begin() as connection:
+        connection.execute(text("""
+            INSERT INTO schema_version (id, fingerprint, applied_at) VALUES (1, :fingerprint, now())
+            ON CONFLICT (id) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, applied_at = EXCLUDED.applied_at
+        """), {"fingerprint": fingerprint})
+
+
+@contextmanager
+def schema_lock():
+    """Serialize schema initialization across containers starting at the same time"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+
+
+def warm_pool(count: int) -> int:
+    """Open up to count connections on the primary and every replica and return them to their pools"""
+    opened = 0
+    for pooled_engine in [engine] + [replica.engine for replica in replica_router.replicas]:
+        connections = []
+        try:
+            for _ in range(min(count, pooled_engine.pool.size())):
+                connections.append(pooled_engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+        opened += len(connections)
+    return opened
+
+
+def ping_database():
+    """Raise unless the primary answers a trivial query (readiness check)"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
 def test_connection():
     """Test database connection"""
     try:
@@ -1,6 +1,7 @@
 """SQLAlchemy database models for Enterprise Architecture"""
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, ForeignKey, JSON
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DateTime, Date, Boolean, ForeignKey, JSON, Index, \
+    PrimaryKeyConstraint, Table, cast, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -89,6 +90,10 @@ class User(Base):
     last_login = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Incremented by every ORM update, which only matches the version it read (see versioning.py)
+    lock_version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": lock_version}
 
 
 class ADR(Base):
@@ -106,13 +111,37 @@ class ADR(Base):
     consequences = Column(Text, nullable=False)
     stakeholders = Column(JSON, default=list)  # List of strings
     related_adrs = Column(JSON, default=list)  # List of ADR IDs
+    supersedes = Column(JSON, default=list, nullable=True)  # ADR IDs this decision replaces
+    amends = Column(JSON, default=list, nullable=True)  # ADR IDs this decision modifies
     status = Column(String(50), default="proposed", nullable=False)
     author = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    lock_version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": lock_version}
 
     # Relationship to tech debt
     tech_debts = relationship("TechDebt", back_populates="linked_adr")
+    archived_tech_debts = relationship("TechDebtArchive", back_populates="linked_adr")
+    # Graph edges derived from related_adrs, supersedes and amends (see services/db_adr_service.py)
+    links = relationship("ADRLink", back_populates="source", cascade="all, delete-orphan")
+
+
+class ADRLink(Base):
+    """A typed edge from an ADR to an ADR ID it lists (relates, supersedes or amends)"""
+    __tablename__ = "adr_links"
+
+    source_adr_id = Column(String(100), ForeignKey("adrs.adr_id", ondelete="CASCADE", onupdate="CASCADE"),
+                           primary_key=True)
+    # Not a foreign key: ADRs may list IDs that do not exist (yet); traversals skip them
+    target_adr_id = Column(String(100), primary_key=True)
+    link_type = Column(String(20), primary_key=True)
+
+    source = relationship("ADR", back_populates="links")
+
+    # Incoming edges ("which decisions supersede X"); outgoing ones use the primary key
+    __table_args__ = (Index("ix_adr_links_target", "target_adr_id", "link_type"),)
 
 
 class BusinessApp(Base):
@@ -148,14 +177,35 @@ class BusinessApp(Base):
     dependencies = Column(JSON, default=list)  # List of app IDs
 
     # Product/Supplier Information
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True, index=True)
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    lock_version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": lock_version}
 
     # Relationships
     product = relationship("Product", back_populates="business_apps")
+    locations = relationship("BusinessAppLocation", back_populates="business_app", cascade="all, delete-orphan")
+
+
+class BusinessAppLocation(Base):
+    """A geocoded entry of BusinessApp.geographic_locations (see geocoding.py)"""
+    __tablename__ = "business_app_locations"
+
+    id = Column(Integer, primary_key=True)
+    business_app_id = Column(Integer, ForeignKey("business_apps.id", ondelete="CASCADE"), nullable=False, index=True)
+    location = Column(String(255), nullable=False)  # As entered, e.g. "EMEA"
+    place = Column(String(255), nullable=False)  # Gazetteer name it resolved to
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+
+    business_app = relationship("BusinessApp", back_populates="locations")
+
+    # Map bounding-box queries
+    __table_args__ = (Index("ix_business_app_locations_location", "latitude", "longitude"),)
 
 
 class TechDebt(Base):
@@ -178,6 +228,9 @@ class TechDebt(Base):
     tags = Column(JSON, default=list)  # List of strings
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    lock_version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": lock_version}
 
     # Relationship to ADR
     linked_adr = relationship("ADR", back_populates="tech_debts")
@@ -195,13 +248,23 @@ class Supplier(Base):
     contact_phone = Column(String(50), nullable=True)
     address = Column(Text, nullable=True)
 
+    # Coordinates of the address, resolved from the offline gazetteer (see geocoding.py)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    lock_version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": lock_version}
 
     # Relationship to products
     products = relationship("Product", back_populates="supplier", cascade="all, delete-orphan")
 
+    # Map bounding-box queries
+    __table_args__ = (Index("ix_suppliers_location", "latitude", "longitude"),)
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -211,7 +274,7 @@ class Product(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     version = Column(String(100), nullable=True)
-    supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False, index=True)
     product_url = Column(String(500), nullable=True)
     support_url = Column(String(500), nullable=True)
     license_type = Column(String(100), nullable=True)  # e.g., "Commercial", "Open Source", "Subscription"
@@ -219,7 +282,136 @@ class Product(Base):
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    lock_version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": lock_version}
 
     # Relationships
     supplier = relationship("Supplier", back_populates="products")
     business_apps = relationship("BusinessApp", back_populates="product")
+    archived_business_apps = relationship("BusinessAppArchive", back_populates="product")
+
+
+def archive_table(table: Table, name: str) -> Table:
+    """A copy of a table for the rows the archival job moves out of it, with the time each was moved"""
+    archive = table.to_metadata(Base.metadata, name=name)
+    archive.c.id.autoincrement = False  # Rows keep the id they had
+    archive.append_column(Column("archived_at", DateTime, nullable=False))
+    return archive
+
+
+class BusinessAppArchive(Base):
+    """A retired business app moved out of business_apps (see services/db_archive_service.py)"""
+    __table__ = archive_table(BusinessApp.__table__, "business_apps_archive")
+
+    product = relationship("Product", back_populates="archived_business_apps")
+
+
+class TechDebtArchive(Base):
+    """A resolved or won't-fix tech debt item moved out of tech_debt, still linked to its ADR"""
+    __table__ = archive_table(TechDebt.__table__, "tech_debt_archive")
+
+    linked_adr = relationship("ADR", back_populates="archived_tech_debts")
+
+
+# ADR pages list the linked items, archived ones included
+Index("ix_tech_debt_archive_linked_adr_id", TechDebtArchive.linked_adr_id)
+
+# App pages and merges find the apps listing an app among their dependencies
+# with jsonb containment (CAST(dependencies AS JSONB) @> ...), which this serves
+Index("ix_business_apps_dependencies", cast(BusinessApp.dependencies, JSONB), postgresql_using="gin")
+Index("ix_business_apps_archive_dependencies", cast(BusinessAppArchive.dependencies, JSONB), postgresql_using="gin")
+
+
+class SuggestionValue(Base):
+    """
+    How many business apps and tech debt items use a value of a free-text
+    field, for type-ahead (see services/db_suggest_service.py)
+    """
+    __tablename__ = "suggestion_values"
+
+    field = Column(String(50), primary_key=True)  # owner, technology, cloud_provider, tag or app_name
+    value = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
+class TechDebtSnapshot(Base):
+    """
+    Daily tech debt counts per priority/status/owner. Rows with tag '' count
+    every item once; rows with a tag count the items carrying that tag.
+    """
+    __tablename__ = "tech_debt_snapshots"
+
+    snapshot_date = Column(Date, nullable=False)
+    tag = Column(String(100), nullable=False, default="")
+    priority = Column(String(50), nullable=False)
+    status = Column(String(50), nullable=False)
+    owner = Column(String(255), nullable=False)
+
+    count = Column(Integer, nullable=False, default=0)
+    overdue_count = Column(Integer, nullable=False, default=0)  # Open and past target_resolution_date
+    # Age (days since created_date) of the items in the row
+    age_0_30 = Column(Integer, nullable=False, default=0)
+    age_31_90 = Column(Integer, nullable=False, default=0)
+    age_91_180 = Column(Integer, nullable=False, default=0)
+    age_181_365 = Column(Integer, nullable=False, default=0)
+    age_over_365 = Column(Integer, nullable=False, default=0)
+    age_days_total = Column(BigInteger, nullable=False, default=0)
+
+    # Trend queries filter on tag and a date range: one range scan of the primary key
+    __table_args__ = (PrimaryKeyConstraint("tag", "snapshot_date", "priority", "status", "owner"),)
+
+
+class Job(Base):
+    """Persistent background job, claimed by worker processes (see jobs.py)"""
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    progress = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Retries and leases
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    locked_by = Column(String(255), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Claim query: next due job of a type
+        Index("ix_jobs_queued", "job_type", "run_after", postgresql_where=text("status = 'queued'")),
+        # Concurrency limits and lease expiry only look at running jobs
+        Index("ix_jobs_running", "job_type", "heartbeat_at", postgresql_where=text("status = 'running'")),
+    )
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by API processes with RATE_LIMIT_BACKEND=postgres (see rate_limit.py)"""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)  # route class:user or address
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    # Recomputable state: skip the WAL, rows written on every request
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+
+class SchemaVersion(Base):
+    """Fingerprint of the schema init_db() last created (see database.schema_fingerprint)"""
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)  # Single row, id 1
+    fingerprint = Column(String(64), nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
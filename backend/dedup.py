@@ -0,0 +1,213 @@
+"""
+Near-duplicate detection for names of suppliers, products and applications
+
+Names are compared after normalization: casefolded, accents and punctuation
+removed, and legal forms dropped, so "Microsoft", "Microsoft Corporation" and
+"Microsoft Corp." are the same name. Differently spelled names are scored by
+two measures, and the lower score counts:
+- Dice similarity of the character bigrams of the whole name ("Microsft" is
+  0.8 similar to "Microsoft")
+- the share of the words of each name that have a near-identical word in the
+  other, so a long shared prefix alone ("Dynamics 365 Sales" vs "Dynamics 365
+  Finance") does not make a duplicate
+Names with different numbers ("Windows 10", "Windows 11") never match.
+
+Comparing every pair is O(n^2). find_clusters() only compares names sharing
+the first or last letters of a word (blocking), and within large blocks only
+names next to each other in sorted order, so 100k names take seconds.
+Matching names are grouped into clusters led by their first member, which
+every merge must match as well.
+"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import combinations
+from operator import add
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+# Dropped from names unless nothing else is left
+LEGAL_FORMS = frozenset({
+    "ab", "ag", "as", "bv", "co", "com", "company", "corp", "corporation", "gmbh", "inc", "incorporated", "kg",
+    "kk", "llc", "llp", "lp", "ltd", "limited", "nv", "oy", "plc", "pte", "pty", "sa", "sarl", "sas", "se", "spa",
+    "srl", "the"
+})
+# Words at least this similar count as the same word (one typo in a 9-letter word)
+WORD_MATCH = 0.8
+FRAGMENT_LENGTH = 4
+# Blocks larger than this compare each name with its WINDOW neighbours only
+MAX_BLOCK = 20
+WINDOW = 5
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+class Fingerprint:
+    """A normalized name with the bigram sets comparing it needs (computed on first use)"""
+
+    def __init__(self, name: str):
+        self.words = normalize(name)
+        self.compact = "".join(self.words)  # The words without spaces
+        self.numbers = tuple(sorted(word for word in self.words if word.isdigit()))
+
+    @cached_property
+    def bigrams(self) -> frozenset:
+        return _bigrams(" ".join(self.words))
+
+    @cached_property
+    def word_bigrams(self) -> Tuple[frozenset, ...]:
+        return tuple(_bigrams(word) for word in self.words)
+
+
+@dataclass
+class Cluster:
+    members: List[Hashable]  # Record keys, in input order
+    score: float  # Lowest similarity of the matches that joined the cluster
+
+
+def normalize(name: str) -> Tuple[str, ...]:
+    """The words of a name: casefolded, accent-free, alphanumeric, legal forms dropped"""
+    folded = name.casefold()
+    if not folded.isascii():
+        decomposed = unicodedata.normalize("NFKD", folded)
+        folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    words = _NON_WORD.sub(" ", folded.replace("&", " and ")).split()
+    return tuple(word for word in words if word not in LEGAL_FORMS) or tuple(words)
+
+
+def _bigrams(value: str) -> frozenset:
+    # Padded like pg_trgm, so the first and last letters of words weigh more
+    padded = f" {value} "
+    return frozenset(map(add, padded, padded[1:]))
+
+
+def _dice(a: frozenset, b: frozenset) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+def _matched_words(a: Fingerprint, b: Fingerprint) -> int:
+    """How many words of a have a near-identical word in b"""
+    matched = 0
+    for word, bigrams in zip(a.words, a.word_bigrams):
+        if word in b.words or any(not word.isdigit() and len(word) > 1 and _dice(bigrams, other) >= WORD_MATCH
+                                  for other in b.word_bigrams):
+            matched += 1
+    return matched
+
+
+def similarity(a: Fingerprint, b: Fingerprint, minimum: float = 0.0) -> float:
+    """0 (unrelated) to 1 (the same normalized name); 0 as soon as the score is known to be below minimum"""
+    if a.numbers != b.numbers or not a.compact or not b.compact:
+        return 0.0
+    if a.compact == b.compact:
+        return 1.0
+    total = len(a.bigrams) + len(b.bigrams)
+    if 2 * min(len(a.bigrams), len(b.bigrams)) < minimum * total:
+        return 0.0  # Even if all bigrams of the shorter name were shared
+    score = 2 * len(a.bigrams & b.bigrams) / total
+    if score < minimum or score == 0.0:
+        return 0.0
+    words = (_matched_words(a, b) + _matched_words(b, a)) / (len(a.words) + len(b.words))
+    return min(score, words)
+
+
+def fragments(words: Tuple[str, ...]) -> Set[str]:
+    """Blocking keys: the first and last letters of each word (a typo rarely hits both ends)"""
+    return {key for word in words if not word.isdigit()
+            for key in (f"^{word[:FRAGMENT_LENGTH]}", f"{word[-FRAGMENT_LENGTH:]}$")}
+
+
+def find_clusters(records: Sequence[Tuple[Hashable, str]], threshold: float, max_block: int = MAX_BLOCK,
+                  window: int = WINDOW) -> Tuple[List[Cluster], int]:
+    """Clusters of (key, name) records with near-duplicate names, largest first, and the comparisons made"""
+    prints = [Fingerprint(name) for _, name in records]
+    parent = list(range(len(records)))
+    scores: Dict[int, float] = {}
+
+    def leader(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    # Identical normalized names match without comparing; one of each goes on
+    representatives = []
+    first_by_name: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+    for index, fp in enumerate(prints):
+        if fp.compact:
+            first = first_by_name.setdefault((fp.compact, fp.numbers), index)
+            if first == index:
+                representatives.append(index)
+            else:
+                parent[index] = first
+                scores[first] = 1.0
+
+    # Blocking: only names sharing a word start or end (and their numbers, which
+    # must be equal anyway) are compared. Small blocks compare all their pairs;
+    # large ones ("^solu" of every "Solutions") only neighbours in name order,
+    # reversed for word ends, so the pairs compared grow linearly.
+    blocks: Dict[Tuple[str, Tuple[str, ...]], List[int]] = {}
+    for index in representatives:
+        for key in fragments(prints[index].words):
+            blocks.setdefault((key, prints[index].numbers), []).append(index)
+
+    comparisons = 0
+    compared: Set[Tuple[int, int]] = set()
+    for (key, _), members in blocks.items():
+        if len(members) <= max_block:
+            pairs = combinations(members, 2)
+        else:
+            ends = key.endswith("$")
+            members = sorted(members, key=lambda index: prints[index].compact[::-1] if ends else prints[index].compact)
+            pairs = ((a, b) for offset, a in enumerate(members) for b in members[offset + 1:offset + 1 + window])
+        for a, b in pairs:
+            a, b = min(a, b), max(a, b)
+            leader_a, leader_b = leader(a), leader(b)
+            if leader_a == leader_b or (a, b) in compared:
+                continue
+            compared.add((a, b))
+            comparisons += 1
+            score = similarity(prints[a], prints[b], threshold)
+            if score < threshold:
+                continue
+            # Clusters only merge if their first members match too, so a chain of small
+            # differences ("Kaber", "Kabers", "Labers", ...) does not join unrelated names
+            if (leader_a, leader_b) != (a, b):
+                comparisons += 1
+                score = min(score, similarity(prints[leader_a], prints[leader_b], threshold))
+                if score < threshold:
+                    continue
+            kept, merged = min(leader_a, leader_b), max(leader_a, leader_b)
+            parent[merged] = kept
+            scores[kept] = min(score, scores.get(kept, 1.0), scores.pop(merged, 1.0))
+
+    grouped: Dict[int, List[int]] = {}
+    for index in range(len(records)):
+        grouped.setdefault(leader(index), []).append(index)
+    clusters = [Cluster(members=[records[index][0] for index in members], score=round(scores[group], 3))
+                for group, members in grouped.items() if len(members) > 1]
+    clusters.sort(key=lambda cluster: (-len(cluster.members), -cluster.score))
+    return clusters, comparisons
+
+
+def best_matches(name: str, candidates: Iterable[Tuple[Hashable, str]], threshold: float,
+                 limit: int) -> List[Tuple[Hashable, float]]:
+    """The (key, similarity) of the candidates at least threshold similar to a name, most similar first"""
+    target = Fingerprint(name)
+    matches = []
+    for key, candidate in candidates:
+        score = similarity(target, Fingerprint(candidate), threshold)
+        if score >= threshold:
+            matches.append((key, round(score, 3)))
+    matches.sort(key=lambda match: -match[1])
+    return matches[:limit]
+
+
+def search_fragments(name: str) -> List[str]:
+    """
+    Lower-case fragments for a LIKE prefilter of candidate names: the first and
+    last four letters of each word, one of which a near-duplicate almost
+    always keeps
+    """
+    words = [word for word in normalize(name) if len(word) >= 3 and not word.isdigit()] or list(normalize(name))
+    return sorted({fragment for word in words for fragment in (word[:FRAGMENT_LENGTH], word[-FRAGMENT_LENGTH:])})
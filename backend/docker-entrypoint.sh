@@ -7,19 +7,9 @@ echo "============================================================"
 echo "EA Direct Backend - Starting up"
 echo "============================================================"
 
-# Wait for PostgreSQL to be ready
-echo "Waiting for PostgreSQL to be ready..."
-until python -c "import psycopg2; psycopg2.connect(host='${DATABASE_HOST}', port=${DATABASE_PORT}, user='${DATABASE_USER}', password='${DATABASE_PASSWORD}', dbname='postgres')" 2>/dev/null; do
-  echo "PostgreSQL is unavailable - sleeping"
-  sleep 2
-done
-
-echo "✅ PostgreSQL is ready!"
-echo ""
-
-# Run database initialization
-echo "Initializing database..."
-python init_db.py
+# Wait for PostgreSQL, then initialize the database. With FAST_START (the
+# default) this is a no-op when the stored schema version matches the models.
+python init_db.py --wait
 
 echo ""
 echo "============================================================"
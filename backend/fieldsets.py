@@ -0,0 +1,108 @@
+"""
+Sparse fieldsets for the collection endpoints (?fields=id,title,status)
+
+A FieldSet maps the fields of a response model to the ORM columns they are
+read from. A list request naming fields loads only those columns (load_only,
+plus a joined load of just the columns needed from a related row) and answers
+with a trimmed schema holding only those fields, so list pages never read the
+large Text and JSON columns they do not show.
+"""
+import uuid
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, create_model
+from sqlalchemy.orm import joinedload, load_only
+import db_models
+import models
+
+
+@dataclass(frozen=True)
+class FieldSet:
+    schema: Type[BaseModel]
+    entity: Any  # ORM class
+    renamed: Dict[str, str] = field(default_factory=dict)  # Field -> column attribute, where the names differ
+    related: Dict[str, Tuple[str, str]] = field(default_factory=dict)  # Field -> (relationship, column)
+    lists: Tuple[str, ...] = ()  # JSON list fields returned as [] when the column is NULL
+    archive: Any = None  # ORM class of the archive table, if the entity has one (see services/db_archive_service.py)
+
+    def parse(self, value: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """The requested fields in order, or None for the full representation"""
+        if value is None:
+            return None
+        fields = tuple(dict.fromkeys(part.strip() for part in value.split(",") if part.strip()))
+        unknown = [name for name in fields if name not in self.schema.model_fields]
+        if unknown or not fields:
+            raise ValueError(f"Invalid fields: {', '.join(unknown) or '(none)'}. "
+                             f"Allowed values: {', '.join(self.schema.model_fields)}")
+        return fields
+
+    def load_options(self, fields: Tuple[str, ...], archived: bool = False) -> List:
+        """
+        Loader options reading only the columns behind the fields, from the
+        entity or its archive (fields without a column, like archived_at of
+        hot rows, are None)
+        """
+        entity = self.archive if archived else self.entity
+        attributes = [self.renamed.get(name, name) for name in fields if name not in self.related]
+        columns = [getattr(entity, attribute) for attribute in attributes if hasattr(entity, attribute)]
+        options = [load_only(*(columns or [entity.id]))]
+        by_relationship: Dict[str, List[str]] = {}
+        for name in fields:
+            if name in self.related:
+                relationship, column = self.related[name]
+                by_relationship.setdefault(relationship, []).append(column)
+        for relationship, related_columns in by_relationship.items():
+            attribute = getattr(entity, relationship)
+            target = attribute.property.mapper.class_
+            options.append(joinedload(attribute).load_only(*(getattr(target, column) for column in related_columns)))
+        return options
+
+    def dump(self, objects: List[Any], fields: Tuple[str, ...]) -> List[BaseModel]:
+        """Rows loaded with load_options() as instances of the trimmed schema"""
+        schema = trimmed_schema(self.schema, fields)
+        return [schema(**{name: self._value(obj, name) for name in fields}) for obj in objects]
+
+    def _value(self, obj: Any, name: str) -> Any:
+        if name in self.related:
+            relationship, column = self.related[name]
+            target = getattr(obj, relationship)
+            value = getattr(target, column) if target is not None else None
+        else:
+            value = getattr(obj, self.renamed.get(name, name), None)
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        if value is None and name in self.lists:
+            return []
+        return value
+
+
+@lru_cache(maxsize=256)
+def trimmed_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """The schema restricted to some of its fields, each optional"""
+    return create_model(
+        f"{schema.__name__}Fields",
+        **{name: (Optional[schema.model_fields[name].annotation], None) for name in fields}
+    )
+
+
+ADR_FIELDS = FieldSet(models.ADR, db_models.ADR, renamed={"id": "adr_id"}, lists=("supersedes", "amends"))
+BUSINESS_APP_FIELDS = FieldSet(
+    models.BusinessApp, db_models.BusinessApp,
+    renamed={"id": "app_id"},
+    related={"product_id": ("product", "product_id"), "product_name": ("product", "name")},
+    lists=("geographic_locations", "technologies", "dependencies"),
+    archive=db_models.BusinessAppArchive
+)
+TECH_DEBT_FIELDS = FieldSet(
+    models.TechDebt, db_models.TechDebt,
+    renamed={"id": "debt_id"},
+    related={"linked_adr_id": ("linked_adr", "adr_id")},
+    archive=db_models.TechDebtArchive
+)
+SUPPLIER_FIELDS = FieldSet(models.Supplier, db_models.Supplier, renamed={"id": "supplier_id"})
+PRODUCT_FIELDS = FieldSet(
+    models.Product, db_models.Product,
+    renamed={"id": "product_id"},
+    related={"supplier_id": ("supplier", "supplier_id"), "supplier_name": ("supplier", "name")}
+)
@@ -12,8 +12,9 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from db_models import (
-    BusinessApp, ADR, TechDebt, Supplier, Product, User
+    BusinessApp, ADR, TechDebt, Supplier, Product, User, BusinessAppArchive, TechDebtArchive
 )
+from services.db_suggest_service import rebuild_suggestions
 import random
 
 def clear_sample_data(db: Session):
@@ -21,7 +22,9 @@ def clear_sample_data(db: Session):
     print("Clearing existing data...")
     # Delete in order respecting foreign key constraints
     db.query(TechDebt).delete()  # References ADR
+    db.query(TechDebtArchive).delete()  # References ADR
     db.query(BusinessApp).delete()  # References Product
+    db.query(BusinessAppArchive).delete()  # References Product
     db.query(ADR).delete()  # No FK dependencies
     db.query(Product).delete()  # References Supplier
     db.query(Supplier).delete()  # No FK dependencies
@@ -411,6 +414,10 @@ def generate_all_sample_data():
         adrs = generate_adrs(db)
         debt = generate_tech_debt(db, adrs)
 
+        # The bulk deletes in clear_sample_data() bypass the ORM write hooks
+        rebuild_suggestions(db.connection())
+        db.commit()
+
         print("\n" + "="*60)
         print("✓ Sample data generation completed successfully!")
         print("="*60)
@@ -0,0 +1,124 @@
+"""
+Offline geocoding against the gazetteer shipped in data/gazetteer.csv
+
+Addresses and location names are resolved to the coordinates of the city,
+US state, country or region they mention - precise enough to place suppliers and app
+locations on a world map, with no network calls. Suppliers are geocoded when
+their address is saved, app locations when an app's geographic_locations are
+saved (see services/db_geo_service.py, which also backfills bulk-loaded rows).
+
+Matching, most specific first:
+1. an address part that is exactly a known city ("Redmond" in
+   "One Microsoft Way, Redmond, WA 98052, USA"), leftmost wins
+2. a known city named inside a part ("Sydney" in "Sydney NSW 2000"),
+   rightmost wins, since addresses run from street to country
+3. the same two steps for US states ("CA 95814", "Texas"), then for
+   countries and regions ("UK", "EMEA"), except that the rightmost exact
+   part wins, since addresses end with the state or country
+
+Two-letter codes shared by a state and a country ("CA", "CO", "IL") are the
+state: US addresses end in "City, ST" far more often than others end in an
+ISO country code, and a known city still wins ("Toronto, CA" is Toronto).
+Other two-letter country and region codes only count as the last part of an
+address, with nothing else in it.
+"""
+import csv
+import hashlib
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv")
+
+# Longest place name (in words) looked for inside an address part
+MAX_NAME_WORDS = 4
+# Aliases this short ("UK", "USA", "CH") collide with words and state codes, so
+# they only match a whole address part
+MIN_INNER_MATCH_LENGTH = 4
+# Country and region aliases this short (ISO codes) only match the last
+# address part, when it holds nothing else (no postcode)
+MAX_CODE_LENGTH = 2
+# Lower is more specific: the order matches are preferred in, and which place
+# keeps a name shared by several (Singapore the city, CA the state)
+KIND_RANKS = {"city": 0, "state": 1, "country": 2, "region": 2}
+
+_NON_WORD = re.compile(r"[^a-z ]+")
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    kind: str  # city, state (US), country or region
+    country: str
+    latitude: float
+    longitude: float
+
+
+def normalize(value: str) -> str:
+    """Casefolded, accent-free, letters and single spaces only ("Zürich 8001" -> "zurich")"""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    ascii_only = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", ascii_only.replace(".", ""))).strip()
+
+
+@lru_cache(maxsize=1)
+def gazetteer_version() -> str:
+    """Hash of the gazetteer file; coordinates stored under another version may be outdated"""
+    with open(GAZETTEER_PATH, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> Dict[str, Place]:
+    places: Dict[str, Place] = {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            place = Place(name=row["name"], kind=row["kind"], country=row["country"],
+                          latitude=float(row["latitude"]), longitude=float(row["longitude"]))
+            for name in [row["name"]] + [alias for alias in row["aliases"].split("|") if alias]:
+                key = normalize(name)
+                if key not in places or KIND_RANKS[place.kind] < KIND_RANKS[places[key].kind]:
+                    places[key] = place
+    return places
+
+
+@lru_cache(maxsize=4096)
+def geocode(text: Optional[str]) -> Optional[Place]:
+    """The most specific place an address or location name refers to, or None"""
+    if not text:
+        return None
+    places = _gazetteer()
+    raw_parts = [part.strip() for part in re.split(r"[,;\n/]+", text)]
+    parts = [(normalize(part), part) for part in raw_parts]
+    parts = [(part, raw) for part, raw in parts if part]
+
+    # (rank, position) per candidate; lower rank is more specific, position breaks ties
+    best: Optional[Tuple[Tuple[int, int], Place]] = None
+    for index, (part, raw) in enumerate(parts):
+        last = index == len(parts) - 1 and raw.replace(".", "").isalpha()
+        for place, exact in _places_in(part, places):
+            if len(part) <= MAX_CODE_LENGTH and place.kind != "state" and not last:
+                continue  # A country code mid-address, or followed by a postcode
+            rank = 2 * KIND_RANKS[place.kind] + (0 if exact else 1)
+            # Exact city parts: leftmost wins; everything else: rightmost wins
+            key = (rank, index if exact and place.kind == "city" else -index)
+            if best is None or key < best[0]:
+                best = (key, place)
+    return best[1] if best else None
+
+
+def _places_in(part: str, places: Dict[str, Place]) -> List[Tuple[Place, bool]]:
+    if part in places:
+        return [(places[part], True)]
+    words = part.split(" ")
+    found = []
+    for size in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            name = " ".join(words[start:start + size])
+            if len(name) >= MIN_INNER_MATCH_LENGTH and name in places:
+                found.append((places[name], False))
+    return found
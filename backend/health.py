@@ -0,0 +1,53 @@
+"""
+Liveness and readiness probes
+
+/healthz answers as soon as the process serves requests and touches no
+dependency, so a slow database never gets healthy containers restarted.
+/readyz says whether this process should receive traffic: startup warm-up has
+finished and every dependency check passes. Check results are cached for a
+couple of seconds, so any number of probes costs at most one round of checks
+per interval. Both paths bypass rate limiting and admission control.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+LIVENESS_PATH = "/healthz"
+READINESS_PATH = "/readyz"
+PROBE_PATHS = (LIVENESS_PATH, READINESS_PATH)
+
+
+class ReadinessChecks:
+    """Named dependency checks (callables raising on failure) with a short-lived cached result"""
+
+    def __init__(self, checks: Dict[str, Callable[[], None]], cache_seconds: float):
+        self.checks = checks
+        self.cache_seconds = cache_seconds
+        self.warmed_up = False  # Set once startup warm-up has finished
+        self._result: Optional[Tuple[bool, Dict[str, str]]] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def run(self) -> Tuple[bool, Dict[str, str]]:
+        """(ready, check name -> "ok" or the failure)"""
+        if not self.warmed_up:
+            return False, {"startup": "warming up"}
+        # Concurrent probes wait for the one running check instead of each querying
+        with self._lock:
+            now = time.monotonic()
+            if self._result is None or now >= self._expires:
+                self._result = self._check()
+                self._expires = time.monotonic() + self.cache_seconds
+            return self._result
+
+    def _check(self) -> Tuple[bool, Dict[str, str]]:
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                check()
+                results[name] = "ok"
+            except Exception as e:
+                print(f"❌ Readiness check {name} failed: {e}")
+                # Only the exception type: probes are unauthenticated
+                results[name] = f"failed ({type(e).__name__})"
+        return all(result == "ok" for result in results.values()), results
@@ -0,0 +1,249 @@
+"""
+Profile image processing pipeline
+
+Uploaded images are center-cropped to a square and written as several sizes
+in both WebP and JPEG. Objects are stored (see storage.py) under a prefix
+named after the SHA-256 of the uploaded bytes, so re-uploading the same
+picture is a no-op and every variant URL can be cached forever:
+
+    profile_images/<hash>/<size>.<webp|jpg>
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from io import BytesIO
+from typing import TYPE_CHECKING, BinaryIO, Dict, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.staticfiles import StaticFiles
+from config import settings
+from storage import StorageBackend
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+PROFILE_IMAGE_SIZES = (32, 64, 128, 400)
+PRIMARY_SIZE = 400
+PROFILE_IMAGE_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True})
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Leading bytes of each accepted upload format, checked before anything is decoded
+IMAGE_SIGNATURES = {
+    "JPEG": (b"\xff\xd8\xff",),
+    "PNG": (b"\x89PNG\r\n\x1a\n",),
+    "WEBP": (b"RIFF",),
+}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_CONTENT_ADDRESSED_URL = re.compile(r"^(.*/profile_images/[0-9a-f]{64})/\d+\.(?:jpg|webp)$")
+_CONTENT_ADDRESSED_PATH = re.compile(r"^profile_images/[0-9a-f]{64}/\d+\.(?:jpg|webp)$")
+
+
+class UploadTooLarge(ValueError):
+    """The upload exceeds the byte or pixel limit"""
+
+
+class UnsupportedImage(ValueError):
+    """The upload is not a JPEG, PNG or WebP image"""
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """Identify JPEG, PNG or WebP from the first bytes of a file"""
+    for format_name, signatures in IMAGE_SIGNATURES.items():
+        if header.startswith(signatures):
+            if format_name == "WEBP" and header[8:12] != b"WEBP":
+                continue
+            return format_name
+    return None
+
+
+def hash_upload(fileobj: BinaryIO, max_bytes: int) -> Tuple[str, int]:
+    """
+    SHA-256 hex digest and size of an upload, read in fixed-size chunks.
+    Stops reading as soon as the upload is larger than max_bytes.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    while chunk := fileobj.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"File size exceeds {max_bytes // (1024 * 1024)}MB limit")
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def profile_image_key(digest: str, size: int = PRIMARY_SIZE, ext: str = "jpg") -> str:
+    return f"profile_images/{digest}/{size}.{ext}"
+
+
+def profile_image_variants(url: Optional[str]) -> Optional[Dict[str, Dict[int, str]]]:
+    """Map format -> size -> URL for a content-addressed profile image URL"""
+    match = _CONTENT_ADDRESSED_URL.match(url or "")
+    if not match:
+        return None
+    base = match.group(1)
+    return {ext: {size: f"{base}/{size}.{ext}" for size in PROFILE_IMAGE_SIZES}
+            for ext in PROFILE_IMAGE_FORMATS}
+
+
+@lru_cache(maxsize=1)
+def _pil():
+    """Pillow's Image and ImageOps, imported on first use so API startup does not pay for them"""
+    from PIL import Image, ImageOps
+    # Pillow refuses images over twice this size while reading the header; the
+    # check in process_profile_image rejects anything over it
+    Image.MAX_IMAGE_PIXELS = settings.max_image_pixels
+    return Image, ImageOps
+
+
+def _square_rgb(image: "Image.Image") -> "Image.Image":
+    """Flatten transparency onto white and center-crop to a square"""
+    Image, ImageOps = _pil()
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    width, height = image.size
+    if width != height:
+        side = min(width, height)
+        left = (width - side) // 2
+        top = (height - side) // 2
+        image = image.crop((left, top, left + side, top + side))
+    return image
+
+
+def process_profile_image(fileobj: BinaryIO, storage: StorageBackend) -> str:
+    """
+    Store all size/format variants of an uploaded image and return the URL of
+    the primary (400px JPEG) variant. Identical uploads are only processed once.
+
+    The upload is read from a (spooled) file in chunks and never held in memory
+    as a whole; the format is sniffed from its magic bytes and the pixel count
+    is checked from the header before any decoding happens.
+    """
+    fileobj.seek(0)
+    format_name = sniff_image_format(fileobj.read(16))
+    if format_name is None:
+        raise UnsupportedImage("File is not a JPEG, PNG or WebP image")
+
+    digest, _ = hash_upload(fileobj, settings.max_upload_bytes)
+    primary_key = profile_image_key(digest)
+    if storage.exists(primary_key):
+        return storage.url(primary_key)
+
+    Image, _ = _pil()
+    try:
+        image = Image.open(fileobj, formats=[format_name])
+    except Image.DecompressionBombError as e:
+        raise UploadTooLarge(str(e)) from e
+    except OSError as e:
+        raise UnsupportedImage(f"Cannot decode image: {e}") from e
+    width, height = image.size
+    if width * height > Image.MAX_IMAGE_PIXELS:
+        raise UploadTooLarge(f"Image dimensions {width}x{height} exceed the {Image.MAX_IMAGE_PIXELS} pixel limit")
+
+    # For JPEGs, let the decoder downscale by 1/2, 1/4 or 1/8 while keeping both
+    # sides >= the primary size, so large photos never decode at full resolution
+    image.draft('RGB', (PRIMARY_SIZE, PRIMARY_SIZE))
+    image = _square_rgb(image)
+    # reducing_gap does a fast integer reduce() before the final LANCZOS pass
+    image = image.resize((PRIMARY_SIZE, PRIMARY_SIZE), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+    # The primary JPEG is written last: its presence marks a complete variant set
+    # (identical concurrent uploads just rewrite identical objects)
+    for size in PROFILE_IMAGE_SIZES:
+        variant = image if size == PRIMARY_SIZE else image.resize((size, size), Image.Resampling.LANCZOS)
+        for ext, (format_name, content_type, options) in PROFILE_IMAGE_FORMATS.items():
+            buffer = BytesIO()
+            variant.save(buffer, format_name, **options)
+            buffer.seek(0)
+            key = profile_image_key(digest, size, ext)
+            if key != primary_key:
+                storage.put(key, buffer, content_type, cache_control=IMMUTABLE_CACHE_CONTROL)
+            else:
+                primary = buffer
+    storage.put(primary_key, primary, "image/jpeg", cache_control=IMMUTABLE_CACHE_CONTROL)
+    return storage.url(primary_key)
+
+
+def remove_profile_image(url: Optional[str], storage: StorageBackend):
+    """Delete the stored objects behind a profile image URL"""
+    key = storage.key_from_url(url)
+    if not key:
+        return
+    match = re.match(r"^(profile_images/[0-9a-f]{64})/", key)
+    if match:
+        storage.delete_prefix(match.group(1) + "/")
+    else:
+        # Legacy single-file upload
+        storage.delete(key)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware capping the request body size of upload endpoints.
+
+    Requests whose Content-Length is over the limit get a 413 before any of the
+    body is read; chunked bodies are counted as they arrive and rejected the
+    moment they cross the limit, so the multipart parser never spools more than
+    max_bytes to disk.
+    """
+
+    def __init__(self, app, max_bytes: int, path_pattern: str):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_pattern = re.compile(path_pattern)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.path_pattern.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send):
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"connection", b"close")]
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"Request body too large"}'})
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles that marks content-addressed profile images as immutable"""
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200 and _CONTENT_ADDRESSED_PATH.match(path.replace(os.sep, "/")):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
@@ -1,15 +1,35 @@
 """Database initialization script"""
+import sys
+import time
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from config import settings
-from database import init_db, test_connection, engine
-from db_models import Base, User, UserRoleEnum, UserStatusEnum
+from database import init_db, test_connection, engine, record_schema_fingerprint, schema_fingerprint, schema_lock, \
+    stored_schema_fingerprint
+from db_models import User, UserRoleEnum, UserStatusEnum
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from datetime import datetime
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+WAIT_INTERVAL_SECONDS = 0.5
+
+
+def wait_for_database():
+    """Block until PostgreSQL accepts connections (replaces polling from a fresh interpreter per attempt)"""
+    print("Waiting for PostgreSQL to be ready...")
+    while True:
+        try:
+            psycopg2.connect(
+                host=settings.database_host,
+                port=settings.database_port,
+                user=settings.database_user,
+                password=settings.database_password,
+                database="postgres",
+                connect_timeout=5
+            ).close()
+            print("✅ PostgreSQL is ready!")
+            return
+        except psycopg2.OperationalError:
+            time.sleep(WAIT_INTERVAL_SECONDS)
 
 
 def create_database():
@@ -54,6 +74,9 @@ def create_database():
 def create_default_users():
     """Create default admin and user accounts"""
     print("Creating default users...")
+    # Only imported when users may need seeding; fast starts never load bcrypt
+    from passlib.context import CryptContext
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
     with Session(engine) as session:
         # Check if users already exist
@@ -104,13 +127,42 @@ def create_default_users():
         print("   - john.doe@ea.com / password (User)")
 
 
-def main():
-    """Main initialization function"""
+def queue_regeocoding():
+    """Queue one re-geocoding of stored coordinates per gazetteer version, for the worker to run"""
+    import tasks  # Registers the job handlers enqueue() checks against
+    from jobs import enqueue
+    from geocoding import gazetteer_version
+    from db_models import Job
+
+    version = gazetteer_version()
+    with Session(engine) as session:
+        queued = session.query(Job.id).filter(
+            Job.job_type == "geocode_backfill",
+            Job.payload["gazetteer"].as_string() == version
+        ).first()
+        if queued is not None:
+            print(f"✅ Re-geocoding for gazetteer {version[:12]} already queued.")
+            return
+        enqueue(session, "geocode_backfill", {"regeocode": True, "gazetteer": version})
+        print(f"✅ Queued re-geocoding for gazetteer {version[:12]}")
+
+
+def main(wait: bool = False):
+    """Main initialization function (wait: first block until PostgreSQL is up, as the Docker entrypoint does)"""
     print("=" * 60)
     print("Enterprise Architecture Database Initialization")
     print("=" * 60)
     print()
 
+    if wait:
+        wait_for_database()
+    fingerprint = schema_fingerprint()
+    if settings.fast_start and stored_schema_fingerprint() == fingerprint:
+        print(f"✅ Schema version {fingerprint[:12]} is current. Skipping initialization.")
+        return
+
+    print()
+
     # Step 1: Create database
     if not create_database():
         print("Failed to create database. Exiting.")
@@ -126,23 +178,40 @@ def main():
 
     print()
 
-    # Step 3: Create tables
-    print("Creating database tables...")
-    try:
-        init_db()
-        print("✅ All tables created successfully!")
-    except Exception as e:
-        print(f"❌ Error creating tables: {e}")
-        return
+    with schema_lock():
+        # Another container may have finished initializing while this one waited for the lock
+        if settings.fast_start and stored_schema_fingerprint() == fingerprint:
+            print(f"✅ Schema version {fingerprint[:12]} was just initialized. Skipping initialization.")
+            return
 
-    print()
+        # Step 3: Create tables
+        print("Creating database tables...")
+        try:
+            init_db()
+            print("✅ All tables created successfully!")
+        except Exception as e:
+            print(f"❌ Error creating tables: {e}")
+            return
 
-    # Step 4: Create default users
-    try:
-        create_default_users()
-    except Exception as e:
-        print(f"❌ Error creating default users: {e}")
-        return
+        print()
+
+        # Step 4: Create default users
+        try:
+            create_default_users()
+        except Exception as e:
+            print(f"❌ Error creating default users: {e}")
+            return
+
+        # Step 5: Re-geocode coordinates resolved with an older gazetteer
+        try:
+            queue_regeocoding()
+        except Exception as e:
+            print(f"❌ Error queueing re-geocoding: {e}")
+            return
+
+        # Only recorded once everything above succeeded, so a failed run is retried on the next start
+        record_schema_fingerprint(fingerprint)
+        print(f"✅ Recorded schema version {fingerprint[:12]}")
 
     print()
     print("=" * 60)
@@ -155,4 +224,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(wait="--wait" in sys.argv)
@@ -0,0 +1,354 @@
+"""
+Persistent background jobs
+
+Long-running work (sample data generation, image processing, imports, ...) is
+recorded as a row in the jobs table. API handlers enqueue() it and return
+straight away; separate worker processes (python worker.py) claim due rows with
+SELECT ... FOR UPDATE SKIP LOCKED, run the registered handler and record the
+outcome. Work therefore never holds an HTTP worker or a client connection and
+survives API restarts.
+
+- Retries: a failing job is requeued with exponential backoff until it has
+  used max_attempts; handlers raise PermanentJobError for errors that retrying
+  cannot fix
+- Concurrency: every job type has a limit on how many of its jobs run at once
+  across all workers, enforced under a per-type advisory lock while claiming
+- Cancellation: queued jobs are cancelled immediately, running jobs stop the
+  next time they report progress
+- Leases: workers heartbeat their running jobs; a job whose worker died is
+  requeued (or failed) once its lease expires
+- Schedules: job types registered with schedule_daily() are enqueued once per
+  UTC day by whichever worker notices first
+"""
+import os
+import random
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal
+from db_models import Job
+
+JOB_STATUSES = ["queued", "running", "succeeded", "failed", "cancelled"]
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+# First key of the two-key advisory locks taken while claiming (second is hashtext(job_type))
+ADVISORY_LOCK_NAMESPACE = 7301
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when cancellation of its job was requested"""
+
+
+class PermanentJobError(Exception):
+    """Handler failure that should not be retried"""
+
+
+@dataclass
+class JobType:
+    name: str
+    handler: Callable[..., Any]
+    concurrency: int
+    max_attempts: int
+
+
+@dataclass
+class DailySchedule:
+    job_type: str
+    at: time
+
+
+_registry: Dict[str, JobType] = {}
+_schedules: List[DailySchedule] = []
+
+
+def job_handler(name: str, concurrency: int = 1, max_attempts: int = 3):
+    """
+    Register a function as the handler of a job type. It is called as
+    handler(ctx, **payload) and its return value is stored as the job result.
+    """
+    def decorator(func):
+        _registry[name] = JobType(name=name, handler=func, concurrency=concurrency, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def schedule_daily(job_type: str, at: str = "00:15"):
+    """
+    Enqueue a job type once a day at HH:MM UTC. The handler receives the day
+    as run_date="YYYY-MM-DD"; a day's job is never enqueued twice.
+    """
+    hour, minute = (int(part) for part in at.split(":"))
+    _schedules.append(DailySchedule(job_type=job_type, at=time(hour, minute)))
+
+
+def registered_types() -> Dict[str, JobType]:
+    return dict(_registry)
+
+
+def enqueue(db: Session, job_type: str, payload: Optional[Dict] = None, max_attempts: Optional[int] = None,
+            run_after: Optional[datetime] = None) -> Job:
+    """Create a queued job and commit it"""
+    if job_type not in _registry:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job = Job(
+        job_type=job_type,
+        payload=payload or {},
+        status="queued",
+        max_attempts=max_attempts or _registry[job_type].max_attempts,
+        run_after=run_after or datetime.utcnow()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: uuid.UUID) -> Optional[Job]:
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def list_jobs(db: Session, status: Optional[str] = None, job_type: Optional[str] = None, limit: int = 50) -> List[Job]:
+    query = db.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    return query.order_by(Job.created_at.desc()).limit(limit).all()
+
+
+def has_active_job(db: Session, job_type: str) -> bool:
+    """Whether a job of this type is queued or running"""
+    return db.query(Job.id).filter(Job.job_type == job_type, Job.status.in_(["queued", "running"])).first() is not None
+
+
+def cancel_job(db: Session, job: Job) -> Job:
+    """Cancel a queued job, or ask a running one to stop"""
+    now = datetime.utcnow()
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = now
+    elif job.status == "running":
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def job_to_dict(job: Job) -> Dict:
+    """JSON-friendly view of a job"""
+    return {
+        "id": str(job.id),
+        "job_type": job.job_type,
+        "status": job.status,
+        "progress": job.progress,
+        "result": job.result,
+        "error": job.error,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested,
+        "run_after": job.run_after.isoformat() if job.run_after else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+class JobContext:
+    """Handed to handlers for reporting progress and noticing cancellation"""
+
+    def __init__(self, job_id: uuid.UUID, attempt: int):
+        self.job_id = job_id
+        self.attempt = attempt
+
+    def progress(self, percent: Optional[float] = None, message: Optional[str] = None, **details):
+        """
+        Record progress (also refreshes the job's heartbeat). Raises
+        JobCancelled if cancellation was requested in the meantime.
+        """
+        progress = dict(details)
+        if percent is not None:
+            progress["percent"] = round(percent, 1)
+        if message is not None:
+            progress["message"] = message
+        with SessionLocal() as db:
+            cancel_requested = db.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(progress=progress, heartbeat_at=datetime.utcnow())
+                .returning(Job.cancel_requested)
+            ).scalar()
+            db.commit()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with +/-20% jitter for the given (1-based) attempt"""
+    delay = settings.job_retry_base_seconds * 2 ** (attempt - 1)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class Worker:
+    """Claims and runs jobs; one instance per worker process, shared by its threads"""
+
+    def __init__(self, job_types: Optional[List[str]] = None):
+        self.job_types = [name for name in (job_types or list(_registry)) if name in _registry]
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.running: Dict[uuid.UUID, str] = {}
+        self._lock = threading.Lock()
+        self._rotation = 0
+
+    def claim(self) -> Optional[Job]:
+        """Claim the next due job of any handled type whose concurrency limit allows it"""
+        with self._lock:
+            self._rotation += 1
+            offset = self._rotation % max(len(self.job_types), 1)
+        # Rotate the starting type so one busy type cannot starve the others
+        for name in self.job_types[offset:] + self.job_types[:offset]:
+            job = self._claim_type(_registry[name])
+            if job is not None:
+                return job
+        return None
+
+    def _claim_type(self, job_type: JobType) -> Optional[Job]:
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            # Serialise claims per type so the running count below cannot race
+            locked = db.execute(select(func.pg_try_advisory_xact_lock(
+                ADVISORY_LOCK_NAMESPACE, func.hashtext(job_type.name)
+            ))).scalar()
+            if not locked:
+                return None
+            running = db.query(func.count(Job.id)).filter(
+                Job.job_type == job_type.name, Job.status == "running"
+            ).scalar()
+            if running >= job_type.concurrency:
+                db.rollback()
+                return None
+            job = (
+                db.query(Job)
+                .filter(Job.job_type == job_type.name, Job.status == "queued", Job.run_after <= now)
+                .order_by(Job.run_after, Job.created_at)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                db.rollback()
+                return None
+            job.status = "running"
+            job.attempts += 1
+            job.locked_by = self.worker_id
+            job.started_at = now
+            job.heartbeat_at = now
+            db.commit()
+            db.refresh(job)
+            db.expunge(job)
+            return job
+
+    def run(self, job: Job):
+        """Run a claimed job and record its outcome"""
+        job_type = _registry[job.job_type]
+        with self._lock:
+            self.running[job.id] = job.job_type
+        values: Dict[str, Any]
+        try:
+            result = job_type.handler(JobContext(job.id, job.attempts), **(job.payload or {}))
+            values = {"status": "succeeded", "result": result, "error": None}
+        except JobCancelled:
+            values = {"status": "cancelled"}
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if isinstance(e, PermanentJobError) or job.attempts >= job.max_attempts:
+                values = {"status": "failed", "error": error}
+            elif self._cancel_requested(job.id):
+                # Handlers that never report progress cannot see the request; a retry would run them in full again
+                values = {"status": "cancelled", "error": error}
+            else:
+                values = {
+                    "status": "queued",
+                    "error": error,
+                    "run_after": datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+                }
+        finally:
+            with self._lock:
+                self.running.pop(job.id, None)
+
+        if values["status"] != "queued":
+            values["finished_at"] = datetime.utcnow()
+        values["locked_by"] = None
+        with SessionLocal() as db:
+            # Guarded by status/locked_by so a job whose lease expired and was
+            # picked up elsewhere is not overwritten
+            db.execute(
+                update(Job)
+                .where(Job.id == job.id, Job.status == "running", Job.locked_by == self.worker_id)
+                .values(**values)
+            )
+            db.commit()
+
+    def _cancel_requested(self, job_id: uuid.UUID) -> bool:
+        with SessionLocal() as db:
+            return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+
+    def enqueue_scheduled(self) -> int:
+        """Enqueue today's run of every daily schedule that is due and not yet enqueued"""
+        now = datetime.utcnow()
+        enqueued = 0
+        for schedule in _schedules:
+            if schedule.job_type not in self.job_types or now.time() < schedule.at:
+                continue
+            run_date = now.date().isoformat()
+            with SessionLocal() as db:
+                # Held until enqueue() commits, so two workers cannot both add today's job
+                db.execute(select(func.pg_advisory_xact_lock(
+                    ADVISORY_LOCK_NAMESPACE, func.hashtext(f"schedule:{schedule.job_type}")
+                )))
+                existing = db.query(Job.id).filter(
+                    Job.job_type == schedule.job_type,
+                    Job.payload["run_date"].as_string() == run_date
+                ).first()
+                if existing is None:
+                    enqueue(db, schedule.job_type, {"run_date": run_date})
+                    enqueued += 1
+        return enqueued
+
+    def heartbeat(self):
+        """Refresh the lease of every job this process is running"""
+        with self._lock:
+            job_ids = list(self.running)
+        if not job_ids:
+            return
+        with SessionLocal() as db:
+            db.execute(
+                update(Job)
+                .where(Job.id.in_(job_ids), Job.status == "running")
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            db.commit()
+
+    def requeue_expired(self) -> int:
+        """Requeue (or fail, once out of attempts) running jobs whose worker stopped heartbeating"""
+        now = datetime.utcnow()
+        expired = now - timedelta(seconds=settings.job_lease_seconds)
+        stale = (Job.status == "running", Job.heartbeat_at < expired)
+        with SessionLocal() as db:
+            cancelled = db.execute(
+                update(Job).where(*stale, Job.cancel_requested.is_(True))
+                .values(status="cancelled", locked_by=None, finished_at=now)
+            ).rowcount
+            failed = db.execute(
+                update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+                .values(status="failed", locked_by=None, finished_at=now, error="Worker lost (lease expired)")
+            ).rowcount
+            requeued = db.execute(
+                update(Job).where(*stale)
+                .values(status="queued", locked_by=None, run_after=now, error="Worker lost (lease expired)")
+            ).rowcount
+            db.commit()
+        return cancelled + failed + requeued
@@ -1,37 +1,123 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from typing import List
-from pathlib import Path
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+import threading
 import uuid
-import shutil
-from PIL import Image
-from io import BytesIO
+from math import ceil
 from config import settings
-from database import get_db
+from database import engine, get_db, ping_database, query_stats, replica_router, warm_pool
+from health import ReadinessChecks
+from query_stats import QueryCountMiddleware
+from replicas import ReadYourWritesMiddleware
+from rate_limit import AdmissionController, AdmissionMiddleware, MemoryBuckets, PostgresBuckets, RateLimiter, RateLimitMiddleware
+from auth import create_access_token, require_admin
+from tracing import setup_tracing, traced, tracer, TracedJSONResponse
+from image_pipeline import (
+    UploadSizeLimitMiddleware, UploadStaticFiles, UploadTooLarge, UnsupportedImage,
+    process_profile_image, profile_image_variants
+)
+from storage import storage, LocalStorage
+from jobs import JOB_STATUSES, FINISHED_STATUSES, cancel_job, enqueue, get_job, has_active_job, job_to_dict, list_jobs
+from tasks import attach_profile_image, incoming_upload_key
+import analytics
+from multiget import check_ids, parse_ids
+from versioning import VersionConflict, etag, parse_if_match
+from fieldsets import FieldSet, ADR_FIELDS, BUSINESS_APP_FIELDS, TECH_DEBT_FIELDS, SUPPLIER_FIELDS, PRODUCT_FIELDS
 from models import (
     ADR, ADRCreate, ADRUpdate,
     BusinessApp, BusinessAppCreate, BusinessAppUpdate,
     TechDebt, TechDebtCreate, TechDebtUpdate,
-    Supplier, SupplierCreate, SupplierUpdate,
-    Product, ProductCreate, ProductUpdate
+    Supplier, SupplierCreate, SupplierUpdate, SupplierProduct, SupplierWithProducts,
+    Product, ProductCreate, ProductUpdate,
+    ADRSummary, ADRBundle, BusinessAppSummary, BusinessAppLocation, BusinessAppBundle,
+    ADRGraph, ADRSupersession,
+    LookupRequest, MergeRequest
 )
 from services.db_user_service import user_service
-from services.db_adr_service import adr_db_service
+from services.db_adr_service import adr_db_service, LINK_TYPES, MAX_CHAIN_DEPTH, MAX_GRAPH_DEPTH
 from services.db_business_app_service import business_app_db_service
 from services.db_tech_debt_service import tech_debt_db_service
+from services.db_archive_service import archive_db_service, RestoreConflict
+from services.db_tech_debt_trend_service import tech_debt_trend_db_service, INTERVALS, OVERDUE_GROUPS
 from services.db_supplier_service import supplier_db_service
 from services.db_product_service import product_db_service
+from services.db_exposure_service import exposure_db_service, EXPOSURE_DIMENSIONS
+from services.db_geo_service import geo_db_service, parse_bbox
+from services.db_suggest_service import suggest_db_service, SUGGEST_FIELDS
+from services.db_dedup_service import dedup_db_service, DuplicatesNotFound, InvalidMerge, TARGETS as DEDUP_TARGETS
 from db_models import User as DBUser
 from pydantic import BaseModel, EmailStr
 
+ResponseClass = TracedJSONResponse if settings.tracing_enabled else JSONResponse
+
+# /readyz passes once warm-up has finished and the primary answers (see health.py)
+readiness = ReadinessChecks({"database": ping_database}, cache_seconds=settings.readiness_cache_seconds)
+
+
+def warm_up():
+    """Open pooled connections ahead of the first requests, then let /readyz pass"""
+    try:
+        opened = warm_pool(settings.startup_pool_connections)
+        print(f"🔥 Opened {opened} pooled database connections")
+    except Exception as e:
+        print(f"⚠️  Connection pool warm-up failed: {e}")
+    readiness.warmed_up = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the OpenAPI schema now rather than on the first /docs or /openapi.json request
+    app.openapi()
+    # Off the event loop, so /healthz answers while connections are being opened
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    yield
+
+
 app = FastAPI(
     title="EA Direct API",
     description="Enterprise Architecture Direct - API for managing enterprise architecture artifacts",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ResponseClass,
+    lifespan=lifespan
+)
+
+# Request, service and SQL tracing (no-op unless TRACING_ENABLED is set)
+setup_tracing(app, engine, *[replica.engine for replica in replica_router.replicas])
+
+# Reject oversized uploads while the body is still streaming in (multipart framing
+# adds a few hundred bytes on top of the file itself). Added before CORS so that
+# 413 responses still carry CORS headers.
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_upload_bytes + 64 * 1024,
+    path_pattern=r"^/(users/\d+/profile-image|storage/direct-upload)$"
 )
 
+# Per-user/per-address rate limits, then load shedding in front of them (see rate_limit.py).
+# Added before CORS so that 429 and 503 responses still carry CORS headers.
+rate_limiter = RateLimiter(
+    PostgresBuckets(engine) if settings.rate_limit_backend == "postgres" else MemoryBuckets(),
+    {
+        "login": settings.rate_limit_login_per_minute,
+        "read": settings.rate_limit_read_per_minute,
+        "write": settings.rate_limit_write_per_minute
+    } if settings.rate_limit_enabled else {}
+)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+admission = AdmissionController(
+    max_in_flight=settings.admission_max_in_flight,
+    max_pool_wait_ms=settings.admission_max_pool_wait_ms,
+    retry_after_seconds=settings.admission_retry_after_seconds
+)
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,12 +125,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Missing-Ids", "ETag"],
 )
 
-# Static files for uploads
-UPLOAD_DIR = Path(__file__).parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# Write-LSN cookie so reads after a write only go to caught-up replicas
+if replica_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware, cookie_max_age=settings.read_your_writes_seconds)
+
+# X-Query-Count response header (used by the load-test harness)
+if settings.query_stats_enabled:
+    app.add_middleware(QueryCountMiddleware)
+
+# Static files for uploads (the S3 backend serves them from the bucket instead)
+if isinstance(storage, LocalStorage):
+    app.mount("/uploads", UploadStaticFiles(directory=str(storage.root)), name="uploads")
+
+ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
 
 
 # Pydantic models for API
@@ -73,12 +169,22 @@ class UserResponse(BaseModel):
     status: str
     auth_provider: str
     profile_image_url: str | None
+    profile_image_variants: dict[str, dict[int, str]] | None = None  # format -> size -> URL
     last_login: str | None
+    lock_version: int | None = None
 
     class Config:
         from_attributes = True
 
 
+class ProfileImageUploadRequest(BaseModel):
+    content_type: str
+
+
+class ProfileImageCompleteRequest(BaseModel):
+    upload_id: str
+
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
@@ -87,10 +193,28 @@ class LoginRequest(BaseModel):
 class LoginResponse(BaseModel):
     success: bool
     user: UserResponse | None = None
+    access_token: str | None = None
     error: str | None = None
 
 
 # Helper functions
+def db_user_to_response(user) -> UserResponse:
+    """Convert database User model to API response model"""
+    return UserResponse(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        role=user.role,
+        status=user.status,
+        auth_provider=user.auth_provider,
+        profile_image_url=user.profile_image_url,
+        profile_image_variants=profile_image_variants(user.profile_image_url),
+        last_login=user.last_login.isoformat() if user.last_login else None,
+        lock_version=user.lock_version
+    )
+
+
+@traced()
 def db_adr_to_model(db_adr) -> ADR:
     """Convert database ADR model to Pydantic model"""
     from models import DecisionOption
@@ -106,13 +230,17 @@ def db_adr_to_model(db_adr) -> ADR:
         consequences=db_adr.consequences,
         stakeholders=db_adr.stakeholders,
         related_adrs=db_adr.related_adrs,
+        supersedes=db_adr.supersedes or [],
+        amends=db_adr.amends or [],
         status=db_adr.status,
         created_at=db_adr.created_at,
         updated_at=db_adr.updated_at,
+        lock_version=db_adr.lock_version,
         author=db_adr.author
     )
 
 
+@traced()
 def db_app_to_model(db_app) -> BusinessApp:
     """Convert database BusinessApp model to Pydantic model"""
     product_id = None
@@ -140,10 +268,13 @@ def db_app_to_model(db_app) -> BusinessApp:
         product_id=product_id,
         product_name=product_name,
         created_at=db_app.created_at,
-        updated_at=db_app.updated_at
+        updated_at=db_app.updated_at,
+        lock_version=db_app.lock_version,
+        archived_at=getattr(db_app, "archived_at", None)
     )
 
 
+@traced()
 def db_debt_to_model(db_debt) -> TechDebt:
     """Convert database TechDebt model to Pydantic model"""
     linked_adr_id = None
@@ -166,10 +297,13 @@ def db_debt_to_model(db_debt) -> TechDebt:
         affected_systems=db_debt.affected_systems,
         tags=db_debt.tags,
         created_at=db_debt.created_at,
-        updated_at=db_debt.updated_at
+        updated_at=db_debt.updated_at,
+        lock_version=db_debt.lock_version,
+        archived_at=getattr(db_debt, "archived_at", None)
     )
 
 
+@traced()
 def db_supplier_to_model(db_supplier) -> Supplier:
     """Convert database Supplier model to Pydantic model"""
     return Supplier(
@@ -180,11 +314,15 @@ def db_supplier_to_model(db_supplier) -> Supplier:
         contact_email=db_supplier.contact_email,
         contact_phone=db_supplier.contact_phone,
         address=db_supplier.address,
+        latitude=db_supplier.latitude,
+        longitude=db_supplier.longitude,
         created_at=db_supplier.created_at,
-        updated_at=db_supplier.updated_at
+        updated_at=db_supplier.updated_at,
+        lock_version=db_supplier.lock_version
     )
 
 
+@traced()
 def db_product_to_model(db_product) -> Product:
     """Convert database Product model to Pydantic model"""
     supplier_name = db_product.supplier.name if db_product.supplier else None
@@ -200,10 +338,37 @@ def db_product_to_model(db_product) -> Product:
         support_url=db_product.support_url,
         license_type=db_product.license_type,
         created_at=db_product.created_at,
-        updated_at=db_product.updated_at
+        updated_at=db_product.updated_at,
+        lock_version=db_product.lock_version
     )
 
 
+# Optimistic concurrency: conditional writes with If-Match, versions as ETags (see versioning.py)
+def if_match_version(if_match: str | None = Header(default=None)) -> int | None:
+    """The lock_version a write is conditional on, or None without If-Match"""
+    try:
+        return parse_if_match(if_match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def set_etag(response: Response, db_object):
+    response.headers["ETag"] = etag(db_object.lock_version)
+
+
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    """412 when If-Match names a version other than the stored one"""
+    return JSONResponse({"detail": str(exc), "lock_version": exc.current_version}, status_code=412,
+                        headers={"ETag": etag(exc.current_version)})
+
+
+@app.exception_handler(StaleDataError)
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    """412 when the conditional UPDATE/DELETE matched nothing: another write committed after this request read the row"""
+    return JSONResponse({"detail": "The resource was modified by another request"}, status_code=412)
+
+
 @app.get("/")
 def read_root():
     return {
@@ -223,9 +388,32 @@ def read_root():
     }
 
 
+@app.get("/healthz")
+async def liveness():
+    """Liveness probe: the process is serving requests (checks no dependency)"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readiness_probe(response: Response):
+    """Readiness probe: warm-up finished and dependencies reachable; 503 otherwise"""
+    ready, checks = await run_in_threadpool(readiness.run)
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "not ready", "checks": checks}
+
+
+def count_by(rows) -> dict:
+    """(value, count) rows summed per value"""
+    counts = {}
+    for value, count in rows:
+        counts[value] = counts.get(value, 0) + count
+    return counts
+
+
 @app.get("/dashboard")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    """Get dashboard statistics for all data types"""
+def get_dashboard_stats(include_archived: bool = False, db: Session = Depends(get_db)):
+    """Get dashboard statistics for all data types (counting archived apps and tech debt with ?include_archived=true)"""
     from db_models import ADR as DBModel_ADR, BusinessApp as DBModel_BusinessApp, TechDebt as DBModel_TechDebt, Supplier as DBModel_Supplier, Product as DBModel_Product
     from sqlalchemy import func
 
@@ -260,6 +448,28 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
         func.count(DBModel_TechDebt.id)
     ).group_by(DBModel_TechDebt.status).all()
 
+    archived = {}
+    if include_archived:
+        from db_models import BusinessAppArchive, TechDebtArchive
+        archived_apps = db.query(
+            BusinessAppArchive.status,
+            func.count(BusinessAppArchive.id)
+        ).group_by(BusinessAppArchive.status).all()
+        archived_debt = db.query(
+            TechDebtArchive.priority,
+            TechDebtArchive.status,
+            func.count(TechDebtArchive.id)
+        ).group_by(TechDebtArchive.priority, TechDebtArchive.status).all()
+        apps_by_status += archived_apps
+        debt_by_priority += [(priority, count) for priority, _, count in archived_debt]
+        debt_by_status += [(status, count) for _, status, count in archived_debt]
+        archived = {
+            "business_apps": sum(count for _, count in archived_apps),
+            "tech_debt": sum(count for _, _, count in archived_debt)
+        }
+        total_apps += archived["business_apps"]
+        total_tech_debt += archived["tech_debt"]
+
     # Recent items (last 5)
     recent_apps = db.query(DBModel_BusinessApp).order_by(DBModel_BusinessApp.created_at.desc()).limit(5).all()
     recent_adrs = db.query(DBModel_ADR).order_by(DBModel_ADR.created_at.desc()).limit(5).all()
@@ -273,10 +483,11 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
             "suppliers": total_suppliers,
             "products": total_products
         },
-        "business_apps_by_status": {status: count for status, count in apps_by_status},
-        "adrs_by_status": {status: count for status, count in adrs_by_status},
-        "tech_debt_by_priority": {priority: count for priority, count in debt_by_priority},
-        "tech_debt_by_status": {status: count for status, count in debt_by_status},
+        "archived": archived,
+        "business_apps_by_status": count_by(apps_by_status),
+        "adrs_by_status": count_by(adrs_by_status),
+        "tech_debt_by_priority": count_by(debt_by_priority),
+        "tech_debt_by_status": count_by(debt_by_status),
         "recent_business_apps": [
             {"id": str(app.app_id), "name": app.name, "created_at": app.created_at.isoformat()}
             for app in recent_apps
@@ -292,40 +503,183 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
     }
 
 
-@app.post("/sample-data/generate")
+@app.post("/sample-data/generate", status_code=202)
 def generate_sample_data(db: Session = Depends(get_db)):
-    """Generate sample data for demonstration purposes"""
+    """Queue generation of sample data for demonstration purposes"""
+    if has_active_job(db, "sample_data"):
+        raise HTTPException(status_code=409, detail="Sample data generation is already in progress")
+    job = enqueue(db, "sample_data")
+    return {"success": True, "message": "Sample data generation started", "job_id": str(job.id),
+            "status_url": f"/jobs/{job.id}"}
+
+
+@app.post("/sample-data/synthetic", status_code=202)
+def generate_synthetic_data(
+    scale: str = "10k",
+    seed: int = 42,
+    workers: int | None = None,
+    db: Session = Depends(get_db),
+    _: DBUser = Depends(require_admin)
+):
+    """Replace all artifacts with a deterministic synthetic dataset (1k/10k/100k/1m or a count)"""
+    import synthetic_data
     try:
-        from generate_sample_data import generate_all_sample_data
-        success = generate_all_sample_data()
+        total = synthetic_data.parse_scale(scale)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid scale. Use 1k, 10k, 100k, 1m or an artifact count")
 
-        if success:
-            return {"success": True, "message": "Sample data generated successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate sample data")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating sample data: {str(e)}")
+    if has_active_job(db, "synthetic_data"):
+        raise HTTPException(status_code=409, detail="A synthetic data generation run is already in progress")
+
+    job = enqueue(db, "synthetic_data", {"total": total, "seed": seed, "workers": workers})
+    return {"success": True, "planned": synthetic_data.plan(total), "job_id": str(job.id),
+            "status_url": f"/jobs/{job.id}"}
+
+
+# Analytics Endpoints
+@app.get("/analytics/cubes")
+def list_analytics_cubes():
+    """List the analytics cubes and the dimensions they can be grouped and filtered by"""
+    return {name: {"dimensions": list(cube.dimensions)} for name, cube in analytics.CUBES.items()}
+
+
+@app.get("/analytics/{cube}")
+def query_analytics_cube(
+    cube: str,
+    request: Request,
+    group_by: str = "",
+    pivot: str | None = None,
+    format: str = "json",
+    db: Session = Depends(get_db)
+):
+    """
+    Count artifacts grouped by any combination of dimensions, optionally
+    pivoted on one more dimension. Filter with ?<dimension>=value (repeatable,
+    'none' matches missing values). format=csv downloads the table.
+    """
+    if cube not in analytics.CUBES:
+        raise HTTPException(status_code=404, detail="Cube not found")
+    dimensions = list(analytics.CUBES[cube].dimensions)
+
+    group_by_dims = [dim.strip() for dim in group_by.split(",") if dim.strip()]
+    invalid = [dim for dim in group_by_dims + ([pivot] if pivot else []) if dim not in dimensions]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unknown dimension(s): {', '.join(invalid)}. "
+                                                    f"Available: {', '.join(dimensions)}")
+    if len(set(group_by_dims)) != len(group_by_dims) or (pivot and pivot in group_by_dims):
+        raise HTTPException(status_code=400, detail="Each dimension can only be used once")
+    if format not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="Invalid format. Allowed values: json, csv")
+
+    filters = {dim: request.query_params.getlist(dim) for dim in dimensions if dim in request.query_params}
+    result = analytics.query_cube(db, cube, group_by_dims, pivot=pivot, filters=filters)
+
+    if format == "csv":
+        filename = "_".join([cube] + group_by_dims + ([f"by_{pivot}"] if pivot else [])) + ".csv"
+        return Response(
+            content=analytics.result_to_csv(result),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    return result
+
+
+@app.post("/analytics/refresh", status_code=202)
+def refresh_analytics_cubes(db: Session = Depends(get_db), _: DBUser = Depends(require_admin)):
+    """Queue a refresh of every analytics cube"""
+    for name in analytics.CUBES:
+        analytics.schedule_refresh(db, name)
+    return {"success": True, "cubes": list(analytics.CUBES)}
+
+
+# Background Job Endpoints
+@app.get("/jobs")
+def list_background_jobs(
+    status: str | None = None,
+    job_type: str | None = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    _: DBUser = Depends(require_admin)
+):
+    """List the most recent background jobs"""
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Allowed values: {', '.join(JOB_STATUSES)}")
+    return [job_to_dict(job) for job in list_jobs(db, status=status, job_type=job_type, limit=min(limit, 500))]
+
+
+@app.get("/jobs/{job_id}")
+def get_background_job(job_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Get status, progress and result of a background job"""
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
+
+
+@app.post("/jobs/{job_id}/cancel", status_code=202)
+def cancel_background_job(job_id: uuid.UUID, db: Session = Depends(get_db), _: DBUser = Depends(require_admin)):
+    """Cancel a queued job, or ask a running job to stop at its next progress report"""
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return job_to_dict(cancel_job(db, job))
+
+
+# Admin Diagnostics Endpoints
+@app.get("/admin/query-stats")
+def get_query_stats(order_by: str = "total_ms", limit: int = 50, _: DBUser = Depends(require_admin)):
+    """Get per-statement timing statistics, sorted descending by the given metric"""
+    allowed = ["total_ms", "calls", "slow_calls", "mean_ms", "p50_ms", "p95_ms", "max_ms"]
+    if order_by not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid order_by. Allowed values: {', '.join(allowed)}")
+    return {
+        "slow_query_threshold_ms": query_stats.slow_threshold_ms,
+        "statements": query_stats.snapshot(order_by=order_by, limit=limit)
+    }
+
+
+@app.get("/admin/replicas")
+def get_replica_status(_: DBUser = Depends(require_admin)):
+    """Get replay position and lag of the read replicas used for GET requests"""
+    replica_router.start()
+    return replica_router.status()
+
+
+@app.get("/admin/admission")
+def get_admission_status(_: DBUser = Depends(require_admin)):
+    """Get in-flight requests, recent connection pool wait and shed request count of this process"""
+    return admission.stats()
+
+
+@app.get("/admin/query-stats/plans")
+def get_query_plans(_: DBUser = Depends(require_admin)):
+    """Get EXPLAIN (ANALYZE, BUFFERS) plans captured for slow statements"""
+    return query_stats.plans()
+
+
+@app.delete("/admin/query-stats", status_code=204)
+def reset_query_stats(_: DBUser = Depends(require_admin)):
+    """Reset collected statement statistics and plans"""
+    query_stats.reset()
 
 
 # Authentication Endpoints
 @app.post("/auth/login", response_model=LoginResponse)
 def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """Authenticate user with email and password"""
+    # Guessing one account's password from many addresses (the middleware limits per address)
+    wait = rate_limiter.take("login", f"email:{login_data.email.strip().lower()}")
+    if wait is not None:
+        raise HTTPException(status_code=429, detail="Too many login attempts",
+                            headers={"Retry-After": str(max(1, ceil(wait)))})
     user = user_service.authenticate(db, login_data.email, login_data.password)
     if not user:
         return LoginResponse(success=False, error="Invalid credentials")
 
-    user_response = UserResponse(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        status=user.status,
-        auth_provider=user.auth_provider,
-        profile_image_url=user.profile_image_url,
-        last_login=user.last_login.isoformat() if user.last_login else None
-    )
-    return LoginResponse(success=True, user=user_response)
+    user_response = db_user_to_response(user)
+    return LoginResponse(success=True, user=user_response, access_token=create_access_token(user))
 
 
 # User Endpoints
@@ -333,38 +687,21 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 def list_users(db: Session = Depends(get_db)):
     """List all users"""
     users = user_service.get_all(db)
-    return [UserResponse(
-        id=u.id,
-        email=u.email,
-        name=u.name,
-        role=u.role,
-        status=u.status,
-        auth_provider=u.auth_provider,
-        profile_image_url=u.profile_image_url,
-        last_login=u.last_login.isoformat() if u.last_login else None
-    ) for u in users]
+    return [db_user_to_response(u) for u in users]
 
 
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, response: Response, db: Session = Depends(get_db)):
     """Get user by ID"""
     user = user_service.get_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        status=user.status,
-        auth_provider=user.auth_provider,
-        profile_image_url=user.profile_image_url,
-        last_login=user.last_login.isoformat() if user.last_login else None
-    )
+    set_etag(response, user)
+    return db_user_to_response(user)
 
 
 @app.post("/users", response_model=UserResponse, status_code=201)
-def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+def create_user(user_data: UserCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new user"""
     # Check if user already exists
     existing_user = user_service.get_by_email(db, user_data.email)
@@ -372,43 +709,29 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="User with this email already exists")
 
     user = user_service.create(db, user_data.email, user_data.name, user_data.password, user_data.role, user_data.profile_image_url)
-    return UserResponse(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        status=user.status,
-        auth_provider=user.auth_provider,
-        profile_image_url=user.profile_image_url,
-        last_login=user.last_login.isoformat() if user.last_login else None
-    )
+    set_etag(response, user)
+    return db_user_to_response(user)
 
 
 @app.put("/users/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_data: UserUpdate, db: Session = Depends(get_db)):
+def update_user(user_id: int, user_data: UserUpdate, response: Response,
+                expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
     """Update user"""
     update_dict = user_data.dict(exclude_unset=True)
 
-    user = user_service.update(db, user_id, **update_dict)
+    user = user_service.update(db, user_id, expected_version, **update_dict)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return UserResponse(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        role=user.role,
-        status=user.status,
-        auth_provider=user.auth_provider,
-        profile_image_url=user.profile_image_url,
-        last_login=user.last_login.isoformat() if user.last_login else None
-    )
+    set_etag(response, user)
+    return db_user_to_response(user)
 
 
 @app.delete("/users/{user_id}", status_code=204)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+def delete_user(user_id: int, expected_version: int | None = Depends(if_match_version),
+                db: Session = Depends(get_db)):
     """Delete user"""
-    success = user_service.delete(db, user_id)
+    success = user_service.delete(db, user_id, expected_version)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -425,304 +748,862 @@ async def upload_profile_image(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
+    # The body was spooled to a temp file by the multipart parser (bounded by
+    # UploadSizeLimitMiddleware); the real type is sniffed from its magic bytes
+    if file.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(allowed_types)}"
+            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES)}"
         )
-
-    # Validate file size (max 10MB)
-    contents = await file.read()
-    if len(contents) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise HTTPException(status_code=413, detail=f"File size exceeds {settings.max_upload_bytes // (1024 * 1024)}MB limit")
 
     try:
-        # Open and process image
-        image = Image.open(BytesIO(contents))
-
-        # Convert to RGB if necessary (for PNG with transparency)
-        if image.mode in ('RGBA', 'LA', 'P'):
-            # Create white background
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-            image = background
-        elif image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        # Resize to square (crop to center if not square)
-        width, height = image.size
-        target_size = 400  # Standard profile image size
-
-        if width != height:
-            # Crop to square (center crop)
-            min_dimension = min(width, height)
-            left = (width - min_dimension) // 2
-            top = (height - min_dimension) // 2
-            right = left + min_dimension
-            bottom = top + min_dimension
-            image = image.crop((left, top, right, bottom))
-
-        # Resize to target size
-        image = image.resize((target_size, target_size), Image.Resampling.LANCZOS)
-
-        # Delete old profile image if exists
-        if user.profile_image_url:
-            old_path = Path(__file__).parent / user.profile_image_url.lstrip('/')
-            if old_path.exists() and old_path.is_file():
-                old_path.unlink()
-
-        # Save with unique filename
-        filename = f"profile_{user_id}_{uuid.uuid4().hex[:8]}.jpg"
-        filepath = UPLOAD_DIR / "profile_images" / filename
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-
-        # Save optimized JPEG
-        image.save(filepath, "JPEG", quality=85, optimize=True)
-
-        # Update user record
-        image_url = f"/uploads/profile_images/{filename}"
-        user_service.update(db, user_id, profile_image_url=image_url)
-
-        return {
-            "success": True,
-            "profile_image_url": image_url,
-            "message": "Profile image uploaded successfully"
-        }
-
+        # Produce all size/format variants, named by content hash
+        with tracer.start_as_current_span("profile_image.process", attributes={"image.bytes": file.size or 0}):
+            image_url = await run_in_threadpool(process_profile_image, file.file, storage)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
 
+    await run_in_threadpool(attach_profile_image, db, user, image_url)
+
+    return {
+        "success": True,
+        "profile_image_url": image_url,
+        "profile_image_variants": profile_image_variants(image_url),
+        "message": "Profile image uploaded successfully"
+    }
+
+
+@app.post("/users/{user_id}/profile-image/upload-url")
+def create_profile_image_upload(
+    user_id: int,
+    request: ProfileImageUploadRequest,
+    db: Session = Depends(get_db)
+):
+    """Issue a pre-signed POST so the browser uploads the image straight to storage"""
+    if not user_service.get_by_id(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    if request.content_type not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_IMAGE_TYPES)}"
+        )
+
+    upload_id = uuid.uuid4().hex
+    upload = storage.presign_upload(
+        incoming_upload_key(user_id, upload_id), request.content_type,
+        settings.max_upload_bytes, settings.upload_url_expires_seconds
+    )
+    return {"upload_id": upload_id, "upload": upload, "expires_in": settings.upload_url_expires_seconds}
+
+
+@app.post("/storage/direct-upload", status_code=204)
+def local_direct_upload(
+    key: str = Form(...),
+    policy: str = Form(...),
+    signature: str = Form(...),
+    file: UploadFile = File(...)
+):
+    """Receive a pre-signed upload for the local storage backend (stands in for the S3 POST endpoint)"""
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        conditions = storage.verify_upload(key, policy, signature)
+    except ValueError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    if file.size is not None and file.size > conditions["max_bytes"]:
+        raise HTTPException(status_code=413, detail="Request body too large")
+
+    storage.put(key, file.file, conditions["content_type"])
+
+
+@app.post("/users/{user_id}/profile-image/complete", status_code=202)
+def complete_profile_image_upload(
+    user_id: int,
+    request: ProfileImageCompleteRequest,
+    db: Session = Depends(get_db)
+):
+    """Queue processing of a profile image that was uploaded directly to storage"""
+    if not user_service.get_by_id(db, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    if not request.upload_id.isalnum() or not storage.exists(incoming_upload_key(user_id, request.upload_id)):
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    job = enqueue(db, "profile_image", {"user_id": user_id, "upload_id": request.upload_id})
+    return {"job_id": str(job.id), "status_url": f"/jobs/{job.id}"}
+
+
+# Sparse fieldsets: every collection endpoint takes ?fields=id,title,... (see fieldsets.py)
+def requested_fields(fieldset: FieldSet, fields: str | None) -> tuple | None:
+    """The fields asked for, or None for the full representation"""
+    try:
+        return fieldset.parse(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def sparse_response(fieldset: FieldSet, fields: tuple, db_objects: list, response: Response | None = None) -> Response:
+    """
+    Rows loaded with fieldset.load_options() in the trimmed schema, in place
+    of the full response_model (keeping headers set on the injected response)
+    """
+    headers = dict(response.headers) if response else None
+    return ResponseClass(jsonable_encoder(fieldset.dump(db_objects, fields)), headers=headers)
+
+
+# Multi-get: every collection endpoint takes ?ids=a,b,c (see multiget.py)
+def requested_ids(ids: str) -> List[str]:
+    """Parse ?ids=; the handler reports the ones not found in X-Missing-Ids"""
+    try:
+        return parse_ids(ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def report_missing(response: Response, missing: List[str]):
+    response.headers["X-Missing-Ids"] = ",".join(missing)
+
+
+# Archive: retired apps and closed tech debt move out of the hot tables (see services/db_archive_service.py)
+def archived_options(fieldset: FieldSet, fields: tuple | None, include_archived: bool) -> list | None:
+    """Loader options for the archive rows of a sparse request"""
+    return fieldset.load_options(fields, archived=True) if fields and include_archived else None
+
+
+def not_found(name: str, archived) -> HTTPException:
+    """404 for a missing item; 409 for an archived one, which only changes once restored"""
+    if archived:
+        return HTTPException(status_code=409, detail=f"{name} is archived; restore it first")
+    return HTTPException(status_code=404, detail=f"{name} not found")
+
+
+# Duplicates: near-duplicate names found before creating and reported for merging (see dedup.py)
+MAX_SIMILAR = 5
+MAX_DUPLICATE_CLUSTERS = 500
+
+
+def check_duplicates(db: Session, entity_type: str, name: str):
+    """409 listing the existing items named like a new one"""
+    similar = dedup_db_service.similar(db, entity_type, name, settings.duplicate_similarity_threshold, MAX_SIMILAR)
+    if similar:
+        raise HTTPException(status_code=409, detail={
+            "message": "Similarly named items exist; create with ?allow_duplicates=true if this is a different one",
+            "duplicates": similar
+        })
+
+
+def merge_duplicates(entity_type: str, keep_id: str, merge: MergeRequest, expected_version: int | None,
+                     db: Session):
+    """The item kept and the references moved, or the HTTP error for the request"""
+    try:
+        merged = dedup_db_service.merge(db, entity_type, keep_id, merge.duplicate_ids, expected_version)
+    except DuplicatesNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Duplicates not found: {', '.join(e.ids)}")
+    except InvalidMerge as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not merged:
+        raise HTTPException(status_code=404, detail="Item to merge into not found")
+    return merged
+
 
 # ADR Endpoints
 @app.get("/adrs", response_model=List[ADR])
-def list_adrs(db: Session = Depends(get_db)):
-    """List all Architecture Decision Records"""
-    db_adrs = adr_db_service.list_all(db)
+def list_adrs(response: Response, ids: str | None = None, fields: str | None = None,
+              db: Session = Depends(get_db)):
+    """List all Architecture Decision Records, or those with the given ?ids= (only the given fields with ?fields=)"""
+    sparse = requested_fields(ADR_FIELDS, fields)
+    options = ADR_FIELDS.load_options(sparse) if sparse else None
+    if ids is not None:
+        db_adrs, missing = adr_db_service.get_many(db, requested_ids(ids), options)
+        report_missing(response, missing)
+    else:
+        db_adrs = adr_db_service.list_all(db, options)
+    if sparse:
+        return sparse_response(ADR_FIELDS, sparse, db_adrs, response)
     return [db_adr_to_model(adr) for adr in db_adrs]
 
 
 @app.get("/adrs/{adr_id}", response_model=ADR)
-def get_adr(adr_id: str, db: Session = Depends(get_db)):
+def get_adr(adr_id: str, response: Response, db: Session = Depends(get_db)):
     """Get a specific ADR by ID"""
     db_adr = adr_db_service.get(db, adr_id)
     if not db_adr:
         raise HTTPException(status_code=404, detail="ADR not found")
+    set_etag(response, db_adr)
     return db_adr_to_model(db_adr)
 
 
+@app.get("/adrs/{adr_id}/bundle", response_model=ADRBundle)
+def get_adr_bundle(adr_id: str, db: Session = Depends(get_db)):
+    """Get an ADR with its tech debt and related ADRs in one response"""
+    bundle = adr_db_service.bundle(db, adr_id)
+    if not bundle:
+        raise HTTPException(status_code=404, detail="ADR not found")
+    return ADRBundle(
+        adr=db_adr_to_model(bundle["adr"]),
+        tech_debt=[db_debt_to_model(debt) for debt in bundle["tech_debt"]],
+        related_adrs=[ADRSummary(id=row.adr_id, title=row.title, status=row.status)
+                      for row in bundle["related_adrs"]],
+        referenced_by=[ADRSummary(id=row.adr_id, title=row.title, status=row.status)
+                       for row in bundle["referenced_by"]]
+    )
+
+
+@app.get("/adrs/{adr_id}/graph", response_model=ADRGraph)
+def get_adr_graph(adr_id: str, depth: int = 2, types: str = ",".join(LINK_TYPES), db: Session = Depends(get_db)):
+    """Get the ADRs within depth links of an ADR (in either direction) and the links between them"""
+    if not 1 <= depth <= MAX_GRAPH_DEPTH:
+        raise HTTPException(status_code=400, detail=f"depth must be between 1 and {MAX_GRAPH_DEPTH}")
+    link_types = tuple(dict.fromkeys(link_type.strip() for link_type in types.split(",") if link_type.strip()))
+    invalid = [link_type for link_type in link_types if link_type not in LINK_TYPES]
+    if invalid or not link_types:
+        raise HTTPException(status_code=400, detail=f"Invalid types: {', '.join(invalid) or '(none)'}. "
+                                                    f"Allowed values: {', '.join(LINK_TYPES)}")
+    graph = adr_db_service.neighborhood(db, adr_id, depth, tuple(sorted(link_types)))
+    if not graph:
+        raise HTTPException(status_code=404, detail="ADR not found")
+    return graph
+
+
+@app.get("/adrs/{adr_id}/supersession", response_model=ADRSupersession)
+def get_adr_supersession(adr_id: str, max_depth: int = MAX_CHAIN_DEPTH, db: Session = Depends(get_db)):
+    """Get the supersession chain of an ADR, oldest first, and the decisions currently in force at its end"""
+    if not 1 <= max_depth <= MAX_CHAIN_DEPTH:
+        raise HTTPException(status_code=400, detail=f"max_depth must be between 1 and {MAX_CHAIN_DEPTH}")
+    supersession = adr_db_service.supersession(db, adr_id, max_depth)
+    if not supersession:
+        raise HTTPException(status_code=404, detail="ADR not found")
+    return supersession
+
+
 @app.post("/adrs", response_model=ADR, status_code=201)
-def create_adr(adr: ADRCreate, db: Session = Depends(get_db)):
+def create_adr(adr: ADRCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new Architecture Decision Record"""
     db_adr = adr_db_service.create(db, adr)
+    set_etag(response, db_adr)
     return db_adr_to_model(db_adr)
 
 
 @app.put("/adrs/{adr_id}", response_model=ADR)
-def update_adr(adr_id: str, adr_update: ADRUpdate, db: Session = Depends(get_db)):
+def update_adr(adr_id: str, adr_update: ADRUpdate, response: Response,
+               expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
     """Update an existing ADR"""
-    db_adr = adr_db_service.update(db, adr_id, adr_update)
+    db_adr = adr_db_service.update(db, adr_id, adr_update, expected_version)
     if not db_adr:
         raise HTTPException(status_code=404, detail="ADR not found")
+    set_etag(response, db_adr)
     return db_adr_to_model(db_adr)
 
 
 @app.delete("/adrs/{adr_id}", status_code=204)
-def delete_adr(adr_id: str, db: Session = Depends(get_db)):
+def delete_adr(adr_id: str, expected_version: int | None = Depends(if_match_version),
+               db: Session = Depends(get_db)):
     """Delete an ADR"""
-    success = adr_db_service.delete(db, adr_id)
+    success = adr_db_service.delete(db, adr_id, expected_version)
     if not success:
         raise HTTPException(status_code=404, detail="ADR not found")
 
 
 # Business App Endpoints
 @app.get("/business-apps", response_model=List[BusinessApp])
-def list_business_apps(db: Session = Depends(get_db)):
-    """List all business applications"""
-    db_apps = business_app_db_service.list_all(db)
+def list_business_apps(response: Response, ids: str | None = None, fields: str | None = None,
+                       include_archived: bool = False, db: Session = Depends(get_db)):
+    """
+    List all business applications, or those with the given ?ids= (only the
+    given fields with ?fields=; archived ones too with ?include_archived=true)
+    """
+    sparse = requested_fields(BUSINESS_APP_FIELDS, fields)
+    options = BUSINESS_APP_FIELDS.load_options(sparse) if sparse else None
+    archive_options = archived_options(BUSINESS_APP_FIELDS, sparse, include_archived)
+    if ids is not None:
+        db_apps, missing = business_app_db_service.get_many(db, requested_ids(ids), options,
+                                                            include_archived, archive_options)
+        report_missing(response, missing)
+    else:
+        db_apps = business_app_db_service.list_all(db, options, include_archived, archive_options)
+    if sparse:
+        return sparse_response(BUSINESS_APP_FIELDS, sparse, db_apps, response)
     return [db_app_to_model(app) for app in db_apps]
 
 
 @app.get("/business-apps/{app_id}", response_model=BusinessApp)
-def get_business_app(app_id: str, db: Session = Depends(get_db)):
-    """Get a specific business application by ID"""
-    db_app = business_app_db_service.get(db, app_id)
+def get_business_app(app_id: str, response: Response, db: Session = Depends(get_db)):
+    """Get a specific business application by ID, archived or not"""
+    db_app = business_app_db_service.get(db, app_id) or business_app_db_service.get_archived(db, app_id)
     if not db_app:
         raise HTTPException(status_code=404, detail="Business app not found")
+    set_etag(response, db_app)
     return db_app_to_model(db_app)
 
 
+@app.get("/business-apps/{app_id}/bundle", response_model=BusinessAppBundle)
+def get_business_app_bundle(app_id: str, db: Session = Depends(get_db)):
+    """Get a business application with its product, supplier, locations and dependencies in one response"""
+    bundle = business_app_db_service.bundle(db, app_id)
+    if not bundle:
+        raise HTTPException(status_code=404, detail="Business app not found")
+    db_app = bundle["app"]
+    product = db_app.product
+    return BusinessAppBundle(
+        app=db_app_to_model(db_app),
+        product=db_product_to_model(product) if product else None,
+        supplier=db_supplier_to_model(product.supplier) if product and product.supplier else None,
+        dependencies=[BusinessAppSummary(id=str(row.app_id), name=row.name, status=row.status)
+                      for row in bundle["dependencies"]],
+        dependents=[BusinessAppSummary(id=str(row.app_id), name=row.name, status=row.status)
+                    for row in bundle["dependents"]],
+        locations=[BusinessAppLocation(location=loc.location, place=loc.place,
+                                       latitude=loc.latitude, longitude=loc.longitude)
+                   for loc in getattr(db_app, "locations", [])]
+    )
+
+
 @app.post("/business-apps", response_model=BusinessApp, status_code=201)
-def create_business_app(app: BusinessAppCreate, db: Session = Depends(get_db)):
-    """Create a new business application"""
+def create_business_app(app: BusinessAppCreate, response: Response, allow_duplicates: bool = False,
+                        db: Session = Depends(get_db)):
+    """Create a new business application (409 if similarly named ones exist, unless ?allow_duplicates=true)"""
+    if not allow_duplicates:
+        check_duplicates(db, "business-apps", app.name)
     db_app = business_app_db_service.create(db, app)
+    set_etag(response, db_app)
     return db_app_to_model(db_app)
 
 
 @app.put("/business-apps/{app_id}", response_model=BusinessApp)
-def update_business_app(app_id: str, app_update: BusinessAppUpdate, db: Session = Depends(get_db)):
+def update_business_app(app_id: str, app_update: BusinessAppUpdate, response: Response,
+                        expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
     """Update an existing business application"""
-    db_app = business_app_db_service.update(db, app_id, app_update)
+    db_app = business_app_db_service.update(db, app_id, app_update, expected_version)
     if not db_app:
-        raise HTTPException(status_code=404, detail="Business app not found")
+        raise not_found("Business app", business_app_db_service.get_archived(db, app_id))
+    set_etag(response, db_app)
     return db_app_to_model(db_app)
 
 
 @app.delete("/business-apps/{app_id}", status_code=204)
-def delete_business_app(app_id: str, db: Session = Depends(get_db)):
+def delete_business_app(app_id: str, expected_version: int | None = Depends(if_match_version),
+                        db: Session = Depends(get_db)):
     """Delete a business application"""
-    success = business_app_db_service.delete(db, app_id)
+    success = business_app_db_service.delete(db, app_id, expected_version)
     if not success:
-        raise HTTPException(status_code=404, detail="Business app not found")
+        raise not_found("Business app", business_app_db_service.get_archived(db, app_id))
+
+
+@app.post("/business-apps/{app_id}/restore", response_model=BusinessApp)
+def restore_business_app(app_id: str, response: Response, db: Session = Depends(get_db)):
+    """Move an archived business application back to the active set"""
+    try:
+        db_app = archive_db_service.restore_business_app(db, app_id)
+    except RestoreConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not db_app:
+        raise HTTPException(status_code=404, detail="Archived business app not found")
+    set_etag(response, db_app)
+    return db_app_to_model(db_app)
 
 
 # Tech Debt Endpoints
 @app.get("/tech-debt", response_model=List[TechDebt])
-def list_tech_debt(db: Session = Depends(get_db)):
-    """List all technical debt items"""
-    db_debts = tech_debt_db_service.list_all(db)
+def list_tech_debt(response: Response, ids: str | None = None, fields: str | None = None,
+                   include_archived: bool = False, db: Session = Depends(get_db)):
+    """
+    List all technical debt items, or those with the given ?ids= (only the
+    given fields with ?fields=; archived ones too with ?include_archived=true)
+    """
+    sparse = requested_fields(TECH_DEBT_FIELDS, fields)
+    options = TECH_DEBT_FIELDS.load_options(sparse) if sparse else None
+    archive_options = archived_options(TECH_DEBT_FIELDS, sparse, include_archived)
+    if ids is not None:
+        db_debts, missing = tech_debt_db_service.get_many(db, requested_ids(ids), options,
+                                                          include_archived, archive_options)
+        report_missing(response, missing)
+    else:
+        db_debts = tech_debt_db_service.list_all(db, options, include_archived, archive_options)
+    if sparse:
+        return sparse_response(TECH_DEBT_FIELDS, sparse, db_debts, response)
     return [db_debt_to_model(debt) for debt in db_debts]
 
 
 @app.get("/tech-debt/{debt_id}", response_model=TechDebt)
-def get_tech_debt(debt_id: str, db: Session = Depends(get_db)):
-    """Get a specific tech debt item by ID"""
-    db_debt = tech_debt_db_service.get(db, debt_id)
+def get_tech_debt(debt_id: str, response: Response, db: Session = Depends(get_db)):
+    """Get a specific tech debt item by ID, archived or not"""
+    db_debt = tech_debt_db_service.get(db, debt_id) or tech_debt_db_service.get_archived(db, debt_id)
     if not db_debt:
         raise HTTPException(status_code=404, detail="Tech debt not found")
+    set_etag(response, db_debt)
     return db_debt_to_model(db_debt)
 
 
 @app.post("/tech-debt", response_model=TechDebt, status_code=201)
-def create_tech_debt(debt: TechDebtCreate, db: Session = Depends(get_db)):
+def create_tech_debt(debt: TechDebtCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new tech debt item"""
     db_debt = tech_debt_db_service.create(db, debt)
+    set_etag(response, db_debt)
     return db_debt_to_model(db_debt)
 
 
 @app.put("/tech-debt/{debt_id}", response_model=TechDebt)
-def update_tech_debt(debt_id: str, debt_update: TechDebtUpdate, db: Session = Depends(get_db)):
+def update_tech_debt(debt_id: str, debt_update: TechDebtUpdate, response: Response,
+                     expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
     """Update an existing tech debt item"""
-    db_debt = tech_debt_db_service.update(db, debt_id, debt_update)
+    db_debt = tech_debt_db_service.update(db, debt_id, debt_update, expected_version)
     if not db_debt:
-        raise HTTPException(status_code=404, detail="Tech debt not found")
+        raise not_found("Tech debt", tech_debt_db_service.get_archived(db, debt_id))
+    set_etag(response, db_debt)
     return db_debt_to_model(db_debt)
 
 
 @app.delete("/tech-debt/{debt_id}", status_code=204)
-def delete_tech_debt(debt_id: str, db: Session = Depends(get_db)):
+def delete_tech_debt(debt_id: str, expected_version: int | None = Depends(if_match_version),
+                     db: Session = Depends(get_db)):
     """Delete a tech debt item"""
-    success = tech_debt_db_service.delete(db, debt_id)
+    success = tech_debt_db_service.delete(db, debt_id, expected_version)
     if not success:
-        raise HTTPException(status_code=404, detail="Tech debt not found")
+        raise not_found("Tech debt", tech_debt_db_service.get_archived(db, debt_id))
+
+
+@app.post("/tech-debt/{debt_id}/restore", response_model=TechDebt)
+def restore_tech_debt(debt_id: str, response: Response, db: Session = Depends(get_db)):
+    """Move an archived tech debt item back to the active set"""
+    try:
+        db_debt = archive_db_service.restore_tech_debt(db, debt_id)
+    except RestoreConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not db_debt:
+        raise HTTPException(status_code=404, detail="Archived tech debt not found")
+    set_etag(response, db_debt)
+    return db_debt_to_model(db_debt)
 
 
 @app.get("/adrs/{adr_id}/tech-debt", response_model=List[TechDebt])
-def get_adr_tech_debt(adr_id: str, db: Session = Depends(get_db)):
-    """Get all tech debt items linked to an ADR"""
-    db_debts = tech_debt_db_service.list_by_adr(db, adr_id)
+def get_adr_tech_debt(adr_id: str, fields: str | None = None, include_archived: bool = False,
+                      db: Session = Depends(get_db)):
+    """
+    Get all tech debt items linked to an ADR (only the given fields with
+    ?fields=; archived ones too with ?include_archived=true)
+    """
+    sparse = requested_fields(TECH_DEBT_FIELDS, fields)
+    archive_options = archived_options(TECH_DEBT_FIELDS, sparse, include_archived)
+    if sparse:
+        db_debts = tech_debt_db_service.list_by_adr(db, adr_id, TECH_DEBT_FIELDS.load_options(sparse),
+                                                    include_archived, archive_options)
+        return sparse_response(TECH_DEBT_FIELDS, sparse, db_debts)
+    db_debts = tech_debt_db_service.list_by_adr(db, adr_id, include_archived=include_archived)
     return [db_debt_to_model(debt) for debt in db_debts]
 
 
+# Tech Debt Trend Endpoints (answered from the daily tech_debt_snapshots)
+def trend_range(start: date | None, end: date | None, interval: str) -> tuple:
+    """Validate a trend query's date range (default: the last 90 days) and interval"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=90)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Invalid interval. Allowed values: {', '.join(INTERVALS)}")
+    return start, end
+
+
+@app.get("/tech-debt/trends/burndown")
+def get_tech_debt_burndown(
+    start: date | None = None,
+    end: date | None = None,
+    interval: str = "day",
+    tag: str | None = None,
+    priority: str | None = None,
+    owner: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """Open vs closed tech debt over time, per status"""
+    start, end = trend_range(start, end, interval)
+    points = tech_debt_trend_db_service.burndown(db, start, end, interval, tag=tag, priority=priority, owner=owner)
+    return {"start": start.isoformat(), "end": end.isoformat(), "interval": interval, "points": points}
+
+
+@app.get("/tech-debt/trends/aging")
+def get_tech_debt_aging(
+    start: date | None = None,
+    end: date | None = None,
+    interval: str = "day",
+    tag: str | None = None,
+    priority: str | None = None,
+    owner: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """Age buckets (days since identified) of open tech debt over time"""
+    start, end = trend_range(start, end, interval)
+    points = tech_debt_trend_db_service.aging(db, start, end, interval, tag=tag, priority=priority, owner=owner)
+    return {"start": start.isoformat(), "end": end.isoformat(), "interval": interval, "points": points}
+
+
+@app.get("/tech-debt/trends/overdue")
+def get_tech_debt_overdue(
+    start: date | None = None,
+    end: date | None = None,
+    interval: str = "day",
+    group_by: str | None = None,
+    tag: str | None = None,
+    priority: str | None = None,
+    owner: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """Open tech debt past its target resolution date over time, optionally by priority, status or owner"""
+    start, end = trend_range(start, end, interval)
+    if group_by and group_by not in OVERDUE_GROUPS:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by. Allowed values: {', '.join(OVERDUE_GROUPS)}")
+    points = tech_debt_trend_db_service.overdue(db, start, end, interval, group_by=group_by, tag=tag,
+                                                priority=priority, owner=owner)
+    return {"start": start.isoformat(), "end": end.isoformat(), "interval": interval, "group_by": group_by,
+            "points": points}
+
+
+@app.post("/tech-debt/snapshots", status_code=202)
+def take_tech_debt_snapshot(db: Session = Depends(get_db), _: DBUser = Depends(require_admin)):
+    """Queue a snapshot of today's tech debt now (normally taken daily by the worker)"""
+    job = enqueue(db, "tech_debt_snapshot", {"run_date": datetime.utcnow().date().isoformat()})
+    return job_to_dict(job)
+
+
+@app.post("/archive/run", status_code=202)
+def run_archival(db: Session = Depends(get_db), _: DBUser = Depends(require_admin)):
+    """Queue a run of the archival job now (normally run daily by the worker)"""
+    if has_active_job(db, "archive"):
+        raise HTTPException(status_code=409, detail="An archival run is already in progress")
+    job = enqueue(db, "archive", {"run_date": datetime.utcnow().date().isoformat()})
+    return job_to_dict(job)
+
+
 # Supplier Endpoints
-@app.get("/suppliers", response_model=List[Supplier])
-def list_suppliers(db: Session = Depends(get_db)):
-    """Get all suppliers"""
-    db_suppliers = supplier_db_service.list_all(db)
-    return [db_supplier_to_model(s) for s in db_suppliers]
+SUPPLIER_INCLUDES = ("products", "app_counts")
+
+
+@app.get("/suppliers", response_model=List[SupplierWithProducts], response_model_exclude_unset=True)
+def list_suppliers(response: Response, include: str = "", limit: int | None = None, offset: int = 0,
+                   ids: str | None = None, fields: str | None = None, db: Session = Depends(get_db)):
+    """
+    Get suppliers by name, a page at a time with limit/offset (total in
+    X-Total-Count), or those with the given ids= in that order.
+    include=products nests each supplier's products and include=app_counts
+    adds business app counts, still in two queries. fields= returns only
+    the given supplier fields (not with include).
+    """
+    includes = {part.strip() for part in include.split(",") if part.strip()}
+    if includes - set(SUPPLIER_INCLUDES):
+        raise HTTPException(status_code=400, detail=f"Invalid include. Allowed values: {', '.join(SUPPLIER_INCLUDES)}")
+    if (limit is not None and not 1 <= limit <= 500) or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500 and offset at least 0")
+    sparse = requested_fields(SUPPLIER_FIELDS, fields)
+    if sparse and includes:
+        raise HTTPException(status_code=400, detail="fields cannot be combined with include")
+    if ids is not None and (limit is not None or offset):
+        raise HTTPException(status_code=400, detail="ids cannot be combined with limit or offset")
+
+    options = SUPPLIER_FIELDS.load_options(sparse) if sparse else None
+    if ids is not None:
+        db_suppliers, missing = supplier_db_service.get_many(db, requested_ids(ids), options)
+        report_missing(response, missing)
+        total = len(db_suppliers)
+    else:
+        total, db_suppliers = supplier_db_service.list_page(db, offset=offset, limit=limit, options=options)
+    response.headers["X-Total-Count"] = str(total)
+    if sparse:
+        return sparse_response(SUPPLIER_FIELDS, sparse, db_suppliers, response)
+    if not includes:
+        return [db_supplier_to_model(s) for s in db_suppliers]
+
+    products_by_supplier = {s.id: [] for s in db_suppliers}
+    for db_product, app_count in product_db_service.list_for_suppliers(
+        db, list(products_by_supplier), with_app_counts="app_counts" in includes
+    ):
+        products_by_supplier[db_product.supplier_id].append(SupplierProduct(
+            **db_product_to_model(db_product).model_dump(),
+            **({"app_count": app_count} if app_count is not None else {})
+        ))
+
+    result = []
+    for db_supplier in db_suppliers:
+        products = products_by_supplier[db_supplier.id]
+        extra = {}
+        if "products" in includes:
+            extra["products"] = products
+        if "app_counts" in includes:
+            extra["app_count"] = sum(product.app_count for product in products)
+        result.append(SupplierWithProducts(**db_supplier_to_model(db_supplier).model_dump(), **extra))
+    return result
 
 
 @app.get("/suppliers/{supplier_id}", response_model=Supplier)
-def get_supplier(supplier_id: str, db: Session = Depends(get_db)):
+def get_supplier(supplier_id: str, response: Response, db: Session = Depends(get_db)):
     """Get a specific supplier by ID"""
     db_supplier = supplier_db_service.get(db, supplier_id)
     if not db_supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
+    set_etag(response, db_supplier)
     return db_supplier_to_model(db_supplier)
 
 
 @app.post("/suppliers", response_model=Supplier, status_code=201)
-def create_supplier(supplier: SupplierCreate, db: Session = Depends(get_db)):
-    """Create a new supplier"""
+def create_supplier(supplier: SupplierCreate, response: Response, allow_duplicates: bool = False,
+                    db: Session = Depends(get_db)):
+    """Create a new supplier (409 if similarly named ones exist, unless ?allow_duplicates=true)"""
     # Check if supplier with same name already exists
     existing = supplier_db_service.get_by_name(db, supplier.name)
     if existing:
         raise HTTPException(status_code=400, detail="Supplier with this name already exists")
+    if not allow_duplicates:
+        check_duplicates(db, "suppliers", supplier.name)
 
     db_supplier = supplier_db_service.create(db, supplier)
+    set_etag(response, db_supplier)
     return db_supplier_to_model(db_supplier)
 
 
 @app.put("/suppliers/{supplier_id}", response_model=Supplier)
-def update_supplier(supplier_id: str, supplier_update: SupplierUpdate, db: Session = Depends(get_db)):
+def update_supplier(supplier_id: str, supplier_update: SupplierUpdate, response: Response,
+                    expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
     """Update an existing supplier"""
-    db_supplier = supplier_db_service.update(db, supplier_id, supplier_update)
+    db_supplier = supplier_db_service.update(db, supplier_id, supplier_update, expected_version)
     if not db_supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
+    set_etag(response, db_supplier)
     return db_supplier_to_model(db_supplier)
 
 
 @app.delete("/suppliers/{supplier_id}", status_code=204)
-def delete_supplier(supplier_id: str, db: Session = Depends(get_db)):
+def delete_supplier(supplier_id: str, expected_version: int | None = Depends(if_match_version),
+                    db: Session = Depends(get_db)):
     """Delete a supplier"""
-    success = supplier_db_service.delete(db, supplier_id)
+    success = supplier_db_service.delete(db, supplier_id, expected_version)
     if not success:
         raise HTTPException(status_code=404, detail="Supplier not found")
 
 
 # Product Endpoints
 @app.get("/products", response_model=List[Product])
-def list_products(db: Session = Depends(get_db)):
-    """Get all products"""
-    db_products = product_db_service.list_all(db)
+def list_products(response: Response, ids: str | None = None, fields: str | None = None,
+                  db: Session = Depends(get_db)):
+    """Get all products, or those with the given ?ids= (only the given fields with ?fields=)"""
+    sparse = requested_fields(PRODUCT_FIELDS, fields)
+    options = PRODUCT_FIELDS.load_options(sparse) if sparse else None
+    if ids is not None:
+        db_products, missing = product_db_service.get_many(db, requested_ids(ids), options)
+        report_missing(response, missing)
+    else:
+        db_products = product_db_service.list_all(db, options)
+    if sparse:
+        return sparse_response(PRODUCT_FIELDS, sparse, db_products, response)
     return [db_product_to_model(p) for p in db_products]
 
 
 @app.get("/suppliers/{supplier_id}/products", response_model=List[Product])
-def list_supplier_products(supplier_id: str, db: Session = Depends(get_db)):
-    """Get all products for a specific supplier"""
+def list_supplier_products(supplier_id: str, fields: str | None = None, db: Session = Depends(get_db)):
+    """Get all products for a specific supplier (only the given fields with ?fields=)"""
+    sparse = requested_fields(PRODUCT_FIELDS, fields)
+    if sparse:
+        db_products = product_db_service.list_by_supplier(db, supplier_id, PRODUCT_FIELDS.load_options(sparse))
+        return sparse_response(PRODUCT_FIELDS, sparse, db_products)
     db_products = product_db_service.list_by_supplier(db, supplier_id)
     return [db_product_to_model(p) for p in db_products]
 
 
 @app.get("/products/{product_id}", response_model=Product)
-def get_product(product_id: str, db: Session = Depends(get_db)):
+def get_product(product_id: str, response: Response, db: Session = Depends(get_db)):
     """Get a specific product by ID"""
     db_product = product_db_service.get(db, product_id)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
+    set_etag(response, db_product)
     return db_product_to_model(db_product)
 
 
 @app.post("/products", response_model=Product, status_code=201)
-def create_product(product: ProductCreate, db: Session = Depends(get_db)):
+def create_product(product: ProductCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new product"""
     db_product = product_db_service.create(db, product)
     if not db_product:
         raise HTTPException(status_code=400, detail="Invalid supplier ID")
+    set_etag(response, db_product)
     return db_product_to_model(db_product)
 
 
 @app.put("/products/{product_id}", response_model=Product)
-def update_product(product_id: str, product_update: ProductUpdate, db: Session = Depends(get_db)):
+def update_product(product_id: str, product_update: ProductUpdate, response: Response,
+                   expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
     """Update an existing product"""
-    db_product = product_db_service.update(db, product_id, product_update)
+    db_product = product_db_service.update(db, product_id, product_update, expected_version)
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
+    set_etag(response, db_product)
     return db_product_to_model(db_product)
 
 
 @app.delete("/products/{product_id}", status_code=204)
-def delete_product(product_id: str, db: Session = Depends(get_db)):
+def delete_product(product_id: str, expected_version: int | None = Depends(if_match_version),
+                   db: Session = Depends(get_db)):
     """Delete a product"""
-    success = product_db_service.delete(db, product_id)
+    success = product_db_service.delete(db, product_id, expected_version)
     if not success:
         raise HTTPException(status_code=404, detail="Product not found")
 
 
+# Lookup Endpoint (the POST form of ?ids=, for ID sets too large for a query string)
+LOOKUP_TYPES = {
+    "adrs": (adr_db_service, db_adr_to_model, ADR_FIELDS),
+    "business_apps": (business_app_db_service, db_app_to_model, BUSINESS_APP_FIELDS),
+    "tech_debt": (tech_debt_db_service, db_debt_to_model, TECH_DEBT_FIELDS),
+    "suppliers": (supplier_db_service, db_supplier_to_model, SUPPLIER_FIELDS),
+    "products": (product_db_service, db_product_to_model, PRODUCT_FIELDS),
+}
+
+
+@app.post("/lookup")
+def lookup(request: LookupRequest, db: Session = Depends(get_db)):
+    """
+    Resolve IDs of several entity types at once, one query per type:
+    {"business_apps": {"items": [...], "missing": [...]}, ...} with items in request order
+    """
+    unknown = set(request.fields) - set(LOOKUP_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid fields type. Allowed values: {', '.join(LOOKUP_TYPES)}")
+    result = {}
+    for entity_type, (service, to_model, fieldset) in LOOKUP_TYPES.items():
+        ids = list(dict.fromkeys(getattr(request, entity_type)))
+        if not ids:
+            continue
+        try:
+            check_ids(ids)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{entity_type}: {e}")
+        sparse = requested_fields(fieldset, request.fields.get(entity_type))
+        options = fieldset.load_options(sparse) if sparse else None
+        if request.include_archived and fieldset.archive is not None:
+            db_items, missing = service.get_many(db, ids, options, True, archived_options(fieldset, sparse, True))
+        else:
+            db_items, missing = service.get_many(db, ids, options)
+        items = fieldset.dump(db_items, sparse) if sparse else [to_model(item) for item in db_items]
+        result[entity_type] = {"items": items, "missing": missing}
+    return result
+
+
+# Duplicate Endpoints
+@app.get("/duplicates/{entity_type}")
+def get_duplicates(entity_type: str, threshold: float | None = None, limit: int = 100, db: Session = Depends(get_db)):
+    """Clusters of near-duplicate suppliers, products or business apps, largest first"""
+    if entity_type not in DEDUP_TARGETS:
+        raise HTTPException(status_code=400,
+                            detail=f"Invalid entity type. Allowed values: {', '.join(DEDUP_TARGETS)}")
+    threshold = settings.duplicate_similarity_threshold if threshold is None else threshold
+    if not 0.5 <= threshold <= 1:
+        raise HTTPException(status_code=400, detail="threshold must be between 0.5 and 1")
+    if not 1 <= limit <= MAX_DUPLICATE_CLUSTERS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_DUPLICATE_CLUSTERS}")
+    return dedup_db_service.report(db, entity_type, round(threshold, 2), limit)
+
+
+@app.post("/suppliers/{supplier_id}/merge")
+def merge_suppliers(supplier_id: str, merge: MergeRequest, response: Response,
+                    expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
+    """Merge duplicate suppliers into this one: their products move to it and they are deleted"""
+    db_supplier, moved = merge_duplicates("suppliers", supplier_id, merge, expected_version, db)
+    set_etag(response, db_supplier)
+    return {"supplier": db_supplier_to_model(db_supplier), "merged": merge.duplicate_ids, "moved": moved}
+
+
+@app.post("/products/{product_id}/merge")
+def merge_products(product_id: str, merge: MergeRequest, response: Response,
+                   expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
+    """Merge duplicate products into this one: the apps using them use it instead and they are deleted"""
+    db_product, moved = merge_duplicates("products", product_id, merge, expected_version, db)
+    set_etag(response, db_product)
+    return {"product": db_product_to_model(db_product), "merged": merge.duplicate_ids, "moved": moved}
+
+
+@app.post("/business-apps/{app_id}/merge")
+def merge_business_apps(app_id: str, merge: MergeRequest, response: Response,
+                        expected_version: int | None = Depends(if_match_version), db: Session = Depends(get_db)):
+    """Merge duplicate business applications into this one: dependencies on them name it instead and they are deleted"""
+    db_app, moved = merge_duplicates("business-apps", app_id, merge, expected_version, db)
+    set_etag(response, db_app)
+    return {"business_app": db_app_to_model(db_app), "merged": merge.duplicate_ids, "moved": moved}
+
+
+# Suggest Endpoint (type-ahead for the free-text fields of the forms)
+MAX_SUGGESTIONS = 50
+
+
+@app.get("/suggest")
+def suggest(response: Response, field: str, prefix: str = "", limit: int = 10, db: Session = Depends(get_db)):
+    """Values of a field in use that start with the prefix (or have a word that does), most used first"""
+    if field not in SUGGEST_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid field. Allowed values: {', '.join(SUGGEST_FIELDS)}")
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_SUGGESTIONS}")
+    if settings.suggest_cache_seconds:
+        # Retyping or deleting characters repeats earlier requests
+        response.headers["Cache-Control"] = f"private, max-age={settings.suggest_cache_seconds}"
+    return {"field": field, "prefix": prefix,
+            "suggestions": suggest_db_service.suggest(db, field, prefix[:255], limit)}
+
+
+# Exposure Endpoints (business apps per supplier/product; filter with ?status=active etc.)
+def exposure_filters(request: Request) -> dict:
+    """Repeatable ?status=/?resilience_category=/?hosting_type= filters ('none' matches missing values)"""
+    return {dim: request.query_params.getlist(dim) for dim in EXPOSURE_DIMENSIONS if dim in request.query_params}
+
+
+@app.get("/exposure/suppliers")
+def get_supplier_exposure(request: Request, db: Session = Depends(get_db)):
+    """App counts per supplier by status, resilience category and hosting type"""
+    return exposure_db_service.suppliers(db, exposure_filters(request))
+
+
+@app.get("/exposure/suppliers/{supplier_id}")
+def get_single_supplier_exposure(supplier_id: str, request: Request, db: Session = Depends(get_db)):
+    """App counts for one supplier, in total and per product"""
+    exposure = exposure_db_service.supplier(db, supplier_id, exposure_filters(request))
+    if not exposure:
+        raise HTTPException(status_code=404, detail="Supplier not found")
+    return exposure
+
+
+@app.get("/exposure/products")
+def get_product_exposure(request: Request, supplier_id: str | None = None, db: Session = Depends(get_db)):
+    """App counts per product (optionally of one supplier) by status, resilience category and hosting type"""
+    return exposure_db_service.products(db, supplier_id, exposure_filters(request))
+
+
+# Map Endpoints (pre-clustered points for the current map view)
+@app.get("/geo/suppliers")
+def get_supplier_map_points(bbox: str | None = None, zoom: int = 2, db: Session = Depends(get_db)):
+    """Suppliers in a bounding box (west,south,east,north), clustered for the given zoom level"""
+    try:
+        box = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bbox": box, "zoom": zoom, "points": geo_db_service.supplier_clusters(db, box, zoom)}
+
+
+@app.get("/geo/business-apps")
+def get_business_app_map_points(bbox: str | None = None, zoom: int = 2, db: Session = Depends(get_db)):
+    """Business app locations in a bounding box (west,south,east,north), clustered for the given zoom level"""
+    try:
+        box = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bbox": box, "zoom": zoom, "points": geo_db_service.business_app_clusters(db, box, zoom)}
+
+
+@app.post("/geo/backfill", status_code=202)
+def backfill_geocoding(regeocode: bool = False, db: Session = Depends(get_db), _: DBUser = Depends(require_admin)):
+    """Queue geocoding of suppliers and app locations that have no coordinates yet (all of them with ?regeocode=true)"""
+    return job_to_dict(enqueue(db, "geocode_backfill", {"regeocode": True} if regeocode else None))
+
+
 if __name__ == "__main__":
     import uvicorn
     print("=" * 60)
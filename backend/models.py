@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Dict, List, Optional
 from datetime import datetime, date
 from enum import Enum
 
@@ -32,6 +32,8 @@ class ADRCreate(BaseModel):
     consequences: str
     stakeholders: List[str] = Field(default_factory=list)
     related_adrs: List[str] = Field(default_factory=list)
+    supersedes: List[str] = Field(default_factory=list)  # ADR IDs this decision replaces
+    amends: List[str] = Field(default_factory=list)  # ADR IDs this decision modifies
     status: ADRStatus = ADRStatus.PROPOSED
 
     @field_validator('status', mode='before')
@@ -54,6 +56,8 @@ class ADRUpdate(BaseModel):
     consequences: Optional[str] = None
     stakeholders: Optional[List[str]] = None
     related_adrs: Optional[List[str]] = None
+    supersedes: Optional[List[str]] = None
+    amends: Optional[List[str]] = None
     status: Optional[ADRStatus] = None
 
     @field_validator('status', mode='before')
@@ -77,9 +81,12 @@ class ADR(BaseModel):
     consequences: str
     stakeholders: List[str]
     related_adrs: List[str]
+    supersedes: List[str] = Field(default_factory=list)
+    amends: List[str] = Field(default_factory=list)
     status: ADRStatus
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    lock_version: Optional[int] = None  # Send back as If-Match when updating (see versioning.py)
     author: Optional[str] = None
 
 
@@ -113,6 +120,29 @@ class DevelopmentType(str, Enum):
     INTERNAL = "internal"
 
 
+# Member name (upper case) -> value for each enum-typed BusinessApp field, built once
+# so validation is a dict lookup instead of a scan over the enum members
+BUSINESS_APP_ENUM_LOOKUPS = {
+    field_name: {member.name: member.value for member in enum_class}
+    for field_name, enum_class in {
+        'status': BusinessAppStatus,
+        'resilience_category': ResilienceCategory,
+        'hosting_type': HostingType,
+        'development_type': DevelopmentType
+    }.items()
+}
+
+
+def normalize_business_app_enum(v, field_name: str):
+    """Map an enum member name (any case) to its value, otherwise lowercase for direct value matching"""
+    if not isinstance(v, str):
+        return v
+    lookup = BUSINESS_APP_ENUM_LOOKUPS.get(field_name)
+    if lookup is None:
+        return v.lower()
+    return lookup.get(v.upper(), v.lower())
+
+
 class BusinessAppCreate(BaseModel):
     name: str
     description: str
@@ -134,29 +164,7 @@ class BusinessAppCreate(BaseModel):
     @classmethod
     def normalize_enum_case(cls, v, info):
         """Convert enum member names to their values"""
-        if not isinstance(v, str):
-            return v
-
-        # Map field name to enum class
-        enum_map = {
-            'status': BusinessAppStatus,
-            'resilience_category': ResilienceCategory,
-            'hosting_type': HostingType,
-            'development_type': DevelopmentType
-        }
-
-        enum_class = enum_map.get(info.field_name)
-        if not enum_class:
-            return v.lower()
-
-        # Try to match by member name (case-insensitive)
-        v_upper = v.upper()
-        for member in enum_class:
-            if member.name == v_upper:
-                return member.value
-
-        # Fall back to lowercase for direct value matching
-        return v.lower()
+        return normalize_business_app_enum(v, info.field_name)
 
 
 class BusinessAppUpdate(BaseModel):
@@ -180,29 +188,7 @@ class BusinessAppUpdate(BaseModel):
     @classmethod
     def normalize_enum_case(cls, v, info):
         """Convert enum member names to their values"""
-        if not isinstance(v, str):
-            return v
-
-        # Map field name to enum class
-        enum_map = {
-            'status': BusinessAppStatus,
-            'resilience_category': ResilienceCategory,
-            'hosting_type': HostingType,
-            'development_type': DevelopmentType
-        }
-
-        enum_class = enum_map.get(info.field_name)
-        if not enum_class:
-            return v.lower()
-
-        # Try to match by member name (case-insensitive)
-        v_upper = v.upper()
-        for member in enum_class:
-            if member.name == v_upper:
-                return member.value
-
-        # Fall back to lowercase for direct value matching
-        return v.lower()
+        return normalize_business_app_enum(v, info.field_name)
 
 
 class BusinessApp(BaseModel):
@@ -225,6 +211,8 @@ class BusinessApp(BaseModel):
     product_name: Optional[str] = None  # Included for convenience
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    lock_version: Optional[int] = None
+    archived_at: Optional[datetime] = None  # Set on archived apps (?include_archived=true)
 
 
 class GitHistoryEntry(BaseModel):
@@ -318,6 +306,8 @@ class TechDebt(BaseModel):
     tags: List[str]
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    lock_version: Optional[int] = None
+    archived_at: Optional[datetime] = None  # Set on archived items (?include_archived=true)
 
 
 # Supplier Models
@@ -347,8 +337,11 @@ class Supplier(BaseModel):
     contact_email: Optional[str] = None
     contact_phone: Optional[str] = None
     address: Optional[str] = None
+    latitude: Optional[float] = None  # Resolved from the address
+    longitude: Optional[float] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    lock_version: Optional[int] = None
 
 
 # Product Models
@@ -384,3 +377,103 @@ class Product(BaseModel):
     license_type: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    lock_version: Optional[int] = None
+
+
+class SupplierProduct(Product):
+    app_count: Optional[int] = None  # Business apps using the product, with ?include=app_counts
+
+
+class SupplierWithProducts(Supplier):
+    """Supplier as listed with ?include=products,app_counts"""
+    products: Optional[List[SupplierProduct]] = None
+    app_count: Optional[int] = None
+
+
+# Bundle Models (an entity with its related objects, for detail pages)
+class ADRSummary(BaseModel):
+    id: str
+    title: str
+    status: ADRStatus
+
+
+class ADRBundle(BaseModel):
+    adr: ADR
+    tech_debt: List[TechDebt]
+    related_adrs: List[ADRSummary]  # ADRs this one lists; ids that no longer exist are left out
+    referenced_by: List[ADRSummary]  # ADRs listing this one
+
+
+class BusinessAppSummary(BaseModel):
+    id: str
+    name: str
+    status: str
+
+
+class BusinessAppLocation(BaseModel):
+    location: str
+    place: str
+    latitude: float
+    longitude: float
+
+
+class BusinessAppBundle(BaseModel):
+    app: BusinessApp
+    product: Optional[Product] = None
+    supplier: Optional[Supplier] = None
+    dependencies: List[BusinessAppSummary]  # Apps this one depends on; unknown ids are left out
+    dependents: List[BusinessAppSummary]  # Apps depending on this one
+    locations: List[BusinessAppLocation]
+
+
+# ADR Graph Models (typed links between ADRs, traversed in the database)
+class ADRLinkType(str, Enum):
+    RELATES = "relates"  # related_adrs
+    SUPERSEDES = "supersedes"
+    AMENDS = "amends"
+
+
+class ADRGraphNode(ADRSummary):
+    depth: int  # Links from the root ADR
+
+
+class ADRGraphEdge(BaseModel):
+    source: str
+    target: str
+    type: ADRLinkType
+
+
+class ADRGraph(BaseModel):
+    root: str
+    depth: int
+    nodes: List[ADRGraphNode]  # Nearest first, the root at depth 0
+    edges: List[ADRGraphEdge]  # Links between the nodes
+    truncated: bool  # More ADRs were within reach than were returned
+
+
+class ADRChainEntry(ADRSummary):
+    position: int  # Supersession steps from the requested ADR: negative older, positive newer
+
+
+class ADRSupersession(BaseModel):
+    adr_id: str
+    chain: List[ADRChainEntry]  # Oldest first
+    current: List[ADRSummary]  # Decisions of the chain nothing supersedes (several if it branches)
+
+
+# Lookup Models (multi-get across entity types)
+class LookupRequest(BaseModel):
+    """IDs to resolve per entity type, each type in one query"""
+    adrs: List[str] = Field(default_factory=list)
+    business_apps: List[str] = Field(default_factory=list)
+    tech_debt: List[str] = Field(default_factory=list)
+    suppliers: List[str] = Field(default_factory=list)
+    products: List[str] = Field(default_factory=list)
+    fields: Dict[str, str] = Field(default_factory=dict)  # Entity type -> "id,name,..." as with ?fields=
+    include_archived: bool = False  # Also resolve archived business apps and tech debt
+
+
+# Duplicate Models (see dedup.py)
+class MergeRequest(BaseModel):
+    """Items to fold into the one merged into; their references move to it and they are deleted"""
+    duplicate_ids: List[str] = Field(min_length=1, max_length=100)
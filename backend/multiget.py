@@ -0,0 +1,75 @@
+"""
+Multi-get: load many entities by their public IDs in one query
+
+Serves ?ids=a,b,c on the collection endpoints and POST /lookup. The IDs are
+bound as a single array parameter (key = ANY(:ids)), so the statement text is
+the same for any number of IDs; rows come back in request order, with the IDs
+that matched nothing reported separately. With ?include_archived=true, the
+IDs not found are looked up in the archive table as well.
+"""
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import String, any_, bindparam, cast
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Session
+
+# Per request (query string or lookup body, per entity type)
+MAX_IDS = 5000
+
+
+def parse_ids(value: str) -> List[str]:
+    """Comma-separated IDs, deduplicated in order; raises ValueError when there are too many"""
+    ids = list(dict.fromkeys(part.strip() for part in value.split(",") if part.strip()))
+    check_ids(ids)
+    return ids
+
+
+def check_ids(ids: List[str]):
+    if len(ids) > MAX_IDS:
+        raise ValueError(f"At most {MAX_IDS} ids per request")
+
+
+def get_many(db: Session, entity: Any, key: str, ids: List[str], options: Optional[List] = None,
+             archive: Optional[Any] = None, archive_options: Optional[List] = None) -> Tuple[List, List[str]]:
+    """
+    Entities whose key column is one of ids, in the order of ids, and the ids
+    that matched nothing. UUID keys are compared in canonical form, so
+    malformed ones are reported missing without reaching the database. IDs
+    missing from the entity's table are then looked up in the archive entity,
+    if given.
+    """
+    uuid_keys = isinstance(getattr(entity, key).type, UUID)
+    wanted = {}
+    for requested in dict.fromkeys(ids):
+        wanted[requested] = _canonical_uuid(requested) if uuid_keys else requested
+
+    values = list(dict.fromkeys(value for value in wanted.values() if value is not None))
+    found = _load(db, entity, key, values, options)
+    if archive is not None:
+        remaining = [value for value in values if value not in found]
+        found.update(_load(db, archive, key, remaining, archive_options))
+    items = [found[value] for value in dict.fromkeys(wanted.values()) if value in found]
+    missing = [requested for requested, value in wanted.items() if value not in found]
+    return items, missing
+
+
+def _load(db: Session, entity: Any, key: str, values: List[str], options: Optional[List]) -> Dict[str, Any]:
+    """Rows whose key is one of values (canonical), by key"""
+    if not values:
+        return {}
+    column = getattr(entity, key)
+    array = bindparam("ids", values, type_=ARRAY(String))
+    rows = (
+        db.query(entity)
+        .options(*(options or []))
+        .filter(column == any_(cast(array, ARRAY(column.type)) if isinstance(column.type, UUID) else array))
+        .all()
+    )
+    return {str(getattr(row, key)): row for row in rows}
+
+
+def _canonical_uuid(value: str) -> Optional[str]:
+    try:
+        return str(uuid.UUID(value))
+    except ValueError:
+        return None
@@ -0,0 +1,234 @@
+"""
+SQL statement instrumentation
+
+Hooks SQLAlchemy's before/after cursor execute events to record timings per
+statement fingerprint (the statement with literals and bind parameters
+normalized), and captures EXPLAIN (ANALYZE, BUFFERS) plans for a sample of
+slow SELECT statements. Plans are captured by a background thread on a
+connection of its own, so the request that ran the slow statement does not
+wait for it to run again; the plan therefore reflects committed data only.
+"""
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Number of recent timings kept per fingerprint for percentile calculation
+SAMPLE_SIZE = 1024
+# Slow statements waiting for their plan to be captured; more are not sampled
+EXPLAIN_QUEUE_SIZE = 16
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_BIND_PARAM = re.compile(r"%\([^)]+\)s|%s|(?<!:):\w+|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Per-request statement counter. Holds a mutable one-element list so that
+# increments made in threadpool workers (which run in a copied context)
+# are visible to the request middleware that created it.
+request_query_count: ContextVar[Optional[list]] = ContextVar("request_query_count", default=None)
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so that executions differing only by parameters group together"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _BIND_PARAM.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class _FingerprintStats:
+    """Running statistics for a single statement fingerprint"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "slow_count", "samples", "last_seen")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_count = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+        self.last_seen = None
+
+
+class QueryStatsCollector:
+    """Thread-safe collector of per-fingerprint timings and captured plans"""
+
+    def __init__(self, slow_threshold_ms: float = 200.0, explain_sample_rate: float = 0.1,
+                 max_plans: int = 50):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.max_plans = max_plans
+        self._stats: Dict[str, _FingerprintStats] = {}
+        self._plans: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._explain_queue: "queue.Queue[tuple]" = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+        self._explain_thread: Optional[threading.Thread] = None
+
+    def install(self, engine: Engine):
+        """Register cursor execute listeners on an engine"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_stats_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_stats_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        key = fingerprint(statement)
+        slow = elapsed_ms >= self.slow_threshold_ms
+        self.record(key, elapsed_ms, slow)
+
+        counter = request_query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+        if slow and not executemany and self._should_explain(statement):
+            self._queue_plan(conn, key, statement, parameters, elapsed_ms)
+
+    def record(self, key: str, elapsed_ms: float, slow: bool = False):
+        """Record one execution of a fingerprint"""
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _FingerprintStats()
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.samples.append(elapsed_ms)
+            stats.last_seen = datetime.utcnow()
+            if slow:
+                stats.slow_count += 1
+
+    def _should_explain(self, statement: str) -> bool:
+        # EXPLAIN ANALYZE executes the statement again, so only read-only statements qualify
+        upper = statement.lstrip().upper()
+        if not upper.startswith("SELECT") or " FOR UPDATE" in upper or " FOR SHARE" in upper:
+            return False
+        return random.random() < self.explain_sample_rate
+
+    def _queue_plan(self, conn, key: str, statement: str, parameters, elapsed_ms: float):
+        if conn.dialect.name != "postgresql":
+            return
+        try:
+            self._explain_queue.put_nowait((conn.engine, key, statement, parameters, elapsed_ms))
+        except queue.Full:
+            return  # Capture is best effort; while plans are pending, further slow statements are skipped
+        with self._lock:
+            if self._explain_thread is None:
+                self._explain_thread = threading.Thread(target=self._explain_forever, name="query-stats-explain",
+                                                        daemon=True)
+                self._explain_thread.start()
+
+    def _explain_forever(self):
+        while True:
+            self._capture_plan(*self._explain_queue.get())
+
+    def _capture_plan(self, engine: Engine, key: str, statement: str, parameters, elapsed_ms: float):
+        try:
+            # A raw DBAPI connection, so the EXPLAIN does not re-enter these event hooks
+            connection = engine.raw_connection()
+            try:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+                    plan = cursor.fetchone()[0]
+                finally:
+                    cursor.close()
+                    connection.rollback()
+            finally:
+                connection.close()
+        except Exception as e:
+            plan = {"error": str(e)}
+
+        with self._lock:
+            self._plans.pop(key, None)
+            self._plans[key] = {
+                "fingerprint": key,
+                "duration_ms": round(elapsed_ms, 3),
+                "captured_at": datetime.utcnow().isoformat(),
+                "plan": plan
+            }
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+
+    def snapshot(self, order_by: str = "total_ms", limit: Optional[int] = None) -> List[dict]:
+        """Return per-fingerprint statistics sorted descending by the given metric"""
+        with self._lock:
+            rows = []
+            for key, stats in self._stats.items():
+                samples = sorted(stats.samples)
+                rows.append({
+                    "fingerprint": key,
+                    "calls": stats.count,
+                    "slow_calls": stats.slow_count,
+                    "total_ms": round(stats.total_ms, 3),
+                    "mean_ms": round(stats.total_ms / stats.count, 3),
+                    "p50_ms": round(percentile(samples, 50), 3),
+                    "p95_ms": round(percentile(samples, 95), 3),
+                    "max_ms": round(stats.max_ms, 3),
+                    "last_seen": stats.last_seen.isoformat() if stats.last_seen else None,
+                    "has_plan": key in self._plans
+                })
+
+        rows.sort(key=lambda row: row.get(order_by) or 0, reverse=True)
+        return rows[:limit] if limit else rows
+
+    def plans(self) -> List[dict]:
+        """Return captured plans, most recent first"""
+        with self._lock:
+            return list(reversed(self._plans.values()))
+
+    def reset(self):
+        """Discard all collected statistics and plans"""
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+
+
+class QueryCountMiddleware:
+    """ASGI middleware reporting the number of SQL statements a request ran in an X-Query-Count header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = request_query_count.set(counter)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(counter[0]).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            request_query_count.reset(token)
@@ -0,0 +1,250 @@
+"""
+Rate limiting and admission control
+
+Rate limiting: every request takes a token from a bucket keyed by route class
+(login, read, write) and caller - the user of the bearer token, or the client
+IP without one. Buckets hold a minute's allowance and refill continuously;
+an empty bucket answers 429 with Retry-After. Buckets live in process memory
+by default, or in an UNLOGGED Postgres table shared by every API process
+(RATE_LIMIT_BACKEND=postgres) at the cost of one statement per request.
+
+Admission control: requests are turned away with 503 + Retry-After while too
+many are already in flight in this process, or while recent checkouts waited
+too long for a database connection - once the pool is saturated, every
+further request only queues behind the others and latency grows without
+bound. Both middlewares let CORS preflights and health probes through.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from math import ceil
+from typing import Dict, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from health import PROBE_PATHS
+
+READ_METHODS = ("GET", "HEAD")
+LOGIN_PATH = "/auth/login"
+
+
+class MemoryBuckets:
+    """Token buckets of this process, the least recently used dropped beyond max_keys"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float) -> Optional[float]:
+        """Take a token; None when allowed, else the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return None if allowed else (1 - tokens) / rate
+
+
+class PostgresBuckets:
+    """Token buckets in the rate_limit_buckets table, shared by all API processes"""
+
+    # Buckets idle this long are full again, the same as no row
+    PRUNE_IDLE_SECONDS = 600
+    PRUNE_INTERVAL_SECONDS = 60
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._next_prune = 0.0
+
+    def take(self, key: str, capacity: float, rate: float) -> Optional[float]:
+        # Refill and take in one statement; the WHERE leaves an empty bucket untouched and returns no row
+        refilled = "LEAST(:capacity, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate)"
+        with self.engine.begin() as connection:
+            row = connection.execute(text(f"""
+                INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+                VALUES (:key, :capacity - 1, clock_timestamp())
+                ON CONFLICT (key) DO UPDATE
+                SET tokens = {refilled} - 1, updated_at = clock_timestamp()
+                WHERE {refilled} >= 1
+                RETURNING tokens
+            """), {"key": key, "capacity": capacity, "rate": rate}).first()
+            self._prune(connection)
+        return None if row is not None else 1 / rate
+
+    def _prune(self, connection):
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.PRUNE_INTERVAL_SECONDS
+        connection.execute(text(
+            "DELETE FROM rate_limit_buckets WHERE updated_at < clock_timestamp() - make_interval(secs => :idle)"
+        ), {"idle": self.PRUNE_IDLE_SECONDS})
+
+
+class RateLimiter:
+    """Per-minute allowances by route class over a bucket store"""
+
+    def __init__(self, buckets, per_minute: Dict[str, int]):
+        self.buckets = buckets
+        # Classes without an allowance (or 0) are not limited
+        self.per_minute = {route_class: limit for route_class, limit in per_minute.items() if limit > 0}
+
+    def take(self, route_class: str, caller: str) -> Optional[float]:
+        """Take a token for a caller; None when allowed, else the seconds to wait"""
+        limit = self.per_minute.get(route_class)
+        if not limit:
+            return None
+        return self.buckets.take(f"{route_class}:{caller}", capacity=limit, rate=limit / 60)
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    if method == "OPTIONS" or path in PROBE_PATHS:
+        return None
+    if path == LOGIN_PATH:
+        return "login"
+    return "read" if method in READ_METHODS else "write"
+
+
+def _caller(scope, by_user: bool = True) -> str:
+    """The user of a valid bearer token, else the client address (from X-Forwarded-For for trusted proxies, see uvicorn)"""
+    from auth import decode_access_token  # auth -> database -> this module
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    if by_user and authorization.lower().startswith("bearer "):
+        payload = decode_access_token(authorization[7:])
+        if payload and "sub" in payload:
+            return f"user:{payload['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _retry_after(seconds: float) -> str:
+    return str(max(1, ceil(seconds)))
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 once a caller's bucket for the route class is empty"""
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limited_class = route_class(scope["method"], scope["path"])
+        if limited_class in self.limiter.per_minute:
+            # Logins are limited per address whatever token the client sends
+            caller = _caller(scope, by_user=limited_class != "login")
+            if isinstance(self.limiter.buckets, MemoryBuckets):
+                wait = self.limiter.take(limited_class, caller)
+            else:
+                wait = await run_in_threadpool(self.limiter.take, limited_class, caller)
+            if wait is not None:
+                response = JSONResponse({"detail": "Too many requests"}, status_code=429,
+                                        headers={"Retry-After": _retry_after(wait)})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class RecentWaits:
+    """Connection pool checkout waits of the last window_seconds"""
+
+    def __init__(self, window_seconds: float = 5.0):
+        self.window_seconds = window_seconds
+        self._samples: deque = deque()
+        self._total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, wait_ms: float):
+        now = time.monotonic()
+        with self._lock:
+            self._samples.append((now, wait_ms))
+            self._total_ms += wait_ms
+            self._expire(now)
+
+    def mean_ms(self) -> float:
+        # With no recent checkouts (everything shed) this drops to 0, so traffic is let back in to probe the pool
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._total_ms / len(self._samples) if self._samples else 0.0
+
+    def _expire(self, now: float):
+        while self._samples and self._samples[0][0] < now - self.window_seconds:
+            self._total_ms -= self._samples.popleft()[1]
+        if not self._samples:
+            self._total_ms = 0.0  # Drop accumulated float error
+
+
+pool_waits = RecentWaits()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waited for a connection in pool_waits"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_waits.add((time.perf_counter() - started) * 1000)
+
+
+class AdmissionController:
+    """Decides whether this process takes on another request (0 disables a threshold)"""
+
+    def __init__(self, max_in_flight: int, max_pool_wait_ms: float, retry_after_seconds: float):
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight = 0  # Only changed on the event loop thread
+        self.rejected = 0
+
+    def overloaded(self) -> Optional[str]:
+        """Why a new request should be shed right now, or None"""
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        if self.max_pool_wait_ms and pool_waits.mean_ms() > self.max_pool_wait_ms:
+            return "pool_wait"
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "pool_wait_ms": round(pool_waits.mean_ms(), 1),
+            "max_pool_wait_ms": self.max_pool_wait_ms,
+            "rejected": self.rejected
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 503 + Retry-After while the AdmissionController reports overload"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in PROBE_PATHS:
+            await self.app(scope, receive, send)
+            return
+        reason = self.controller.overloaded()
+        if reason:
+            self.controller.rejected += 1
+            response = JSONResponse({"detail": "Server busy, retry later", "reason": reason}, status_code=503,
+                                    headers={"Retry-After": _retry_after(self.controller.retry_after_seconds)})
+            await response(scope, receive, send)
+            return
+        self.controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.in_flight -= 1
@@ -0,0 +1,201 @@
+"""
+Read replica routing with read-your-writes consistency
+
+Requests that only read (GET/HEAD) are served from a streaming replica; all
+other requests, and every session outside HTTP requests, use the primary.
+Consistency for the edit -> detail page flow comes from WAL positions (LSNs):
+
+1. When a request commits a write, the primary's current LSN is handed back
+   to the client in a short-lived cookie (and an X-Write-LSN header, which API
+   clients can send back as X-Min-LSN)
+2. A read carrying an LSN only goes to a replica whose replay position is at
+   or past it; when no replica has caught up yet it reads from the primary
+
+Replay positions are polled in a background thread, so choosing a replica
+costs no extra round trip. Replicas that stop answering or fall more than
+REPLICA_MAX_LAG_BYTES behind are skipped until they recover.
+"""
+import contextvars
+import itertools
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+LSN_COOKIE = "ea_min_lsn"
+READ_METHODS = ("GET", "HEAD")
+
+_LSN_PATTERN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+# Set per request by ReadYourWritesMiddleware: one-element list holding the
+# LSN of the request's last committed write (mutated from threadpool workers)
+request_write_lsn: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_write_lsn", default=None)
+
+
+def parse_lsn(value: Optional[str]) -> Optional[int]:
+    """Convert a pg_lsn string ('16/B374D848') to an integer; None if malformed"""
+    if not value or not _LSN_PATTERN.match(value):
+        return None
+    high, low = value.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def format_lsn(lsn: int) -> str:
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def is_replica_session(session: Session) -> bool:
+    """Whether a session reads from a replica, which may lag behind the primary"""
+    return "replica" in session.info
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    session_factory: sessionmaker
+    replay_lsn: Optional[int] = None
+    lag_bytes: Optional[int] = None
+    checked_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """Tracks replica replay positions and picks a replica for read-only sessions"""
+
+    def __init__(self, primary: Engine, replica_urls: List[str], poll_interval: float, max_lag_bytes: int,
+                 **engine_options):
+        self.primary = primary
+        self.poll_interval = poll_interval
+        self.max_lag_bytes = max_lag_bytes
+        self.replicas: List[Replica] = []
+        for i, url in enumerate(replica_urls):
+            replica_engine = create_engine(url, **engine_options).execution_options(postgresql_readonly=True)
+            self.replicas.append(Replica(
+                name=f"replica-{i + 1}",
+                engine=replica_engine,
+                session_factory=sessionmaker(autocommit=False, autoflush=False, bind=replica_engine,
+                                             info={"replica": f"replica-{i + 1}"})
+            ))
+        self.primary_lsn: Optional[int] = None
+        self._round_robin = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def start(self):
+        """Start the background replay-position poller (idempotent)"""
+        with self._lock:
+            if self._thread is None and self.replicas:
+                self._thread = threading.Thread(target=self._poll_forever, name="replica-lsn-poller", daemon=True)
+                self._thread.start()
+
+    def _poll_forever(self):
+        while True:
+            self.poll_once()
+            time.sleep(self.poll_interval)
+
+    def poll_once(self):
+        """Refresh the primary's LSN and every replica's replay LSN"""
+        try:
+            with self.primary.connect() as conn:
+                self.primary_lsn = parse_lsn(conn.execute(text("SELECT pg_current_wal_lsn()::text")).scalar())
+        except Exception:
+            self.primary_lsn = None
+
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    replay_lsn = parse_lsn(conn.execute(text("SELECT pg_last_wal_replay_lsn()::text")).scalar())
+                if replay_lsn is None:
+                    raise RuntimeError("not a streaming replica (pg_last_wal_replay_lsn() is NULL)")
+                replica.replay_lsn = replay_lsn
+                replica.lag_bytes = max(self.primary_lsn - replay_lsn, 0) if self.primary_lsn is not None else None
+                replica.error = None
+            except Exception as e:
+                replica.replay_lsn = None
+                replica.lag_bytes = None
+                replica.error = str(e).splitlines()[0]
+            replica.checked_at = time.monotonic()
+
+    def choose(self, min_lsn: Optional[int] = None) -> Optional[Replica]:
+        """A healthy replica that has replayed min_lsn, or None to use the primary"""
+        if not self.replicas:
+            return None
+        self.start()
+        stale_after = time.monotonic() - max(self.poll_interval * 5, 2.0)
+        candidates = [
+            replica for replica in self.replicas
+            if replica.replay_lsn is not None
+            and replica.checked_at is not None and replica.checked_at >= stale_after
+            and (replica.lag_bytes is None or replica.lag_bytes <= self.max_lag_bytes)
+            and (min_lsn is None or replica.replay_lsn >= min_lsn)
+        ]
+        if not candidates:
+            return None
+        return candidates[next(self._round_robin) % len(candidates)]
+
+    def record_write(self, session: Session, tables: Set[str]):
+        """Hand the primary's LSN to the current request after it committed a write (a write_tracking subscriber)"""
+        holder = request_write_lsn.get()
+        if holder is None:
+            return
+        # Any LSN read after the commit returned is at or past the commit record
+        with self.primary.connect() as conn:
+            holder[0] = conn.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+
+    def status(self) -> Dict:
+        return {
+            "primary_lsn": format_lsn(self.primary_lsn) if self.primary_lsn is not None else None,
+            "max_lag_bytes": self.max_lag_bytes,
+            "replicas": [{
+                "name": replica.name,
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "replay_lsn": format_lsn(replica.replay_lsn) if replica.replay_lsn is not None else None,
+                "lag_bytes": replica.lag_bytes,
+                "seconds_since_check": round(time.monotonic() - replica.checked_at, 2) if replica.checked_at else None,
+                "error": replica.error
+            } for replica in self.replicas]
+        }
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware returning the LSN of a request's committed writes, as an
+    X-Write-LSN header and a cookie that routes the client's next reads to
+    the primary or a caught-up replica.
+    """
+
+    def __init__(self, app, cookie_max_age: int):
+        self.app = app
+        self.cookie_max_age = cookie_max_age
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        holder = [None]
+        token = request_write_lsn.set(holder)
+
+        async def send_with_lsn(message):
+            if message["type"] == "http.response.start" and holder[0]:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-write-lsn", holder[0].encode("latin-1")))
+                headers.append((b"set-cookie", (
+                    f"{LSN_COOKIE}={holder[0]}; Max-Age={self.cookie_max_age}; Path=/; HttpOnly; SameSite=Lax"
+                ).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_lsn)
+        finally:
+            request_write_lsn.reset(token)
@@ -1,22 +1,103 @@
 """ADR service with database operations"""
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import bindparam, case, event, inspect, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
-from db_models import ADR as DBModel_ADR
+from cache import WriteInvalidatedCache
+from config import settings
+from database import SessionLocal
+from db_models import ADR as DBModel_ADR, ADRLink, TechDebt
 from models import ADRCreate, ADRUpdate
+import multiget
+from tracing import traced_service
+from versioning import check_version
 
+# Link type -> the ADR column listing its targets
+LINK_COLUMNS = {"relates": "related_adrs", "supersedes": "supersedes", "amends": "amends"}
+LINK_TYPES = tuple(LINK_COLUMNS)
+MAX_GRAPH_DEPTH = 5
+MAX_GRAPH_NODES = 500
+MAX_CHAIN_DEPTH = 50
+# Tech debt on an ADR page, most urgent first (the column holds plain strings)
+PRIORITY_ORDER = case({"critical": 0, "high": 1, "medium": 2, "low": 3}, value=TechDebt.priority, else_=4)
 
+# Graph and supersession results; cleared by writes to ADRs (titles, statuses) and their links
+_graph_cache = WriteInvalidatedCache("adr_graph", ("adrs", "adr_links"), ttl_seconds=settings.adr_graph_cache_seconds)
+
+# Walks links in both directions; the union arms each use an index on adr_links
+_NEIGHBORHOOD_SQL = text("""
+    WITH RECURSIVE walk(adr_id, depth) AS (
+        SELECT CAST(:root AS VARCHAR(100)), 0
+        UNION
+        SELECT e.to_id, w.depth + 1
+        FROM walk w
+        JOIN (
+            SELECT source_adr_id AS from_id, target_adr_id AS to_id FROM adr_links WHERE link_type IN :types
+            UNION ALL
+            SELECT target_adr_id, source_adr_id FROM adr_links WHERE link_type IN :types
+        ) e ON e.from_id = w.adr_id
+        WHERE w.depth < :depth
+    )
+    SELECT a.adr_id, a.title, a.status, MIN(w.depth) AS depth
+    FROM walk w
+    JOIN adrs a ON a.adr_id = w.adr_id
+    GROUP BY a.adr_id, a.title, a.status
+    ORDER BY depth, a.title
+    LIMIT :limit
+""").bindparams(bindparam("types", expanding=True))
+
+# An ADR's supersedes links point at older decisions, so newer ones are found through incoming links
+_SUPERSESSION_SQL = text("""
+    WITH RECURSIVE newer(adr_id, position) AS (
+        SELECT CAST(:root AS VARCHAR(100)), 0
+        UNION
+        SELECT l.source_adr_id, n.position + 1
+        FROM newer n
+        JOIN adr_links l ON l.target_adr_id = n.adr_id AND l.link_type = 'supersedes'
+        WHERE n.position < :max_depth
+    ), older(adr_id, position) AS (
+        SELECT CAST(:root AS VARCHAR(100)), 0
+        UNION
+        SELECT l.target_adr_id, o.position - 1
+        FROM older o
+        JOIN adr_links l ON l.source_adr_id = o.adr_id AND l.link_type = 'supersedes'
+        WHERE o.position > -:max_depth
+    ), chain(adr_id, position) AS (
+        SELECT adr_id, MIN(position) FROM newer GROUP BY adr_id
+        UNION ALL
+        SELECT adr_id, MAX(position) FROM older
+        WHERE position < 0 AND adr_id NOT IN (SELECT adr_id FROM newer)
+        GROUP BY adr_id
+    )
+    SELECT a.adr_id, a.title, a.status, c.position,
+           NOT EXISTS (
+               SELECT 1 FROM adr_links s JOIN adrs successor ON successor.adr_id = s.source_adr_id
+               WHERE s.target_adr_id = a.adr_id AND s.link_type = 'supersedes'
+           ) AS is_current
+    FROM chain c
+    JOIN adrs a ON a.adr_id = c.adr_id
+    ORDER BY c.position, a.title
+""")
+
+
+@traced_service
 class ADRDatabaseService:
     """Service for ADR database operations"""
 
-    def list_all(self, db: Session) -> List[DBModel_ADR]:
-        """List all ADRs"""
-        return db.query(DBModel_ADR).order_by(DBModel_ADR.created_at.desc()).all()
+    def list_all(self, db: Session, options: Optional[List] = None) -> List[DBModel_ADR]:
+        """List all ADRs, loaded with the given loader options (see fieldsets.py)"""
+        return db.query(DBModel_ADR).options(*(options or [])).order_by(DBModel_ADR.created_at.desc()).all()
 
     def get(self, db: Session, adr_id: str) -> Optional[DBModel_ADR]:
         """Get ADR by ID"""
         return db.query(DBModel_ADR).filter(DBModel_ADR.adr_id == adr_id).first()
 
+    def get_many(self, db: Session, ids: List[str],
+                 options: Optional[List] = None) -> Tuple[List[DBModel_ADR], List[str]]:
+        """ADRs by ID in request order, and the IDs not found"""
+        return multiget.get_many(db, DBModel_ADR, "adr_id", ids, options)
+
     def create(self, db: Session, adr_create: ADRCreate) -> DBModel_ADR:
         """Create a new ADR"""
         # Generate ADR ID from date and title
@@ -39,6 +120,8 @@ class ADRDatabaseService:
             consequences=adr_create.consequences,
             stakeholders=adr_create.stakeholders,
             related_adrs=adr_create.related_adrs,
+            supersedes=adr_create.supersedes,
+            amends=adr_create.amends,
             status=adr_create.status.value
         )
         db.add(adr)
@@ -46,11 +129,13 @@ class ADRDatabaseService:
         db.refresh(adr)
         return adr
 
-    def update(self, db: Session, adr_id: str, adr_update: ADRUpdate) -> Optional[DBModel_ADR]:
+    def update(self, db: Session, adr_id: str, adr_update: ADRUpdate,
+               expected_version: Optional[int] = None) -> Optional[DBModel_ADR]:
         """Update an ADR"""
         adr = self.get(db, adr_id)
         if not adr:
             return None
+        check_version(adr, expected_version)
 
         update_data = adr_update.dict(exclude_unset=True)
 
@@ -70,14 +155,156 @@ class ADRDatabaseService:
         db.refresh(adr)
         return adr
 
-    def delete(self, db: Session, adr_id: str) -> bool:
+    def delete(self, db: Session, adr_id: str, expected_version: Optional[int] = None) -> bool:
         """Delete an ADR"""
         adr = self.get(db, adr_id)
         if not adr:
             return False
+        check_version(adr, expected_version)
         db.delete(adr)
         db.commit()
         return True
 
+    def bundle(self, db: Session, adr_id: str) -> Optional[Dict]:
+        """
+        An ADR with its linked tech debt, the ADRs it lists and the ADRs
+        listing it - three queries however many there are of each
+        """
+        adr = self.get(db, adr_id)
+        if not adr:
+            return None
+        # linked_adr resolves from the identity map, so converting the items needs no further queries
+        tech_debt = (
+            db.query(TechDebt)
+            .filter(TechDebt.linked_adr_id == adr.id)
+            .order_by(PRIORITY_ORDER, TechDebt.created_at.desc())
+            .all()
+        )
+        related_ids = list(dict.fromkeys(adr.related_adrs or []))
+        # Both directions in one pass; ADRs listing this one come from the indexed adr_links
+        references = DBModel_ADR.adr_id.in_(
+            db.query(ADRLink.source_adr_id)
+            .filter(ADRLink.target_adr_id == adr.adr_id, ADRLink.link_type == "relates")
+            .scalar_subquery()
+        )
+        links = (
+            db.query(DBModel_ADR.adr_id, DBModel_ADR.title, DBModel_ADR.status,
+                     references.label("references_adr"))
+            .filter(DBModel_ADR.id != adr.id, or_(DBModel_ADR.adr_id.in_(related_ids), references))
+            .order_by(DBModel_ADR.created_at.desc())
+            .all()
+        )
+        found = {link.adr_id: link for link in links}
+        return {
+            "adr": adr,
+            "tech_debt": tech_debt,
+            "related_adrs": [found[related_id] for related_id in related_ids if related_id in found],
+            "referenced_by": [link for link in links if link.references_adr]
+        }
+
+    def neighborhood(self, db: Session, adr_id: str, depth: int,
+                     link_types: Tuple[str, ...] = LINK_TYPES) -> Optional[Dict]:
+        """
+        ADRs within depth links of an ADR, following links in either
+        direction, and the links between them; None if the ADR does not exist
+        """
+        return _graph_cache.get(db, ("neighborhood", adr_id, depth, link_types),
+                                lambda: self._neighborhood(db, adr_id, depth, link_types))
+
+    def _neighborhood(self, db: Session, adr_id: str, depth: int, link_types: Tuple[str, ...]) -> Optional[Dict]:
+        rows = db.execute(_NEIGHBORHOOD_SQL, {
+            "root": adr_id, "types": list(link_types), "depth": depth, "limit": MAX_GRAPH_NODES + 1
+        }).all()
+        if not rows:
+            return None
+        nodes = [{"id": row.adr_id, "title": row.title, "status": row.status, "depth": row.depth}
+                 for row in rows[:MAX_GRAPH_NODES]]
+        ids = [node["id"] for node in nodes]
+        edges = (
+            db.query(ADRLink.source_adr_id, ADRLink.target_adr_id, ADRLink.link_type)
+            .filter(ADRLink.link_type.in_(link_types),
+                    ADRLink.source_adr_id.in_(ids),
+                    ADRLink.target_adr_id.in_(ids))
+            .order_by(ADRLink.source_adr_id, ADRLink.link_type, ADRLink.target_adr_id)
+            .all()
+        )
+        return {
+            "root": adr_id,
+            "depth": depth,
+            "nodes": nodes,
+            "edges": [{"source": edge.source_adr_id, "target": edge.target_adr_id, "type": edge.link_type}
+                      for edge in edges],
+            "truncated": len(rows) > MAX_GRAPH_NODES
+        }
+
+    def supersession(self, db: Session, adr_id: str, max_depth: int = MAX_CHAIN_DEPTH) -> Optional[Dict]:
+        """
+        The chain of decisions an ADR belongs to through supersedes links,
+        oldest first, and the current decisions at its end; None if the ADR
+        does not exist
+        """
+        return _graph_cache.get(db, ("supersession", adr_id, max_depth),
+                                lambda: self._supersession(db, adr_id, max_depth))
+
+    def _supersession(self, db: Session, adr_id: str, max_depth: int) -> Optional[Dict]:
+        rows = db.execute(_SUPERSESSION_SQL, {"root": adr_id, "max_depth": max_depth}).all()
+        if not rows:
+            return None
+        chain = [{"id": row.adr_id, "title": row.title, "status": row.status, "position": row.position}
+                 for row in rows]
+        return {
+            "adr_id": adr_id,
+            "chain": chain,
+            "current": [entry for entry, row in zip(chain, rows) if row.position >= 0 and row.is_current]
+        }
+
+
+def link_targets(adr: DBModel_ADR) -> Set[Tuple[str, str]]:
+    """(target ADR ID, link type) of every link an ADR's lists describe"""
+    targets = set()
+    for link_type, column in LINK_COLUMNS.items():
+        for target in getattr(adr, column) or []:
+            if target and target != adr.adr_id and len(target) <= 100:
+                targets.add((target, link_type))
+    return targets
+
+
+def track_adr_links(session_factory: sessionmaker):
+    """Keep adr_links in step with the ADR lists it is derived from, as part of the same flush"""
+    event.listen(session_factory, "before_flush", _sync_links)
+
+
+def _sync_links(session, flush_context, instances):
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, DBModel_ADR) and _links_changed(obj):
+                wanted = link_targets(obj)
+                # Keep unchanged rows rather than deleting and reinserting the same primary keys
+                kept = [link for link in obj.links if (link.target_adr_id, link.link_type) in wanted]
+                existing = {(link.target_adr_id, link.link_type) for link in kept}
+                obj.links = kept + [ADRLink(target_adr_id=target, link_type=link_type)
+                                    for target, link_type in sorted(wanted - existing)]
+
+
+def _links_changed(adr: DBModel_ADR) -> bool:
+    state = inspect(adr)
+    return state.pending or any(state.attrs[column].history.has_changes() for column in LINK_COLUMNS.values())
+
+
+def backfill_adr_links(connection: Connection) -> int:
+    """Derive missing adr_links of ADRs written without the ORM (COPY loads, rows from before the table existed)"""
+    return connection.execute(text("""
+        INSERT INTO adr_links (source_adr_id, target_adr_id, link_type)
+        SELECT DISTINCT a.adr_id, t.target, l.link_type
+        FROM adrs a
+        CROSS JOIN LATERAL (VALUES ('relates', a.related_adrs), ('supersedes', a.supersedes), ('amends', a.amends))
+            AS l(link_type, targets)
+        CROSS JOIN LATERAL json_array_elements_text(COALESCE(l.targets, '[]'::json)) AS t(target)
+        WHERE t.target <> '' AND t.target <> a.adr_id AND length(t.target) <= 100
+        ON CONFLICT DO NOTHING
+    """)).rowcount
+
+
+track_adr_links(SessionLocal)
 
 adr_db_service = ADRDatabaseService()
@@ -0,0 +1,145 @@
+"""
+Archive service: moving cold rows out of the hot tables, and back
+
+Retired business apps and resolved or won't-fix tech debt that have not
+changed for a while are moved to business_apps_archive and tech_debt_archive
+(copies of the hot tables, see db_models.archive_table), so the lists, counts
+and dashboard queries reading the hot tables never scan them. Each batch is
+one statement - a DELETE ... RETURNING feeding an INSERT - so a row is always
+in exactly one of the two tables; rows locked by a concurrent edit are left
+for the next run. Rows keep their id and public ID, and archived tech debt
+keeps its foreign key to the ADR, so links resolve either way.
+
+The moves are raw SQL, so each names both tables to write_tracking before
+committing: the caches built on them are cleared and the analytics cubes
+refreshed as for any ORM write.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import uuid
+from sqlalchemy import Table, bindparam, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from db_models import BusinessApp, BusinessAppArchive, TechDebt, TechDebtArchive
+from services.db_geo_service import locate_business_app
+from services.db_tech_debt_trend_service import CLOSED_STATUSES
+from tracing import traced_service
+from write_tracking import note_writes
+
+
+@dataclass(frozen=True)
+class ArchiveTier:
+    hot: Table
+    archive: Table
+    key: str  # Public ID column
+    statuses: Tuple[str, ...]  # Rows in these statuses are archived once unchanged long enough
+
+    def archive_sql(self):
+        columns = ", ".join(column.name for column in self.hot.columns)
+        return text(f"""
+            WITH moved AS (
+                DELETE FROM {self.hot.name}
+                WHERE id IN (
+                    SELECT id FROM {self.hot.name}
+                    WHERE status IN :statuses AND updated_at < :cutoff
+                    ORDER BY id
+                    LIMIT :batch_size
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {columns}
+            )
+            INSERT INTO {self.archive.name} ({columns}, archived_at)
+            SELECT {columns}, :now FROM moved
+        """).bindparams(bindparam("statuses", expanding=True))
+
+    def restore_sql(self):
+        # Restoring counts as a change: a new version, and a fresh start for the age cutoff
+        names = [column.name for column in self.hot.columns]
+        values = [{"updated_at": ":now", "lock_version": "lock_version + 1"}.get(name, name) for name in names]
+        return text(f"""
+            WITH moved AS (
+                DELETE FROM {self.archive.name} WHERE {self.key} = :key RETURNING {", ".join(names)}
+            )
+            INSERT INTO {self.hot.name} ({", ".join(names)})
+            SELECT {", ".join(values)} FROM moved
+        """)
+
+
+# Keyed by the analytics cube built on each hot table
+TIERS: Dict[str, ArchiveTier] = {
+    "business_apps": ArchiveTier(BusinessApp.__table__, BusinessAppArchive.__table__, "app_id", ("retired",)),
+    "tech_debt": ArchiveTier(TechDebt.__table__, TechDebtArchive.__table__, "debt_id", CLOSED_STATUSES)
+}
+
+
+class RestoreConflict(Exception):
+    """An archived row cannot go back because a hot row has taken its public ID"""
+
+
+@traced_service
+class ArchiveDatabaseService:
+    """Service for archiving and restoring business apps and tech debt"""
+
+    def archive(self, db: Session, older_than_days: Dict[str, int], batch_size: int) -> Dict[str, int]:
+        """
+        Move the rows of each tier unchanged for more than its number of days
+        (0 skips the tier), batch_size per transaction; returns the rows moved
+        """
+        now = datetime.utcnow()
+        moved = {}
+        for name, days in older_than_days.items():
+            if days <= 0:
+                continue
+            tier = TIERS[name]
+            params = {"statuses": list(tier.statuses), "cutoff": now - timedelta(days=days),
+                      "batch_size": batch_size, "now": now}
+            moved[name] = 0
+            while True:
+                count = db.execute(tier.archive_sql(), params).rowcount
+                if count:
+                    note_writes(db, tier.hot.name, tier.archive.name)
+                db.commit()
+                moved[name] += count
+                if count < batch_size:
+                    break
+            if moved[name]:
+                print(f"🗄️  Archived {moved[name]} {name} row(s)")
+        return moved
+
+    def restore_business_app(self, db: Session, app_id: str) -> Optional[BusinessApp]:
+        """Move an archived business app back to business_apps; None if it is not archived"""
+        try:
+            uuid_obj = uuid.UUID(app_id)
+        except ValueError:
+            return None
+        if not self._restore(db, "business_apps", str(uuid_obj)):
+            return None
+        app = db.query(BusinessApp).filter(BusinessApp.app_id == uuid_obj).first()
+        # Its geocoded locations were dropped with the hot row
+        locate_business_app(app)
+        db.commit()
+        db.refresh(app)
+        return app
+
+    def restore_tech_debt(self, db: Session, debt_id: str) -> Optional[TechDebt]:
+        """Move an archived tech debt item back to tech_debt; None if it is not archived"""
+        if not self._restore(db, "tech_debt", debt_id):
+            return None
+        db.commit()
+        return db.query(TechDebt).filter(TechDebt.debt_id == debt_id).first()
+
+    def _restore(self, db: Session, name: str, key: str) -> bool:
+        """Move one row back within the current transaction"""
+        tier = TIERS[name]
+        try:
+            restored = bool(db.execute(tier.restore_sql(), {"key": key, "now": datetime.utcnow()}).rowcount)
+        except IntegrityError:
+            db.rollback()
+            raise RestoreConflict(f"{key} is in use by another item")
+        if restored:
+            note_writes(db, tier.hot.name, tier.archive.name)
+        return restored
+
+
+archive_db_service = ArchiveDatabaseService()
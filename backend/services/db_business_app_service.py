@@ -1,18 +1,41 @@
 """Business App service with database operations"""
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import cast, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
-from db_models import BusinessApp as DBModel_BusinessApp, Product
+from db_models import BusinessApp as DBModel_BusinessApp, BusinessAppArchive, Product
 from models import BusinessAppCreate, BusinessAppUpdate
+import multiget
+from tracing import traced_service
+from versioning import check_version
 
 
+@traced_service
 class BusinessAppDatabaseService:
     """Service for Business App database operations"""
 
-    def list_all(self, db: Session) -> List[DBModel_BusinessApp]:
-        """List all business apps"""
-        return db.query(DBModel_BusinessApp).order_by(DBModel_BusinessApp.name).all()
+    def list_all(self, db: Session, options: Optional[List] = None, include_archived: bool = False,
+                 archived_options: Optional[List] = None) -> List:
+        """
+        List all business apps, loaded with the given loader options (default:
+        with their product), followed by the archived ones if asked for
+        """
+        apps = (
+            db.query(DBModel_BusinessApp)
+            .options(*(options or [joinedload(DBModel_BusinessApp.product)]))
+            .order_by(DBModel_BusinessApp.name)
+            .all()
+        )
+        if include_archived:
+            apps += (
+                db.query(BusinessAppArchive)
+                .options(*(archived_options or [joinedload(BusinessAppArchive.product)]))
+                .order_by(BusinessAppArchive.name)
+                .all()
+            )
+        return apps
 
     def get(self, db: Session, app_id: str) -> Optional[DBModel_BusinessApp]:
         """Get business app by ID"""
@@ -22,6 +45,25 @@ class BusinessAppDatabaseService:
             return None
         return db.query(DBModel_BusinessApp).filter(DBModel_BusinessApp.app_id == uuid_obj).first()
 
+    def get_archived(self, db: Session, app_id: str) -> Optional[BusinessAppArchive]:
+        """Get an archived business app by ID"""
+        try:
+            uuid_obj = uuid.UUID(app_id)
+        except ValueError:
+            return None
+        return db.query(BusinessAppArchive).filter(BusinessAppArchive.app_id == uuid_obj).first()
+
+    def get_many(self, db: Session, ids: List[str], options: Optional[List] = None, include_archived: bool = False,
+                 archived_options: Optional[List] = None) -> Tuple[List, List[str]]:
+        """
+        Business apps by ID in request order, and the IDs not found (default:
+        with their product), looking in the archive too if asked for
+        """
+        return multiget.get_many(db, DBModel_BusinessApp, "app_id", ids,
+                                 options or [joinedload(DBModel_BusinessApp.product)],
+                                 BusinessAppArchive if include_archived else None,
+                                 archived_options or [joinedload(BusinessAppArchive.product)])
+
     def create(self, db: Session, app_create: BusinessAppCreate) -> DBModel_BusinessApp:
         """Create a new business app"""
         # app_id will be auto-generated as UUID by the database
@@ -61,11 +103,13 @@ class BusinessAppDatabaseService:
         db.refresh(app)
         return app
 
-    def update(self, db: Session, app_id: str, app_update: BusinessAppUpdate) -> Optional[DBModel_BusinessApp]:
+    def update(self, db: Session, app_id: str, app_update: BusinessAppUpdate,
+               expected_version: Optional[int] = None) -> Optional[DBModel_BusinessApp]:
         """Update a business app"""
         app = self.get(db, app_id)
         if not app:
             return None
+        check_version(app, expected_version)
 
         update_data = app_update.dict(exclude_unset=True)
 
@@ -103,7 +147,7 @@ class BusinessAppDatabaseService:
         db.refresh(app)
         return app
 
-    def delete(self, db: Session, app_id: str) -> bool:
+    def delete(self, db: Session, app_id: str, expected_version: Optional[int] = None) -> bool:
         """Delete a business app"""
         try:
             uuid_obj = uuid.UUID(app_id)
@@ -112,9 +156,61 @@ class BusinessAppDatabaseService:
         app = db.query(DBModel_BusinessApp).filter(DBModel_BusinessApp.app_id == uuid_obj).first()
         if not app:
             return False
+        check_version(app, expected_version)
         db.delete(app)
         db.commit()
         return True
 
+    def bundle(self, db: Session, app_id: str) -> Optional[Dict]:
+        """
+        A business app (archived or not) with its product and supplier,
+        geocoded locations, the apps it depends on and the apps depending on
+        it - three queries, four for an archived app
+        """
+        try:
+            uuid_obj = uuid.UUID(app_id)
+        except ValueError:
+            return None
+        app = (
+            db.query(DBModel_BusinessApp)
+            .options(joinedload(DBModel_BusinessApp.product).joinedload(Product.supplier),
+                     selectinload(DBModel_BusinessApp.locations))
+            .filter(DBModel_BusinessApp.app_id == uuid_obj)
+            .first()
+        )
+        if not app:
+            # Archived apps keep their product and dependencies, but not their geocoded locations
+            app = (
+                db.query(BusinessAppArchive)
+                .options(joinedload(BusinessAppArchive.product).joinedload(Product.supplier))
+                .filter(BusinessAppArchive.app_id == uuid_obj)
+                .first()
+            )
+        if not app:
+            return None
+
+        dependency_ids = []
+        for dependency in dict.fromkeys(app.dependencies or []):
+            try:
+                dependency_ids.append(uuid.UUID(str(dependency)))
+            except ValueError:
+                continue  # Free-text dependency that names no app
+        # Both directions in one pass; dependencies is json, so the containment test goes through jsonb (GIN-indexed)
+        depends_on_app = cast(DBModel_BusinessApp.dependencies, JSONB).contains([str(app.app_id)])
+        links = (
+            db.query(DBModel_BusinessApp.app_id, DBModel_BusinessApp.name, DBModel_BusinessApp.status,
+                     depends_on_app.label("depends_on_app"))
+            .filter(DBModel_BusinessApp.id != app.id,
+                    or_(DBModel_BusinessApp.app_id.in_(dependency_ids), depends_on_app))
+            .order_by(DBModel_BusinessApp.name)
+            .all()
+        )
+        found = {link.app_id: link for link in links}
+        return {
+            "app": app,
+            "dependencies": [found[dependency_id] for dependency_id in dependency_ids if dependency_id in found],
+            "dependents": [link for link in links if link.depends_on_app]
+        }
+
 
 business_app_db_service = BusinessAppDatabaseService()
@@ -0,0 +1,268 @@
+"""
+Duplicate service: near-duplicate suppliers, products and business apps, and merging them
+
+The report compares the names of every item of a type (see dedup.py for the
+measures, and the blocking that keeps 100k names to seconds) reading only
+(id, name) rows, then loads the details it shows for the clustered items
+alone. Products are only compared with the other products of their supplier.
+Before a supplier or business app is created, its name is compared with the
+few existing names a LIKE on its word fragments finds.
+
+Merging folds duplicates into the item kept, in one transaction: the rows
+referencing them (products of a supplier, apps using a product, apps listing
+an app among their dependencies) are repointed with one bulk UPDATE per
+table, each bumping lock_version like any edit, and the duplicates deleted.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import cast, func, or_, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+import dedup
+import multiget
+from cache import WriteInvalidatedCache
+from config import settings
+from db_models import BusinessApp, BusinessAppArchive, Product, Supplier
+from tracing import traced_service
+from versioning import check_version
+
+
+@dataclass(frozen=True)
+class DedupTarget:
+    entity: Any  # ORM class
+    key: str  # Public ID column
+    group: Optional[str] = None  # Names are only compared within the same value of this column
+    filled: Tuple[str, ...] = ()  # Optional columns a merge copies from the duplicates where the item kept has none
+
+
+TARGETS: Dict[str, DedupTarget] = {
+    "suppliers": DedupTarget(Supplier, "supplier_id",
+                             filled=("description", "website", "contact_email", "contact_phone", "address")),
+    "products": DedupTarget(Product, "product_id", group="supplier_id",
+                            filled=("description", "version", "product_url", "support_url", "license_type")),
+    "business-apps": DedupTarget(BusinessApp, "app_id")
+}
+MAX_CANDIDATES = 2000  # Existing names a pre-create check compares at most
+
+# Clusters per (type, threshold); the comparing is the expensive part, the details are read per request
+_report_cache = WriteInvalidatedCache("duplicates", ("suppliers", "products", "business_apps"),
+                                      ttl_seconds=settings.duplicate_report_cache_seconds)
+
+
+class DuplicatesNotFound(Exception):
+    """Some of the duplicates to merge do not exist"""
+
+    def __init__(self, ids: List[str]):
+        super().__init__(f"Not found: {', '.join(ids)}")
+        self.ids = ids
+
+
+class InvalidMerge(Exception):
+    """The duplicates cannot be folded into the item kept"""
+
+
+@traced_service
+class DedupDatabaseService:
+    """Service for finding and merging near-duplicate items"""
+
+    def report(self, db: Session, entity_type: str, threshold: float, limit: int) -> Dict:
+        """
+        The largest clusters of near-duplicate items of a type, each member
+        with its details (oldest first, the natural one to keep), and how
+        many clusters there are in all
+        """
+        clusters, compared, comparisons = _report_cache.get(
+            db, (entity_type, threshold), lambda: self._clusters(db, entity_type, threshold))
+        shown = clusters[:limit]
+        details = self._details(db, entity_type, [member for cluster in shown for member in cluster.members])
+        entries = []
+        for cluster in shown:
+            # Items deleted since the clusters were computed are left out
+            members = [details[member] for member in cluster.members if member in details]
+            if len(members) > 1:
+                entries.append({"score": cluster.score, "members": members})
+        return {
+            "entity_type": entity_type,
+            "threshold": threshold,
+            "compared": compared,
+            "comparisons": comparisons,
+            "total_clusters": len(clusters),
+            "clusters": entries
+        }
+
+    def similar(self, db: Session, entity_type: str, name: str, threshold: float, limit: int,
+                group_value: Any = None) -> List[Dict]:
+        """Existing items with names at least threshold similar to a name, most similar first"""
+        target = TARGETS[entity_type]
+        entity = target.entity
+        fragments = dedup.search_fragments(name)
+        if not fragments:
+            return []
+        # Fragments are lower-case letters and digits, nothing LIKE treats specially
+        query = db.query(entity.id, entity.name).filter(
+            or_(*(func.lower(entity.name).like(f"%{fragment}%") for fragment in fragments)))
+        if target.group:
+            query = query.filter(getattr(entity, target.group) == group_value)
+        matches = dedup.best_matches(name, query.limit(MAX_CANDIDATES).all(), threshold, limit)
+        details = self._details(db, entity_type, [key for key, _ in matches])
+        return [{**details[key], "similarity": score} for key, score in matches if key in details]
+
+    def merge(self, db: Session, entity_type: str, keep_id: str, duplicate_ids: List[str],
+              expected_version: Optional[int] = None) -> Optional[Tuple[Any, Dict[str, int]]]:
+        """
+        Fold duplicates into the item kept: what referenced them references it,
+        its empty optional fields take their values, and they are deleted.
+        Returns the item kept and the references moved per table, None if it
+        does not exist; raises DuplicatesNotFound for missing duplicates and
+        InvalidMerge for the item itself or products of another supplier
+        """
+        target = TARGETS[entity_type]
+        found, _ = multiget.get_many(db, target.entity, target.key, [keep_id])
+        if not found:
+            return None
+        keep = found[0]
+        check_version(keep, expected_version)
+        duplicates, missing = multiget.get_many(db, target.entity, target.key, duplicate_ids)
+        if missing:
+            raise DuplicatesNotFound(missing)
+        # IDs are compared once resolved: the same UUID may be spelled differently
+        if keep.id in {dup.id for dup in duplicates}:
+            raise InvalidMerge("An item cannot be merged into itself")
+        if target.group and any(getattr(dup, target.group) != getattr(keep, target.group) for dup in duplicates):
+            # Only compared (and reported) within one group, e.g. the products of one supplier
+            raise InvalidMerge(f"Only {entity_type} with the same {target.group.removesuffix('_id')} can be merged")
+
+        now = datetime.utcnow()
+        for column in target.filled:
+            if not getattr(keep, column):
+                setattr(keep, column, next((getattr(dup, column) for dup in duplicates if getattr(dup, column)), None))
+        keep.updated_at = now  # A new version even if nothing was filled in: more now refers to it
+        # Written before the bulk updates, whose expire_all below would otherwise discard it (no autoflush)
+        db.flush()
+        moved = _MOVES[entity_type](db, keep, duplicates, now)
+        # Reload what the bulk updates changed, so deleting the duplicates cascades to nothing moved away
+        db.expire_all()
+        for duplicate in duplicates:
+            db.delete(duplicate)
+        db.commit()
+        db.refresh(keep)
+        print(f"🔗 Merged {len(duplicates)} {entity_type} into {keep_id} ({moved})")
+        return keep, moved
+
+    def _clusters(self, db: Session, entity_type: str, threshold: float) -> Tuple[List[dedup.Cluster], int, int]:
+        """Clusters of internal IDs, with the number of items and of name comparisons"""
+        target = TARGETS[entity_type]
+        entity = target.entity
+        group = getattr(entity, target.group) if target.group else None
+        groups: Dict[Any, List[Tuple[int, str]]] = {}
+        # By id, so the oldest item of a cluster comes first
+        for row in db.query(entity.id, entity.name, *([group] if group is not None else [])).order_by(entity.id):
+            groups.setdefault(row[2] if group is not None else None, []).append((row.id, row.name))
+        clusters: List[dedup.Cluster] = []
+        comparisons = 0
+        for records in groups.values():
+            found, compared = dedup.find_clusters(records, threshold)
+            clusters.extend(found)
+            comparisons += compared
+        clusters.sort(key=lambda cluster: (-len(cluster.members), -cluster.score))
+        return clusters, sum(map(len, groups.values())), comparisons
+
+    def _details(self, db: Session, entity_type: str, ids: List[int]) -> Dict[int, Dict]:
+        """What a report shows of each item, by internal ID"""
+        if not ids:
+            return {}
+        if entity_type == "suppliers":
+            rows = (
+                db.query(Supplier.id, Supplier.supplier_id, Supplier.name, Supplier.lock_version,
+                         func.count(Product.id).label("product_count"))
+                .outerjoin(Product, Product.supplier_id == Supplier.id)
+                .filter(Supplier.id.in_(ids))
+                .group_by(Supplier.id)
+            )
+            return {row.id: {"id": str(row.supplier_id), "name": row.name, "lock_version": row.lock_version,
+                             "product_count": row.product_count} for row in rows}
+        if entity_type == "products":
+            rows = (
+                db.query(Product.id, Product.product_id, Product.name, Product.version, Product.lock_version,
+                         Supplier.supplier_id, Supplier.name.label("supplier_name"),
+                         func.count(BusinessApp.id).label("business_app_count"))
+                .join(Supplier, Product.supplier_id == Supplier.id)
+                .outerjoin(BusinessApp, BusinessApp.product_id == Product.id)
+                .filter(Product.id.in_(ids))
+                .group_by(Product.id, Supplier.id)
+            )
+            return {row.id: {"id": str(row.product_id), "name": row.name, "version": row.version,
+                             "lock_version": row.lock_version, "supplier_id": str(row.supplier_id),
+                             "supplier_name": row.supplier_name, "business_app_count": row.business_app_count}
+                    for row in rows}
+        rows = (
+            db.query(BusinessApp.id, BusinessApp.app_id, BusinessApp.name, BusinessApp.status,
+                     BusinessApp.architectural_owner, BusinessApp.lock_version)
+            .filter(BusinessApp.id.in_(ids))
+        )
+        return {row.id: {"id": str(row.app_id), "name": row.name, "status": row.status,
+                         "architectural_owner": row.architectural_owner, "lock_version": row.lock_version}
+                for row in rows}
+
+
+def _move_products(db: Session, keep: Supplier, duplicates: List[Supplier], now: datetime) -> Dict[str, int]:
+    moved = db.query(Product).filter(Product.supplier_id.in_([dup.id for dup in duplicates])).update(
+        {Product.supplier_id: keep.id, Product.lock_version: Product.lock_version + 1, Product.updated_at: now},
+        synchronize_session=False)
+    return {"products": moved}
+
+
+def _move_business_apps(db: Session, keep: Product, duplicates: List[Product], now: datetime) -> Dict[str, int]:
+    ids = [dup.id for dup in duplicates]
+    moved = db.query(BusinessApp).filter(BusinessApp.product_id.in_(ids)).update(
+        {BusinessApp.product_id: keep.id, BusinessApp.lock_version: BusinessApp.lock_version + 1,
+         BusinessApp.updated_at: now},
+        synchronize_session=False)
+    # Archived apps keep their product (and their last version, restoring bumps it)
+    archived = db.query(BusinessAppArchive).filter(BusinessAppArchive.product_id.in_(ids)).update(
+        {BusinessAppArchive.product_id: keep.id}, synchronize_session=False)
+    return {"business_apps": moved, "business_apps_archive": archived}
+
+
+def _move_dependencies(db: Session, keep: BusinessApp, duplicates: List[BusinessApp], now: datetime) -> Dict[str, int]:
+    replaced = {str(dup.app_id) for dup in duplicates}
+    kept = str(keep.app_id)
+    keep.dependencies = _replace_dependencies(
+        [*(keep.dependencies or []), *(dependency for dup in duplicates for dependency in dup.dependencies or [])],
+        replaced, kept, kept)
+    db.flush()
+    skipped = {keep.id, *(dup.id for dup in duplicates)}
+    moved = {}
+    for entity in (BusinessApp, BusinessAppArchive):
+        # dependencies is json, so the containment test goes through jsonb (GIN-indexed on both tables)
+        listing = or_(*(cast(entity.dependencies, JSONB).contains([app_id]) for app_id in replaced))
+        rows = [row for row in db.query(entity.id, entity.app_id, entity.dependencies, entity.lock_version)
+                .filter(listing) if row.id not in skipped]
+        if not rows:
+            moved[entity.__tablename__] = 0
+            continue
+        values = [{"id": row.id, "dependencies": _replace_dependencies(row.dependencies, replaced, kept,
+                                                                       str(row.app_id))} for row in rows]
+        if entity is BusinessApp:
+            # The version read is checked and bumped per row, so a concurrent edit fails the merge
+            for value, row in zip(values, rows):
+                value.update(lock_version=row.lock_version, updated_at=now)
+        db.execute(update(entity), values)
+        moved[entity.__tablename__] = len(rows)
+    return moved
+
+
+def _replace_dependencies(dependencies: List[str], replaced: set, kept: str, own_id: str) -> List[str]:
+    """The dependencies naming the app kept instead of its duplicates, once each, without the app itself"""
+    renamed = (kept if dependency in replaced else dependency for dependency in dependencies or [])
+    return [dependency for dependency in dict.fromkeys(renamed) if dependency != own_id]
+
+
+_MOVES = {
+    "suppliers": _move_products,
+    "products": _move_business_apps,
+    "business-apps": _move_dependencies
+}
+
+dedup_db_service = DedupDatabaseService()
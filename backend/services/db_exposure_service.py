@@ -0,0 +1,113 @@
+"""Supplier and product exposure: how many business apps depend on each supplier's products"""
+from typing import Dict, List, Optional
+from sqlalchemy import String, cast, func
+from sqlalchemy.orm import Session
+from cache import WriteInvalidatedCache
+from config import settings
+from db_models import BusinessApp, Product, Supplier
+from tracing import traced_service
+
+EXPOSURE_DIMENSIONS = ("status", "resilience_category", "hosting_type")
+NONE_KEY = "none"  # Breakdown key for apps without a value
+
+# App counts per supplier, product and dimension values; cleared by writes to the joined tables
+_exposure_cache = WriteInvalidatedCache("exposure", ("business_apps", "products", "suppliers"),
+                                        ttl_seconds=settings.exposure_cache_seconds)
+
+
+@traced_service
+class ExposureDatabaseService:
+    """Service for supplier/product exposure roll-ups"""
+
+    def suppliers(self, db: Session, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """Every supplier with its app count and breakdowns, most exposed first"""
+        entries: Dict[str, Dict] = {}
+        product_ids: Dict[str, set] = {}
+        for row in self._rows(db):
+            entry = entries.setdefault(row.supplier_id, _new_entry(row.supplier_id, row.supplier_name))
+            if row.product_id:
+                product_ids.setdefault(row.supplier_id, set()).add(row.product_id)
+            _add(entry, row, filters)
+        for supplier_id, entry in entries.items():
+            entry["product_count"] = len(product_ids.get(supplier_id, ()))
+        return _most_exposed(entries)
+
+    def supplier(self, db: Session, supplier_id: str, filters: Optional[Dict[str, List[str]]] = None) -> Optional[Dict]:
+        """One supplier's app count and breakdowns, with the same per product"""
+        rows = [row for row in self._rows(db) if row.supplier_id == supplier_id]
+        if not rows:
+            return None
+        entry = _new_entry(supplier_id, rows[0].supplier_name)
+        products: Dict[str, Dict] = {}
+        for row in rows:
+            _add(entry, row, filters)
+            if row.product_id:
+                _add(products.setdefault(row.product_id, _new_entry(row.product_id, row.product_name)), row, filters)
+        entry["product_count"] = len(products)
+        entry["products"] = _most_exposed(products)
+        return entry
+
+    def products(self, db: Session, supplier_id: Optional[str] = None,
+                 filters: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """Every product (optionally of one supplier) with its app count and breakdowns, most exposed first"""
+        entries: Dict[str, Dict] = {}
+        for row in self._rows(db):
+            if not row.product_id or (supplier_id and row.supplier_id != supplier_id):
+                continue
+            entry = entries.setdefault(row.product_id, {
+                **_new_entry(row.product_id, row.product_name),
+                "supplier_id": row.supplier_id,
+                "supplier_name": row.supplier_name
+            })
+            _add(entry, row, filters)
+        return _most_exposed(entries)
+
+    def _rows(self, db: Session) -> List:
+        return _exposure_cache.get(db, "rows", lambda: self._load_rows(db))
+
+    def _load_rows(self, db: Session) -> List:
+        # One grouped pass over suppliers -> products -> apps (joined on the indexed foreign keys);
+        # the outer joins keep suppliers without products and products without apps at zero
+        return (
+            db.query(
+                cast(Supplier.supplier_id, String).label("supplier_id"),
+                Supplier.name.label("supplier_name"),
+                cast(Product.product_id, String).label("product_id"),
+                Product.name.label("product_name"),
+                BusinessApp.status,
+                BusinessApp.resilience_category,
+                BusinessApp.hosting_type,
+                func.count(BusinessApp.id).label("count")
+            )
+            .select_from(Supplier)
+            .outerjoin(Product, Product.supplier_id == Supplier.id)
+            .outerjoin(BusinessApp, BusinessApp.product_id == Product.id)
+            .group_by(Supplier.supplier_id, Supplier.name, Product.product_id, Product.name,
+                      BusinessApp.status, BusinessApp.resilience_category, BusinessApp.hosting_type)
+            .all()
+        )
+
+
+def _new_entry(entry_id: str, name: str) -> Dict:
+    return {"id": entry_id, "name": name, "app_count": 0, **{f"by_{dim}": {} for dim in EXPOSURE_DIMENSIONS}}
+
+
+def _add(entry: Dict, row, filters: Optional[Dict[str, List[str]]]):
+    """Count a row's apps into an entry unless a filter excludes them"""
+    if not row.count:
+        return
+    for dim, values in (filters or {}).items():
+        if (getattr(row, dim) or NONE_KEY) not in values:
+            return
+    entry["app_count"] += row.count
+    for dim in EXPOSURE_DIMENSIONS:
+        breakdown = entry[f"by_{dim}"]
+        key = getattr(row, dim) or NONE_KEY
+        breakdown[key] = breakdown.get(key, 0) + row.count
+
+
+def _most_exposed(entries: Dict[str, Dict]) -> List[Dict]:
+    return sorted(entries.values(), key=lambda entry: (-entry["app_count"], entry["name"].lower()))
+
+
+exposure_db_service = ExposureDatabaseService()
@@ -0,0 +1,182 @@
+"""Geo service: stored coordinates for suppliers and app locations, and clustered map queries"""
+import json
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, sessionmaker
+from database import SessionLocal
+from db_models import BusinessApp, BusinessAppLocation, Supplier
+from geocoding import geocode
+from tracing import traced_service
+
+# Markers closer than this on screen are merged into one cluster
+CLUSTER_RADIUS_PX = 60
+TILE_SIZE_PX = 256
+MAX_ZOOM = 18
+WORLD = (-180.0, -90.0, 180.0, 90.0)
+
+
+def parse_bbox(value: Optional[str]) -> Tuple[float, float, float, float]:
+    """'west,south,east,north' in degrees (Leaflet's toBBoxString order); the whole world if empty"""
+    if not value:
+        return WORLD
+    try:
+        west, south, east, north = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be west,south,east,north")
+    if not (-90 <= south <= north <= 90):
+        raise ValueError("bbox latitudes must satisfy -90 <= south <= north <= 90")
+    # Panning past the antimeridian gives longitudes outside -180..180
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180 if east != 180 else 180.0
+    return west, south, east, north
+
+
+def locate_supplier(supplier: Supplier):
+    place = geocode(supplier.address)
+    supplier.latitude = place.latitude if place else None
+    supplier.longitude = place.longitude if place else None
+
+
+def locate_business_app(app: BusinessApp):
+    locations = []
+    for location in dict.fromkeys(app.geographic_locations or []):
+        place = geocode(location)
+        if place:
+            locations.append(BusinessAppLocation(location=location[:255], place=place.name,
+                                                 latitude=place.latitude, longitude=place.longitude))
+    app.locations = locations
+
+
+@traced_service
+class GeoDatabaseService:
+    """Service for geocoded supplier and app location queries"""
+
+    def supplier_clusters(self, db: Session, bbox: Tuple[float, float, float, float], zoom: int) -> List[Dict]:
+        """Suppliers inside the box, merged into clusters where markers would overlap at this zoom"""
+        where, params = _bbox_filter("latitude", "longitude", bbox, zoom)
+        rows = db.execute(text(f"""
+            SELECT COUNT(*) AS count, AVG(latitude) AS latitude, AVG(longitude) AS longitude,
+                   (array_agg(name ORDER BY name))[1:5] AS names,
+                   MIN(supplier_id::text) AS id, MIN(address) AS address, MIN(website) AS website
+            FROM suppliers
+            WHERE {where}
+            GROUP BY floor(latitude / :cell), floor(longitude / :cell)
+        """), params).mappings().all()
+        points = []
+        for row in rows:
+            point = {"count": row["count"], "latitude": row["latitude"], "longitude": row["longitude"],
+                     "names": row["names"]}
+            if row["count"] == 1:
+                point.update(id=row["id"], name=row["names"][0], address=row["address"], website=row["website"])
+            points.append(point)
+        return points
+
+    def business_app_clusters(self, db: Session, bbox: Tuple[float, float, float, float], zoom: int) -> List[Dict]:
+        """Geocoded app locations inside the box, clustered like supplier_clusters()"""
+        where, params = _bbox_filter("l.latitude", "l.longitude", bbox, zoom)
+        rows = db.execute(text(f"""
+            SELECT COUNT(DISTINCT l.business_app_id) AS count, AVG(l.latitude) AS latitude,
+                   AVG(l.longitude) AS longitude, array_agg(DISTINCT l.place) AS places,
+                   (array_agg(DISTINCT a.name))[1:5] AS names, MIN(a.app_id::text) AS id
+            FROM business_app_locations l
+            JOIN business_apps a ON a.id = l.business_app_id
+            WHERE {where}
+            GROUP BY floor(l.latitude / :cell), floor(l.longitude / :cell)
+        """), params).mappings().all()
+        points = []
+        for row in rows:
+            point = {"count": row["count"], "latitude": row["latitude"], "longitude": row["longitude"],
+                     "places": row["places"], "names": row["names"]}
+            if row["count"] == 1:
+                point.update(id=row["id"], name=row["names"][0])
+            points.append(point)
+        return points
+
+    def backfill(self, db: Session, regeocode: bool = False) -> Dict[str, int]:
+        """
+        Geocode suppliers and apps written without the ORM (COPY loads, rows
+        from before geocoding existed). Each distinct address/location is
+        resolved once and applied with one set-based statement. With
+        regeocode, coordinates already stored are dropped first and every row
+        is resolved again, for when the gazetteer or the matching changed.
+        """
+        if regeocode:
+            db.execute(text("UPDATE suppliers SET latitude = NULL, longitude = NULL WHERE latitude IS NOT NULL"))
+            db.execute(text("DELETE FROM business_app_locations"))
+        addresses = db.execute(text(
+            "SELECT DISTINCT address FROM suppliers WHERE address IS NOT NULL AND latitude IS NULL"
+        )).scalars().all()
+        suppliers = db.execute(text("""
+            UPDATE suppliers s SET latitude = g.latitude, longitude = g.longitude
+            FROM json_to_recordset(CAST(:places AS json)) AS g(location text, place text, latitude float8, longitude float8)
+            WHERE s.address = g.location AND s.latitude IS NULL
+        """), {"places": _places_json(addresses)}).rowcount
+
+        locations = db.execute(text("""
+            SELECT DISTINCT loc.value
+            FROM business_apps a
+            CROSS JOIN LATERAL json_array_elements_text(COALESCE(a.geographic_locations, '[]'::json)) AS loc(value)
+            WHERE NOT EXISTS (SELECT 1 FROM business_app_locations l WHERE l.business_app_id = a.id)
+        """)).scalars().all()
+        app_locations = db.execute(text("""
+            INSERT INTO business_app_locations (business_app_id, location, place, latitude, longitude)
+            SELECT a.id, left(g.location, 255), g.place, g.latitude, g.longitude
+            FROM business_apps a
+            CROSS JOIN LATERAL (
+                SELECT DISTINCT value
+                FROM json_array_elements_text(COALESCE(a.geographic_locations, '[]'::json))
+            ) AS loc(value)
+            JOIN json_to_recordset(CAST(:places AS json))
+                AS g(location text, place text, latitude float8, longitude float8) ON g.location = loc.value
+            WHERE NOT EXISTS (SELECT 1 FROM business_app_locations l WHERE l.business_app_id = a.id)
+        """), {"places": _places_json(locations)}).rowcount
+        db.commit()
+        return {"suppliers": suppliers, "app_locations": app_locations}
+
+
+def _places_json(values: List[str]) -> str:
+    places = []
+    for value in values:
+        place = geocode(value)
+        if place:
+            places.append({"location": value, "place": place.name,
+                           "latitude": place.latitude, "longitude": place.longitude})
+    return json.dumps(places)
+
+
+def _bbox_filter(lat_column: str, lon_column: str, bbox: Tuple[float, float, float, float], zoom: int) -> tuple:
+    west, south, east, north = bbox
+    zoom = max(0, min(zoom, MAX_ZOOM))
+    params = {"west": west, "south": south, "east": east, "north": north,
+              "cell": 360.0 / 2 ** zoom * CLUSTER_RADIUS_PX / TILE_SIZE_PX}
+    # A box crossing the antimeridian has west > east
+    lon_op = "AND" if west <= east else "OR"
+    where = (f"{lat_column} BETWEEN :south AND :north "
+             f"AND ({lon_column} >= :west {lon_op} {lon_column} <= :east)")
+    return where, params
+
+
+def track_geocoding(session_factory: sessionmaker):
+    """Geocode suppliers and apps whose address or locations change, as part of the same flush"""
+    event.listen(session_factory, "before_flush", _geocode_changes)
+
+
+def _geocode_changes(session, flush_context, instances):
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Supplier) and _changed(obj, "address"):
+                locate_supplier(obj)
+            elif isinstance(obj, BusinessApp) and _changed(obj, "geographic_locations"):
+                locate_business_app(obj)
+
+
+def _changed(obj, attribute: str) -> bool:
+    state = inspect(obj)
+    return state.pending or state.attrs[attribute].history.has_changes()
+
+
+track_geocoding(SessionLocal)
+
+geo_db_service = GeoDatabaseService()
@@ -1,31 +1,65 @@
 """Product service with database operations"""
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple
 from datetime import datetime
 import uuid
-from db_models import Product as DBModel_Product, Supplier
+from db_models import Product as DBModel_Product, Supplier, BusinessApp
 from models import ProductCreate, ProductUpdate
+import multiget
+from tracing import traced_service
+from versioning import check_version
 
 
+@traced_service
 class ProductDatabaseService:
     """Service for Product database operations"""
 
-    def list_all(self, db: Session) -> List[DBModel_Product]:
-        """List all products"""
-        return db.query(DBModel_Product).order_by(DBModel_Product.name).all()
+    def list_all(self, db: Session, options: Optional[List] = None) -> List[DBModel_Product]:
+        """List all products, loaded with the given loader options (default: with their supplier)"""
+        return (
+            db.query(DBModel_Product)
+            .options(*(options or [joinedload(DBModel_Product.supplier)]))
+            .order_by(DBModel_Product.name)
+            .all()
+        )
 
-    def list_by_supplier(self, db: Session, supplier_id: str) -> List[DBModel_Product]:
-        """List products by supplier ID"""
+    def list_for_suppliers(self, db: Session, supplier_ids: List[int],
+                           with_app_counts: bool = False) -> List[Tuple[DBModel_Product, Optional[int]]]:
+        """Products of several suppliers (by internal ID) in one query, optionally with their business app counts"""
+        if not supplier_ids:
+            return []
+        if not with_app_counts:
+            products = (
+                db.query(DBModel_Product)
+                .filter(DBModel_Product.supplier_id.in_(supplier_ids))
+                .order_by(DBModel_Product.name)
+                .all()
+            )
+            return [(product, None) for product in products]
+        return (
+            db.query(DBModel_Product, func.count(BusinessApp.id))
+            .outerjoin(BusinessApp, BusinessApp.product_id == DBModel_Product.id)
+            .filter(DBModel_Product.supplier_id.in_(supplier_ids))
+            .group_by(DBModel_Product.id)
+            .order_by(DBModel_Product.name)
+            .all()
+        )
+
+    def list_by_supplier(self, db: Session, supplier_id: str, options: Optional[List] = None) -> List[DBModel_Product]:
+        """List products by supplier ID, loaded with the given loader options (default: with the supplier)"""
         try:
             uuid_obj = uuid.UUID(supplier_id)
         except ValueError:
             return []
 
-        supplier = db.query(Supplier).filter(Supplier.supplier_id == uuid_obj).first()
-        if not supplier:
-            return []
-
-        return db.query(DBModel_Product).filter(DBModel_Product.supplier_id == supplier.id).all()
+        supplier_pk = select(Supplier.id).where(Supplier.supplier_id == uuid_obj).scalar_subquery()
+        return (
+            db.query(DBModel_Product)
+            .options(*(options or [joinedload(DBModel_Product.supplier)]))
+            .filter(DBModel_Product.supplier_id == supplier_pk)
+            .all()
+        )
 
     def get(self, db: Session, product_id: str) -> Optional[DBModel_Product]:
         """Get product by ID"""
@@ -35,6 +69,12 @@ class ProductDatabaseService:
             return None
         return db.query(DBModel_Product).filter(DBModel_Product.product_id == uuid_obj).first()
 
+    def get_many(self, db: Session, ids: List[str],
+                 options: Optional[List] = None) -> Tuple[List[DBModel_Product], List[str]]:
+        """Products by ID in request order, and the IDs not found (default: with their supplier)"""
+        return multiget.get_many(db, DBModel_Product, "product_id", ids,
+                                 options or [joinedload(DBModel_Product.supplier)])
+
     def create(self, db: Session, product_create: ProductCreate) -> Optional[DBModel_Product]:
         """Create a new product"""
         # Get supplier internal ID from UUID
@@ -61,11 +101,13 @@ class ProductDatabaseService:
         db.refresh(product)
         return product
 
-    def update(self, db: Session, product_id: str, product_update: ProductUpdate) -> Optional[DBModel_Product]:
+    def update(self, db: Session, product_id: str, product_update: ProductUpdate,
+               expected_version: Optional[int] = None) -> Optional[DBModel_Product]:
         """Update a product"""
         product = self.get(db, product_id)
         if not product:
             return None
+        check_version(product, expected_version)
 
         update_data = product_update.dict(exclude_unset=True)
 
@@ -90,7 +132,7 @@ class ProductDatabaseService:
         db.refresh(product)
         return product
 
-    def delete(self, db: Session, product_id: str) -> bool:
+    def delete(self, db: Session, product_id: str, expected_version: Optional[int] = None) -> bool:
         """Delete a product"""
         try:
             uuid_obj = uuid.UUID(product_id)
@@ -99,6 +141,7 @@ class ProductDatabaseService:
         product = db.query(DBModel_Product).filter(DBModel_Product.product_id == uuid_obj).first()
         if not product:
             return False
+        check_version(product, expected_version)
         db.delete(product)
         db.commit()
         return True
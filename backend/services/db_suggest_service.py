@@ -0,0 +1,184 @@
+"""
+Suggest service: type-ahead values for the free-text fields of the forms
+
+suggestion_values holds, per field, each distinct value in use and how many
+business apps and tech debt items use it (archived ones included, so archiving
+and restoring change nothing). ORM writes adjust the counts in the same
+flush, so a suggestion is there as soon as the item using it is committed.
+Lookups only read this small table: a btree on (field, lower(value)) answers
+plain prefixes and, where the pg_trgm extension is available, a trigram GIN
+index answers prefixes of later words ("smi" finds "Jane Smith").
+"""
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+from sqlalchemy import JSON, event, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, sessionmaker
+from database import SessionLocal
+from db_models import BusinessApp, TechDebt
+from services.db_archive_service import TIERS
+from tracing import traced_service
+
+# Field -> the (entity, attribute) pairs its values are collected from
+SUGGEST_FIELDS: Dict[str, Tuple[Tuple[type, str], ...]] = {
+    "owner": (
+        (BusinessApp, "architectural_owner"),
+        (BusinessApp, "business_owner"),
+        (BusinessApp, "product_owner"),
+        (BusinessApp, "system_owner"),
+        (TechDebt, "owner")
+    ),
+    "technology": ((BusinessApp, "technologies"),),
+    "cloud_provider": ((BusinessApp, "cloud_provider"),),
+    "tag": ((TechDebt, "tags"),),
+    "app_name": ((BusinessApp, "name"),)
+}
+MAX_VALUE_LENGTH = 255
+
+# Created by init_db() outside the metadata: the extension may not be installable
+# (then lookups of later words scan the field's rows, which stays cheap)
+PREFIX_INDEX_SQL = ("CREATE INDEX IF NOT EXISTS ix_suggestion_values_prefix "
+                    "ON suggestion_values (field, lower(value) text_pattern_ops)")
+TRIGRAM_INDEX_SQL = ("CREATE EXTENSION IF NOT EXISTS pg_trgm",
+                     "CREATE INDEX IF NOT EXISTS ix_suggestion_values_trgm "
+                     "ON suggestion_values USING gin (lower(value) gin_trgm_ops)")
+
+_ADD_COUNTS_SQL = text("""
+    INSERT INTO suggestion_values (field, value, count) VALUES (:field, :value, :delta)
+    ON CONFLICT (field, value) DO UPDATE SET count = suggestion_values.count + EXCLUDED.count
+""")
+_DROP_UNUSED_SQL = text("DELETE FROM suggestion_values WHERE field = :field AND value = :value AND count <= 0")
+
+_ARCHIVES = {tier.hot.name: tier.archive.name for tier in TIERS.values()}
+_FIELDS_BY_ENTITY: Dict[type, List[Tuple[str, str]]] = {}
+for _field, _sources in SUGGEST_FIELDS.items():
+    for _entity, _attribute in _sources:
+        _FIELDS_BY_ENTITY.setdefault(_entity, []).append((_field, _attribute))
+
+
+def _is_list(entity, attribute: str) -> bool:
+    return isinstance(entity.__table__.c[attribute].type, JSON)
+
+
+def _clean(value) -> str:
+    # Trimmed like btrim() in rebuild_suggestions()
+    return str(value).strip(" ")[:MAX_VALUE_LENGTH] if value is not None else ""
+
+
+def _values(entity, attribute: str, value) -> Set[str]:
+    """The distinct non-empty values an attribute value contributes"""
+    items = (value or []) if _is_list(entity, attribute) else [value]
+    return {cleaned for cleaned in map(_clean, items) if cleaned}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@traced_service
+class SuggestDatabaseService:
+    """Service for type-ahead suggestions"""
+
+    def suggest(self, db: Session, field: str, prefix: str, limit: int) -> List[Dict]:
+        """
+        The values of a field starting with the prefix, or with a later word
+        starting with it, most used first; values starting with it rank first
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            rows = db.execute(text("""
+                SELECT value, count FROM suggestion_values WHERE field = :field
+                ORDER BY count DESC, value LIMIT :limit
+            """), {"field": field, "limit": limit})
+        else:
+            rows = db.execute(text(r"""
+                SELECT value, count FROM suggestion_values
+                WHERE field = :field
+                  AND (lower(value) LIKE :starts ESCAPE '\' OR lower(value) LIKE :word ESCAPE '\')
+                ORDER BY lower(value) LIKE :starts ESCAPE '\' DESC, count DESC, value
+                LIMIT :limit
+            """), {"field": field, "starts": f"{_escape_like(prefix)}%",
+                   "word": f"% {_escape_like(prefix)}%", "limit": limit})
+        return [{"value": row.value, "count": row.count} for row in rows]
+
+
+def track_suggestion_counts(session_factory: sessionmaker):
+    """Keep suggestion_values in step with the fields it counts, as part of the same flush"""
+    event.listen(session_factory, "before_flush", _count_changes)
+
+
+def _count_changes(session, flush_context, instances):
+    deltas: Counter = Counter()
+    with session.no_autoflush:
+        for obj in session.new:
+            for field, attribute in _FIELDS_BY_ENTITY.get(type(obj), ()):
+                deltas.update((field, value) for value in _values(type(obj), attribute, getattr(obj, attribute)))
+        for obj in session.deleted:
+            for field, attribute in _FIELDS_BY_ENTITY.get(type(obj), ()):
+                deltas.subtract((field, value) for value in _values(type(obj), attribute, getattr(obj, attribute)))
+        for obj in session.dirty:
+            state = inspect(obj)
+            for field, attribute in _FIELDS_BY_ENTITY.get(type(obj), ()):
+                history = state.attrs[attribute].history
+                if not history.has_changes():
+                    continue
+                # The old value is only known if it was loaded before the change
+                old = _values(type(obj), attribute, history.deleted[0]) if history.deleted else set()
+                new = _values(type(obj), attribute, history.added[0]) if history.added else set()
+                deltas.update((field, value) for value in new - old)
+                deltas.subtract((field, value) for value in old - new)
+    changes = [{"field": field, "value": value, "delta": delta}
+               for (field, value), delta in sorted(deltas.items()) if delta]
+    if not changes:
+        return
+    # Sorted keys: concurrent writers lock shared rows in the same order
+    connection = session.connection()
+    connection.execute(_ADD_COUNTS_SQL, changes)
+    removed = [change for change in changes if change["delta"] < 0]
+    if removed:
+        connection.execute(_DROP_UNUSED_SQL, removed)
+
+
+def rebuild_suggestions(connection: Connection) -> int:
+    """
+    Recount suggestion_values from scratch, for rows written without the ORM
+    (COPY loads, bulk deletes, rows from before the table existed); returns
+    the number of distinct values
+    """
+    selects = []
+    for field, sources in SUGGEST_FIELDS.items():
+        for entity, attribute in sources:
+            for table in (entity.__tablename__, _ARCHIVES[entity.__tablename__]):
+                if _is_list(entity, attribute):
+                    selects.append(f"""
+                        SELECT DISTINCT '{field}' AS field, t.id, left(btrim(v.value), {MAX_VALUE_LENGTH}) AS value
+                        FROM {table} t
+                        CROSS JOIN LATERAL json_array_elements_text(COALESCE(t.{attribute}, '[]'::json)) AS v(value)""")
+                else:
+                    selects.append(f"""
+                        SELECT '{field}' AS field, t.id, left(btrim(t.{attribute}), {MAX_VALUE_LENGTH}) AS value
+                        FROM {table} t""")
+    connection.execute(text("DELETE FROM suggestion_values"))
+    return connection.execute(text(f"""
+        INSERT INTO suggestion_values (field, value, count)
+        SELECT field, value, COUNT(*)
+        FROM ({" UNION ALL ".join(selects)}) AS used
+        WHERE value <> ''
+        GROUP BY field, value
+    """)).rowcount
+
+
+def create_suggestion_indexes(connection: Connection):
+    """Create the lookup indexes; the trigram one is skipped if pg_trgm cannot be installed"""
+    connection.execute(text(PREFIX_INDEX_SQL))
+    try:
+        with connection.begin_nested():
+            for statement in TRIGRAM_INDEX_SQL:
+                connection.execute(text(statement))
+    except Exception as e:
+        print(f"⚠️  pg_trgm unavailable, suggestions will match later words without an index: {e}")
+
+
+track_suggestion_counts(SessionLocal)
+
+suggest_db_service = SuggestDatabaseService()
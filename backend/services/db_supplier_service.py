@@ -1,12 +1,17 @@
 """Supplier service with database operations"""
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import uuid
 from db_models import Supplier as DBModel_Supplier
 from models import SupplierCreate, SupplierUpdate
+import multiget
+from tracing import traced_service
+from versioning import check_version
 
 
+@traced_service
 class SupplierDatabaseService:
     """Service for Supplier database operations"""
 
@@ -14,6 +19,24 @@ class SupplierDatabaseService:
         """List all suppliers"""
         return db.query(DBModel_Supplier).order_by(DBModel_Supplier.name).all()
 
+    def list_page(self, db: Session, offset: int = 0, limit: Optional[int] = None,
+                  options: Optional[List] = None) -> Tuple[int, List[DBModel_Supplier]]:
+        """One page of suppliers by name, with the total number of suppliers counted in the same query"""
+        query = (
+            db.query(DBModel_Supplier, func.count().over().label("total"))
+            .options(*(options or []))
+            .order_by(DBModel_Supplier.name)
+            .offset(offset)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        rows = query.all()
+        if not rows:
+            # Past the last page there is no row to carry the total
+            total = db.query(func.count(DBModel_Supplier.id)).scalar() if offset else 0
+            return total, []
+        return rows[0].total, [supplier for supplier, _ in rows]
+
     def get(self, db: Session, supplier_id: str) -> Optional[DBModel_Supplier]:
         """Get supplier by ID"""
         try:
@@ -22,6 +45,11 @@ class SupplierDatabaseService:
             return None
         return db.query(DBModel_Supplier).filter(DBModel_Supplier.supplier_id == uuid_obj).first()
 
+    def get_many(self, db: Session, ids: List[str],
+                 options: Optional[List] = None) -> Tuple[List[DBModel_Supplier], List[str]]:
+        """Suppliers by ID in request order, and the IDs not found"""
+        return multiget.get_many(db, DBModel_Supplier, "supplier_id", ids, options)
+
     def get_by_name(self, db: Session, name: str) -> Optional[DBModel_Supplier]:
         """Get supplier by name"""
         return db.query(DBModel_Supplier).filter(DBModel_Supplier.name == name).first()
@@ -41,11 +69,13 @@ class SupplierDatabaseService:
         db.refresh(supplier)
         return supplier
 
-    def update(self, db: Session, supplier_id: str, supplier_update: SupplierUpdate) -> Optional[DBModel_Supplier]:
+    def update(self, db: Session, supplier_id: str, supplier_update: SupplierUpdate,
+               expected_version: Optional[int] = None) -> Optional[DBModel_Supplier]:
         """Update a supplier"""
         supplier = self.get(db, supplier_id)
         if not supplier:
             return None
+        check_version(supplier, expected_version)
 
         update_data = supplier_update.dict(exclude_unset=True)
 
@@ -57,7 +87,7 @@ class SupplierDatabaseService:
         db.refresh(supplier)
         return supplier
 
-    def delete(self, db: Session, supplier_id: str) -> bool:
+    def delete(self, db: Session, supplier_id: str, expected_version: Optional[int] = None) -> bool:
         """Delete a supplier"""
         try:
             uuid_obj = uuid.UUID(supplier_id)
@@ -66,6 +96,7 @@ class SupplierDatabaseService:
         supplier = db.query(DBModel_Supplier).filter(DBModel_Supplier.supplier_id == uuid_obj).first()
         if not supplier:
             return False
+        check_version(supplier, expected_version)
         db.delete(supplier)
         db.commit()
         return True
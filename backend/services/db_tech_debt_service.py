@@ -1,29 +1,81 @@
 """Tech Debt service with database operations"""
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple
 from datetime import datetime
-from db_models import TechDebt as DBModel_TechDebt
+from db_models import TechDebt as DBModel_TechDebt, TechDebtArchive
 from models import TechDebtCreate, TechDebtUpdate
+import multiget
+from tracing import traced_service
+from versioning import check_version
 
 
+@traced_service
 class TechDebtDatabaseService:
     """Service for Tech Debt database operations"""
 
-    def list_all(self, db: Session) -> List[DBModel_TechDebt]:
-        """List all tech debt items"""
-        return db.query(DBModel_TechDebt).order_by(DBModel_TechDebt.priority.desc(), DBModel_TechDebt.created_at.desc()).all()
+    def list_all(self, db: Session, options: Optional[List] = None, include_archived: bool = False,
+                 archived_options: Optional[List] = None) -> List:
+        """
+        List all tech debt items, loaded with the given loader options (default:
+        with their ADR), followed by the archived ones if asked for
+        """
+        debts = (
+            db.query(DBModel_TechDebt)
+            .options(*(options or [joinedload(DBModel_TechDebt.linked_adr)]))
+            .order_by(DBModel_TechDebt.priority.desc(), DBModel_TechDebt.created_at.desc())
+            .all()
+        )
+        if include_archived:
+            debts += (
+                db.query(TechDebtArchive)
+                .options(*(archived_options or [joinedload(TechDebtArchive.linked_adr)]))
+                .order_by(TechDebtArchive.priority.desc(), TechDebtArchive.created_at.desc())
+                .all()
+            )
+        return debts
 
     def get(self, db: Session, debt_id: str) -> Optional[DBModel_TechDebt]:
         """Get tech debt by ID"""
         return db.query(DBModel_TechDebt).filter(DBModel_TechDebt.debt_id == debt_id).first()
 
-    def list_by_adr(self, db: Session, adr_id: str) -> List[DBModel_TechDebt]:
-        """Get tech debt items linked to an ADR"""
+    def get_archived(self, db: Session, debt_id: str) -> Optional[TechDebtArchive]:
+        """Get an archived tech debt item by ID"""
+        return db.query(TechDebtArchive).filter(TechDebtArchive.debt_id == debt_id).first()
+
+    def get_many(self, db: Session, ids: List[str], options: Optional[List] = None, include_archived: bool = False,
+                 archived_options: Optional[List] = None) -> Tuple[List, List[str]]:
+        """
+        Tech debt items by ID in request order, and the IDs not found (default:
+        with their ADR), looking in the archive too if asked for
+        """
+        return multiget.get_many(db, DBModel_TechDebt, "debt_id", ids,
+                                 options or [joinedload(DBModel_TechDebt.linked_adr)],
+                                 TechDebtArchive if include_archived else None,
+                                 archived_options or [joinedload(TechDebtArchive.linked_adr)])
+
+    def list_by_adr(self, db: Session, adr_id: str, options: Optional[List] = None, include_archived: bool = False,
+                    archived_options: Optional[List] = None) -> List:
+        """
+        Get tech debt items linked to an ADR, loaded with the given loader
+        options (default: with the ADR), followed by the archived ones if asked for
+        """
         from db_models import ADR
-        adr = db.query(ADR).filter(ADR.adr_id == adr_id).first()
-        if not adr:
-            return []
-        return db.query(DBModel_TechDebt).filter(DBModel_TechDebt.linked_adr_id == adr.id).all()
+        adr_pk = select(ADR.id).where(ADR.adr_id == adr_id).scalar_subquery()
+        debts = (
+            db.query(DBModel_TechDebt)
+            .options(*(options or [joinedload(DBModel_TechDebt.linked_adr)]))
+            .filter(DBModel_TechDebt.linked_adr_id == adr_pk)
+            .all()
+        )
+        if include_archived:
+            debts += (
+                db.query(TechDebtArchive)
+                .options(*(archived_options or [joinedload(TechDebtArchive.linked_adr)]))
+                .filter(TechDebtArchive.linked_adr_id == adr_pk)
+                .all()
+            )
+        return debts
 
     def create(self, db: Session, debt_create: TechDebtCreate) -> DBModel_TechDebt:
         """Create a new tech debt item"""
@@ -60,11 +112,13 @@ class TechDebtDatabaseService:
         db.refresh(debt)
         return debt
 
-    def update(self, db: Session, debt_id: str, debt_update: TechDebtUpdate) -> Optional[DBModel_TechDebt]:
+    def update(self, db: Session, debt_id: str, debt_update: TechDebtUpdate,
+               expected_version: Optional[int] = None) -> Optional[DBModel_TechDebt]:
         """Update a tech debt item"""
         debt = self.get(db, debt_id)
         if not debt:
             return None
+        check_version(debt, expected_version)
 
         update_data = debt_update.dict(exclude_unset=True)
 
@@ -91,11 +145,12 @@ class TechDebtDatabaseService:
         db.refresh(debt)
         return debt
 
-    def delete(self, db: Session, debt_id: str) -> bool:
+    def delete(self, db: Session, debt_id: str, expected_version: Optional[int] = None) -> bool:
         """Delete a tech debt item"""
         debt = self.get(db, debt_id)
         if not debt:
             return False
+        check_version(debt, expected_version)
         db.delete(debt)
         db.commit()
         return True
@@ -0,0 +1,157 @@
+"""Tech debt trend service: daily snapshots and the burn-down, aging and overdue series built from them"""
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from tracing import traced_service
+
+CLOSED_STATUSES = ("resolved", "wont-fix")
+AGE_BUCKETS = {
+    "0-30": "age_0_30",
+    "31-90": "age_31_90",
+    "91-180": "age_91_180",
+    "181-365": "age_181_365",
+    "365+": "age_over_365"
+}
+INTERVALS = ("day", "week", "month")
+OVERDUE_GROUPS = ("priority", "status", "owner")
+
+_SNAPSHOT_COLUMNS = ("snapshot_date, tag, priority, status, owner, count, overdue_count, "
+                     "age_0_30, age_31_90, age_91_180, age_181_365, age_over_365, age_days_total")
+_SNAPSHOT_MEASURES = """
+    COUNT(*),
+    COUNT(*) FILTER (WHERE d.target_resolution_date < :day AND d.status NOT IN ('resolved', 'wont-fix')),
+    COUNT(*) FILTER (WHERE d.age <= 30),
+    COUNT(*) FILTER (WHERE d.age BETWEEN 31 AND 90),
+    COUNT(*) FILTER (WHERE d.age BETWEEN 91 AND 180),
+    COUNT(*) FILTER (WHERE d.age BETWEEN 181 AND 365),
+    COUNT(*) FILTER (WHERE d.age > 365),
+    COALESCE(SUM(d.age), 0)"""
+# Archived items (see db_archive_service.py) still count, so trends do not dip when closed items are archived
+_AGED_DEBT = """(
+    SELECT d.*, GREATEST(CAST(:day AS date) - COALESCE(d.created_date, d.created_at::date), 0) AS age
+    FROM (
+        SELECT priority, status, owner, tags, created_date, created_at, target_resolution_date FROM tech_debt
+        UNION ALL
+        SELECT priority, status, owner, tags, created_date, created_at, target_resolution_date FROM tech_debt_archive
+    ) d
+) d"""
+
+
+@traced_service
+class TechDebtTrendDatabaseService:
+    """Service for tech debt snapshot and trend operations"""
+
+    def take_snapshot(self, db: Session, snapshot_date: date) -> int:
+        """Replace the snapshot of one day with the current tech debt; returns the number of rows written"""
+        params = {"day": snapshot_date}
+        db.execute(text("DELETE FROM tech_debt_snapshots WHERE snapshot_date = :day"), params)
+        # One set of rows counting every item (tag ''), one per tag counting the items carrying it
+        untagged = db.execute(text(f"""
+            INSERT INTO tech_debt_snapshots ({_SNAPSHOT_COLUMNS})
+            SELECT :day, '', d.priority, d.status, d.owner, {_SNAPSHOT_MEASURES}
+            FROM {_AGED_DEBT}
+            GROUP BY d.priority, d.status, d.owner
+        """), params).rowcount
+        tagged = db.execute(text(f"""
+            INSERT INTO tech_debt_snapshots ({_SNAPSHOT_COLUMNS})
+            SELECT :day, t.tag, d.priority, d.status, d.owner, {_SNAPSHOT_MEASURES}
+            FROM {_AGED_DEBT}
+            CROSS JOIN LATERAL (
+                SELECT DISTINCT left(value, 100) AS tag
+                FROM json_array_elements_text(COALESCE(d.tags, '[]'::json))
+                WHERE value <> ''
+            ) t
+            GROUP BY t.tag, d.priority, d.status, d.owner
+        """), params).rowcount
+        db.commit()
+        return untagged + tagged
+
+    def burndown(self, db: Session, start: date, end: date, interval: str = "day", tag: Optional[str] = None,
+                 priority: Optional[str] = None, owner: Optional[str] = None) -> List[Dict]:
+        """Open and closed item counts per snapshot (the last snapshot of each week/month for coarser intervals)"""
+        where, params = self._filters(start, end, tag, priority=priority, owner=owner)
+        rows = db.execute(text(f"""
+            SELECT snapshot_date, status, SUM(count) AS count
+            FROM tech_debt_snapshots
+            WHERE {where}
+            GROUP BY snapshot_date, status
+            ORDER BY snapshot_date
+        """), params).all()
+
+        points: Dict[date, Dict] = {}
+        for snapshot_date, status, count in rows:
+            point = points.setdefault(snapshot_date, {"date": snapshot_date.isoformat(), "open": 0, "closed": 0,
+                                                      "by_status": {}})
+            point["closed" if status in CLOSED_STATUSES else "open"] += int(count)
+            point["by_status"][status] = int(count)
+        return self._last_per_interval(points, interval)
+
+    def aging(self, db: Session, start: date, end: date, interval: str = "day", tag: Optional[str] = None,
+              priority: Optional[str] = None, owner: Optional[str] = None) -> List[Dict]:
+        """Age buckets and average age of open items per snapshot"""
+        where, params = self._filters(start, end, tag, priority=priority, owner=owner)
+        bucket_sums = ", ".join(f"SUM({column}) AS {column}" for column in AGE_BUCKETS.values())
+        rows = db.execute(text(f"""
+            SELECT snapshot_date, SUM(count) AS count, SUM(age_days_total) AS age_days_total, {bucket_sums}
+            FROM tech_debt_snapshots
+            WHERE {where} AND status NOT IN ('resolved', 'wont-fix')
+            GROUP BY snapshot_date
+            ORDER BY snapshot_date
+        """), params).mappings().all()
+
+        points = {
+            row["snapshot_date"]: {
+                "date": row["snapshot_date"].isoformat(),
+                "open": int(row["count"]),
+                "average_age_days": round(row["age_days_total"] / row["count"], 1) if row["count"] else None,
+                "buckets": {bucket: int(row[column]) for bucket, column in AGE_BUCKETS.items()}
+            }
+            for row in rows
+        }
+        return self._last_per_interval(points, interval)
+
+    def overdue(self, db: Session, start: date, end: date, interval: str = "day", group_by: Optional[str] = None,
+                tag: Optional[str] = None, priority: Optional[str] = None,
+                owner: Optional[str] = None) -> List[Dict]:
+        """Items past their target resolution date per snapshot, optionally broken down by priority/status/owner"""
+        where, params = self._filters(start, end, tag, priority=priority, owner=owner)
+        group_column = f", {group_by}" if group_by else ""
+        rows = db.execute(text(f"""
+            SELECT snapshot_date{group_column}, SUM(overdue_count) AS overdue
+            FROM tech_debt_snapshots
+            WHERE {where}
+            GROUP BY snapshot_date{group_column}
+            ORDER BY snapshot_date
+        """), params).all()
+
+        points: Dict[date, Dict] = {}
+        for row in rows:
+            point = points.setdefault(row[0], {"date": row[0].isoformat(), "overdue": 0})
+            point["overdue"] += int(row[-1])
+            if group_by and row[-1]:
+                point.setdefault(f"by_{group_by}", {})[row[1]] = int(row[-1])
+        return self._last_per_interval(points, interval)
+
+    def _filters(self, start: date, end: date, tag: Optional[str], **dimensions) -> tuple:
+        # tag and snapshot_date lead the primary key, so every series is one index range scan
+        where = ["tag = :tag", "snapshot_date BETWEEN :start AND :end"]
+        params = {"tag": tag or "", "start": start, "end": end}
+        for column, value in dimensions.items():
+            if value:
+                where.append(f"{column} = :{column}")
+                params[column] = value
+        return " AND ".join(where), params
+
+    def _last_per_interval(self, points: Dict[date, Dict], interval: str) -> List[Dict]:
+        """Keep the last snapshot of each week (ISO) or month; snapshots are point-in-time, not additive"""
+        if interval == "day":
+            return list(points.values())
+        last: Dict[tuple, Dict] = {}
+        for snapshot_date in sorted(points):
+            key = snapshot_date.isocalendar()[:2] if interval == "week" else (snapshot_date.year, snapshot_date.month)
+            last[key] = points[snapshot_date]
+        return list(last.values())
+
+
+tech_debt_trend_db_service = TechDebtTrendDatabaseService()
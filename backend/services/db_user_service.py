@@ -1,23 +1,31 @@
 """User service with database operations"""
 from sqlalchemy.orm import Session
+from functools import lru_cache
 from typing import List, Optional
-from passlib.context import CryptContext
 from datetime import datetime
 from db_models import User
+from tracing import traced_service
+from versioning import check_version
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+@lru_cache(maxsize=1)
+def pwd_context():
+    """Password hashing context, created on first use to keep passlib out of startup"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+
+@traced_service
 class UserService:
     """Service for user database operations"""
 
     def hash_password(self, password: str) -> str:
         """Hash a password"""
-        return pwd_context.hash(password)
+        return pwd_context().hash(password)
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify a password against a hash"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return pwd_context().verify(plain_password, hashed_password)
 
     def get_all(self, db: Session) -> List[User]:
         """Get all users"""
@@ -31,6 +39,10 @@ class UserService:
         """Get user by email"""
         return db.query(User).filter(User.email == email).first()
 
+    def count_by_profile_image(self, db: Session, profile_image_url: str) -> int:
+        """Count users referencing a profile image URL"""
+        return db.query(User).filter(User.profile_image_url == profile_image_url).count()
+
     def create(self, db: Session, email: str, name: str, password: str,
                role: str = "user", profile_image_url: Optional[str] = None) -> User:
         """Create a new user"""
@@ -49,11 +61,12 @@ class UserService:
         db.refresh(user)
         return user
 
-    def update(self, db: Session, user_id: int, **kwargs) -> Optional[User]:
+    def update(self, db: Session, user_id: int, expected_version: Optional[int] = None, **kwargs) -> Optional[User]:
         """Update user"""
         user = self.get_by_id(db, user_id)
         if not user:
             return None
+        check_version(user, expected_version)
 
         # Hash password if provided
         if 'password' in kwargs and kwargs['password']:
@@ -68,11 +81,12 @@ class UserService:
         db.refresh(user)
         return user
 
-    def delete(self, db: Session, user_id: int) -> bool:
+    def delete(self, db: Session, user_id: int, expected_version: Optional[int] = None) -> bool:
         """Delete user"""
         user = self.get_by_id(db, user_id)
         if not user:
             return False
+        check_version(user, expected_version)
         db.delete(user)
         db.commit()
         return True
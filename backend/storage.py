@@ -0,0 +1,244 @@
+"""
+Object storage for uploaded files
+
+Two interchangeable backends, selected with STORAGE_BACKEND:
+
+- local: objects live under backend/uploads and are served by the /uploads
+  static mount. Fine for development and single-replica deployments.
+- s3: any S3-compatible store (AWS S3, MinIO, ...). Every API replica sees the
+  same objects and clients fetch them from the bucket (or a CDN in front of
+  it), so no Python worker spends time on static bytes.
+
+Both backends issue pre-signed POST uploads (presign_upload) so that browsers
+send file bytes straight to storage; the API only ever handles object keys.
+For the local backend the "storage" endpoint is POST /storage/direct-upload,
+which checks an HMAC-signed policy the same way S3 checks its POST policy.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Dict, Optional
+from config import settings
+
+LOCAL_STORAGE_ROOT = Path(__file__).parent / "uploads"
+LOCAL_UPLOAD_ENDPOINT = "/storage/direct-upload"
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Interface shared by the storage backends; keys are '/'-separated relative paths"""
+
+    @abstractmethod
+    def put(self, key: str, fileobj: BinaryIO, content_type: str, cache_control: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Readable, seekable file with the object's contents; raises FileNotFoundError"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL the browser loads the object from"""
+
+    @abstractmethod
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> Dict:
+        """Form POST the client sends the file to: {"method", "url", "fields"}"""
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        """Inverse of url(); None for URLs this backend did not produce"""
+        base = self.url("")
+        if url and url.startswith(base):
+            return url[len(base):] or None
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Objects stored as files below a root directory"""
+
+    def __init__(self, root: Path, base_url: str = "/uploads", signing_key: str = ""):
+        self.root = root.resolve()
+        self.base_url = base_url.rstrip("/")
+        self.signing_key = signing_key.encode()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if path == self.root or self.root not in path.parents:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def put(self, key: str, fileobj: BinaryIO, content_type: str, cache_control: Optional[str] = None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and rename, so readers never see a partial file
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+        try:
+            with tmp_path.open("wb") as f:
+                shutil.copyfileobj(fileobj, f)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def open(self, key: str) -> BinaryIO:
+        return self._path(key).open("rb")
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def delete_prefix(self, prefix: str):
+        path = self._path(prefix)
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> Dict:
+        policy = base64.urlsafe_b64encode(json.dumps({
+            "key": key,
+            "content_type": content_type,
+            "max_bytes": max_bytes,
+            "expires": int(time.time()) + expires_in
+        }).encode()).decode()
+        return {
+            "method": "POST",
+            "url": LOCAL_UPLOAD_ENDPOINT,
+            "fields": {"key": key, "policy": policy, "signature": self._sign(policy)}
+        }
+
+    def verify_upload(self, key: str, policy: str, signature: str) -> Dict:
+        """Check a policy issued by presign_upload and return it; raises ValueError"""
+        if not hmac.compare_digest(self._sign(policy), signature):
+            raise ValueError("Invalid upload signature")
+        conditions = json.loads(base64.urlsafe_b64decode(policy.encode()))
+        if conditions["key"] != key:
+            raise ValueError("Upload key does not match policy")
+        if conditions["expires"] < time.time():
+            raise ValueError("Upload policy has expired")
+        return conditions
+
+    def _sign(self, policy: str) -> str:
+        return hmac.new(self.signing_key, policy.encode(), hashlib.sha256).hexdigest()
+
+
+class S3Storage(StorageBackend):
+    """Objects stored in an S3-compatible bucket (boto3 is only needed for this backend)"""
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, region: str = "us-east-1",
+                 access_key_id: Optional[str] = None, secret_access_key: Optional[str] = None,
+                 public_url: Optional[str] = None):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region,
+            aws_access_key_id=access_key_id or None,
+            aws_secret_access_key=secret_access_key or None,
+            # MinIO and most self-hosted stores only support path-style addressing
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if endpoint_url else "auto"})
+        )
+        if public_url:
+            self.public_url = public_url.rstrip("/")
+        elif endpoint_url:
+            self.public_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_url = f"https://{bucket}.s3.{region}.amazonaws.com"
+
+    def put(self, key: str, fileobj: BinaryIO, content_type: str, cache_control: Optional[str] = None):
+        extra_args = {"ContentType": content_type}
+        if cache_control:
+            extra_args["CacheControl"] = cache_control
+        self.client.upload_fileobj(fileobj, self.bucket, key, ExtraArgs=extra_args)
+
+    def open(self, key: str) -> BinaryIO:
+        from botocore.exceptions import ClientError
+
+        fileobj = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+        try:
+            self.client.download_fileobj(self.bucket, key, fileobj)
+        except ClientError as e:
+            fileobj.close()
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key) from e
+            raise
+        fileobj.seek(0)
+        return fileobj
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def delete_prefix(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            objects = [{"Key": obj["Key"]} for obj in page.get("Contents", [])]
+            if objects:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True})
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int, expires_in: int) -> Dict:
+        presigned = self.client.generate_presigned_post(
+            self.bucket, key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=expires_in
+        )
+        return {"method": "POST", "url": presigned["url"], "fields": presigned["fields"]}
+
+
+def create_storage() -> StorageBackend:
+    """Build the backend configured by STORAGE_BACKEND"""
+    if settings.storage_backend == "s3":
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            public_url=settings.s3_public_url
+        )
+    if settings.storage_backend != "local":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {settings.storage_backend}")
+    return LocalStorage(LOCAL_STORAGE_ROOT, signing_key=settings.secret_key)
+
+
+# Global instance
+storage = create_storage()
@@ -0,0 +1,473 @@
+"""
+Scalable synthetic data generator for EA Direct
+
+Generates a realistic, fully deterministic portfolio of suppliers, products,
+business applications, ADRs and tech debt at any scale:
+
+- Supplier concentration follows a power law: a few suppliers own most
+  products, and a few products back most applications.
+- Applications form a dependency DAG with preferential attachment, so older
+  core systems become hubs that many newer applications depend on.
+- Tech debt is linked to ADRs, mostly to tactical decisions whose interim
+  selection differs from the strategic one.
+
+Rows are streamed into PostgreSQL with COPY by a pool of worker processes.
+Every row is derived only from (seed, entity, index), so the output is
+identical regardless of worker count or chunking.
+
+Usage:
+    python synthetic_data.py --scale 1m --seed 42 --workers 8
+    python synthetic_data.py --scale 25000 --yes
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+import psycopg2
+from config import settings
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Share of total artifacts per entity type, in load order (foreign keys point backwards)
+MIX = {"suppliers": 0.01, "products": 0.05, "business_apps": 0.44, "adrs": 0.20, "tech_debt": 0.30}
+
+CHUNK_SIZE = 20_000
+
+# Reference date so that generated timestamps do not depend on when the generator runs
+EPOCH = datetime(2025, 1, 1)
+HISTORY_DAYS = 5 * 365
+
+SUPPLIER_PREFIXES = ["Acme", "Apex", "Blue", "Bright", "Cloud", "Core", "Data", "Delta", "Ever", "Fusion",
+                     "Global", "Green", "Hyper", "Info", "Iron", "Keystone", "Lumen", "Meridian", "Nexus",
+                     "Nova", "Omni", "Orbit", "Peak", "Prime", "Quantum", "Red", "Silver", "Summit",
+                     "Terra", "Vertex", "Vista", "Zen"]
+SUPPLIER_STEMS = ["soft", "logic", "works", "tech", "ware", "systems", "point", "link", "scale", "stack",
+                  "forge", "grid", "wave", "bridge", "sphere", "base"]
+SUPPLIER_KINDS = ["Inc.", "Ltd", "Corporation", "Group", "GmbH", "Solutions", "Technologies", "AG", "LLC", "plc"]
+CITIES = ["Seattle, WA, USA", "Austin, TX, USA", "New York, NY, USA", "San Francisco, CA, USA",
+          "London, UK", "Dublin, Ireland", "Berlin, Germany", "Munich, Germany", "Paris, France",
+          "Amsterdam, Netherlands", "Stockholm, Sweden", "Zurich, Switzerland", "Bangalore, India",
+          "Singapore", "Tokyo, Japan", "Sydney NSW, Australia", "Toronto, ON, Canada", "Tel Aviv, Israel"]
+PRODUCT_KINDS = ["Platform", "Suite", "Cloud", "Server", "Gateway", "Analytics", "Studio", "Manager",
+                 "Database", "Connect", "Insight", "Vault", "Engine", "Hub", "Monitor", "Workspace"]
+LICENSES = ["Commercial", "Subscription", "Open Source", "Enterprise Agreement", "Per-User", "Per-Core"]
+DOMAINS = ["Customer", "Claims", "Billing", "Payments", "Inventory", "Order", "Supplier", "Employee",
+           "Payroll", "Treasury", "Risk", "Compliance", "Marketing", "Logistics", "Warehouse", "Pricing",
+           "Loyalty", "Identity", "Document", "Reporting", "Forecasting", "Procurement", "Contract", "Asset"]
+FUNCTIONS = ["Management", "Processing", "Portal", "Analytics", "Gateway", "Tracking", "Scheduling",
+             "Reconciliation", "Onboarding", "Orchestration", "Search", "Notification", "Planning", "Ledger"]
+APP_SUFFIXES = ["System", "Service", "Platform", "Hub", "Engine", "App", "Console", "API"]
+TEAMS = ["Enterprise Architecture", "Platform Engineering", "Data Engineering", "Security Architecture",
+         "Integration Team", "Cloud Centre of Excellence", "Digital Channels", "Core Banking", "Finance IT",
+         "HR Technology", "Supply Chain IT", "Customer Experience"]
+DEPARTMENTS = ["Sales", "Finance", "Human Resources", "Operations", "Marketing", "Legal", "Procurement",
+               "Customer Service", "IT", "Risk"]
+PEOPLE = ["Alex Morgan", "Sam Patel", "Jordan Lee", "Taylor Kim", "Casey Nguyen", "Riley Chen",
+          "Morgan Davies", "Jamie Okafor", "Avery Garcia", "Quinn Novak", "Drew Fischer", "Rowan Silva",
+          "Parker Ito", "Sky Andersen", "Reese Haddad", "Hayden Murphy"]
+REGIONS = ["North America", "EMEA", "APAC", "LATAM", "UK", "Germany", "France", "India", "Japan", "Australia"]
+TECHNOLOGIES = ["Java", "Spring Boot", "Python", "Django", "FastAPI", ".NET", "Node.js", "React", "Angular",
+                "PostgreSQL", "Oracle", "SQL Server", "MongoDB", "Redis", "Kafka", "RabbitMQ", "Kubernetes",
+                "Docker", "Terraform", "COBOL", "SAP ABAP", "Go", "Elasticsearch", "Snowflake"]
+CLOUD_PROVIDERS = ["AWS", "Azure", "GCP", "Oracle Cloud", "IBM Cloud"]
+ADR_TOPICS = ["Event Streaming", "API Gateway", "Identity Provider", "Data Warehouse", "Container Platform",
+              "Service Mesh", "Observability Stack", "Secrets Management", "Message Broker", "Search Engine",
+              "CI/CD Pipeline", "Feature Flags", "Caching Layer", "Document Storage", "Workflow Engine",
+              "Mobile Framework", "Frontend Framework", "Reporting Tool", "Master Data Hub", "Backup Strategy"]
+ADR_ACTIONS = ["Adopt", "Standardize on", "Migrate to", "Retire", "Consolidate", "Evaluate"]
+TAGS = ["security", "performance", "scalability", "maintainability", "compliance", "cost", "legacy",
+        "upgrade", "architecture", "data-quality", "observability", "resilience"]
+EFFORTS = ["1 week", "2 weeks", "1 month", "1 quarter", "2 person-months", "6 person-months"]
+
+APP_STATUSES = ["active"] * 7 + ["deprecated", "deprecated", "planned", "retired"]
+RESILIENCE = ["bronze", "silver", "silver", "gold", "gold", "platinum"]
+HOSTING = ["cloud", "cloud", "cloud", "on-premise", "on-premise", "hybrid", "managed-hosting"]
+DEVELOPMENT = ["saas", "saas", "cots", "cots", "custom", "custom", "custom", "open-source", "low-code", "internal"]
+ADR_STATUSES = ["accepted"] * 5 + ["proposed", "proposed", "deprecated", "superseded"]
+PRIORITIES = ["low", "medium", "medium", "high", "high", "critical"]
+DEBT_STATUSES = ["identified", "identified", "accepted", "in-progress", "in-progress", "resolved", "wont-fix"]
+
+# Every TACTICAL_EVERY-th ADR records an interim selection that differs from the strategic one
+TACTICAL_EVERY = 4
+
+
+def parse_scale(value: str) -> int:
+    """Parse a named scale (1k/10k/100k/1m) or a plain artifact count"""
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value.replace("_", ""))
+
+
+def plan(total: int) -> Dict[str, int]:
+    """Split a total artifact count across entity types"""
+    return {name: max(1, int(total * share)) for name, share in MIX.items()}
+
+
+@lru_cache(maxsize=None)
+def _salt(seed: int, entity: str) -> int:
+    return int.from_bytes(hashlib.sha256(f"{seed}:{entity}".encode()).digest()[:8], "big")
+
+
+def entity_uuid(seed: int, entity: str, index: int) -> uuid.UUID:
+    """Deterministic UUID for the index-th row of an entity"""
+    return uuid.UUID(int=(_salt(seed, entity) << 64) | index, version=4)
+
+
+def _word(words, index: int, salt: int):
+    return words[(index * 2654435761 + salt) % len(words)]
+
+
+def _power_law(rng: random.Random, n: int, exponent: float) -> int:
+    """Pick an index in [0, n) heavily skewed towards 0"""
+    return min(n - 1, int(n * rng.random() ** exponent))
+
+
+def app_name(seed: int, index: int) -> str:
+    salt = _salt(seed, "app-name")
+    return (f"{_word(DOMAINS, index, salt)} {_word(FUNCTIONS, index // len(DOMAINS), salt)} "
+            f"{_word(APP_SUFFIXES, index // (len(DOMAINS) * len(FUNCTIONS)), salt)} {index + 1}")
+
+
+def adr_title(seed: int, index: int) -> str:
+    salt = _salt(seed, "adr-title")
+    return f"{_word(ADR_ACTIONS, index, salt)} {_word(ADR_TOPICS, index // len(ADR_ACTIONS), salt)} ({index + 1})"
+
+
+def adr_key(seed: int, index: int) -> str:
+    created = EPOCH - timedelta(days=index % HISTORY_DAYS)
+    slug = adr_title(seed, index).lower().replace(" ", "-").replace("(", "").replace(")", "").replace("/", "-")
+    return f"{created.strftime('%Y%m%d')}-{slug}"[:100]
+
+
+def _timestamps(rng: random.Random):
+    created = EPOCH - timedelta(days=rng.randint(0, HISTORY_DAYS), seconds=rng.randint(0, 86399))
+    updated = min(EPOCH, created + timedelta(days=rng.randint(0, 365)))
+    return created, updated
+
+
+def supplier_row(seed: int, i: int, rng: random.Random, counts: Dict[str, int]) -> dict:
+    salt = _salt(seed, "supplier-name")
+    combos = len(SUPPLIER_PREFIXES) * len(SUPPLIER_STEMS) * len(SUPPLIER_KINDS)
+    name = (f"{_word(SUPPLIER_PREFIXES, i, salt)}{_word(SUPPLIER_STEMS, i // len(SUPPLIER_PREFIXES), salt)} "
+            f"{_word(SUPPLIER_KINDS, i // (len(SUPPLIER_PREFIXES) * len(SUPPLIER_STEMS)), salt)}")
+    if i >= combos:
+        name = f"{name} {i // combos + 1}"
+    domain = name.split(" ")[0].lower()
+    created, updated = _timestamps(rng)
+    return {
+        "id": i + 1,
+        "supplier_id": entity_uuid(seed, "supplier", i),
+        "name": name,
+        "description": f"{name} supplies {_word(PRODUCT_KINDS, i, salt).lower()} software and services",
+        "website": f"https://www.{domain}{i}.example.com",
+        "contact_email": f"support@{domain}{i}.example.com",
+        "contact_phone": f"+1-555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "address": f"{rng.randint(1, 999)} {_word(SUPPLIER_PREFIXES, i + 7, salt)} Street, {rng.choice(CITIES)}",
+        "created_at": created,
+        "updated_at": updated
+    }
+
+
+def product_row(seed: int, i: int, rng: random.Random, counts: Dict[str, int]) -> dict:
+    salt = _salt(seed, "product-name")
+    supplier_index = _power_law(rng, counts["suppliers"], 3.0)
+    created, updated = _timestamps(rng)
+    return {
+        "id": i + 1,
+        "product_id": entity_uuid(seed, "product", i),
+        "name": f"{_word(SUPPLIER_PREFIXES, supplier_index, salt)} {_word(PRODUCT_KINDS, i, salt)} {i + 1}",
+        "description": f"{_word(PRODUCT_KINDS, i, salt)} product",
+        "version": f"{rng.randint(1, 15)}.{rng.randint(0, 9)}",
+        "supplier_id": supplier_index + 1,
+        "product_url": f"https://products.example.com/{i + 1}",
+        "support_url": f"https://support.example.com/{i + 1}",
+        "license_type": rng.choice(LICENSES),
+        "created_at": created,
+        "updated_at": updated
+    }
+
+
+def business_app_row(seed: int, i: int, rng: random.Random, counts: Dict[str, int]) -> dict:
+    name = app_name(seed, i)
+    # Dependencies point at earlier apps only, skewed towards the oldest ones (hubs)
+    dependencies = []
+    if i > 0 and rng.random() < 0.75:
+        for _ in range(min(i, 1 + int(rng.expovariate(0.6)))):
+            target = str(entity_uuid(seed, "business_app", _power_law(rng, i, 2.5)))
+            if target not in dependencies:
+                dependencies.append(target)
+
+    hosting = rng.choice(HOSTING)
+    development = rng.choice(DEVELOPMENT)
+    has_product = development in ("saas", "cots", "open-source", "low-code") or rng.random() < 0.2
+    created, updated = _timestamps(rng)
+    return {
+        "id": i + 1,
+        "app_id": entity_uuid(seed, "business_app", i),
+        "name": name,
+        "description": f"{name} supports {rng.choice(DEPARTMENTS).lower()} operations",
+        "status": rng.choice(APP_STATUSES),
+        "architectural_owner": rng.choice(TEAMS),
+        "business_owner": rng.choice(DEPARTMENTS),
+        "product_owner": rng.choice(PEOPLE),
+        "system_owner": rng.choice(PEOPLE),
+        "resilience_category": rng.choice(RESILIENCE),
+        "geographic_locations": rng.sample(REGIONS, rng.randint(1, 3)),
+        "hosting_type": hosting,
+        "cloud_provider": rng.choice(CLOUD_PROVIDERS) if hosting in ("cloud", "hybrid") else None,
+        "development_type": development,
+        "technologies": rng.sample(TECHNOLOGIES, rng.randint(1, 5)),
+        "dependencies": dependencies,
+        "product_id": _power_law(rng, counts["products"], 2.0) + 1 if has_product else None,
+        "created_at": created,
+        "updated_at": updated
+    }
+
+
+def adr_row(seed: int, i: int, rng: random.Random, counts: Dict[str, int]) -> dict:
+    topic = adr_title(seed, i)
+    options = [{
+        "name": f"Option {letter}",
+        "description": f"{topic} using approach {letter}",
+        "pros": rng.sample(["Lower cost", "Faster delivery", "Vendor support", "Team familiarity",
+                            "Better performance", "Open standards"], 2),
+        "cons": rng.sample(["Vendor lock-in", "Migration effort", "Licensing cost", "Operational overhead",
+                            "Skills gap", "Immature ecosystem"], 2),
+        "cost_estimate": f"${rng.randint(5, 500)}k",
+        "effort_estimate": rng.choice(EFFORTS)
+    } for letter in "ABC"[:rng.randint(2, 3)]]
+    strategic = options[0]["name"]
+    tactical = i % TACTICAL_EVERY == 0
+    related = []
+    if i > 0:
+        for _ in range(rng.randint(0, 3)):
+            key = adr_key(seed, _power_law(rng, i, 2.0))
+            if key not in related:
+                related.append(key)
+    created, updated = _timestamps(rng)
+    return {
+        "id": i + 1,
+        "adr_id": adr_key(seed, i),
+        "title": topic,
+        "context": f"We need to decide how to {topic.split(' (')[0].lower()} across the portfolio.",
+        "options": options,
+        "recommended_option": strategic,
+        "strategic_selection": strategic,
+        "interim_selection": options[1]["name"] if tactical else None,
+        "decision_rationale": f"{strategic} best balances cost and risk.",
+        "consequences": "Teams must follow the selected approach for new work.",
+        "stakeholders": rng.sample(TEAMS, rng.randint(1, 3)),
+        "related_adrs": related,
+        "status": rng.choice(ADR_STATUSES),
+        "author": rng.choice(PEOPLE),
+        "created_at": created,
+        "updated_at": updated
+    }
+
+
+def tech_debt_row(seed: int, i: int, rng: random.Random, counts: Dict[str, int]) -> dict:
+    linked_adr = None
+    roll = rng.random()
+    if roll < 0.55:
+        # Tactical decisions are the main source of debt
+        linked_adr = rng.randrange(0, counts["adrs"], TACTICAL_EVERY)
+    elif roll < 0.7:
+        linked_adr = rng.randrange(counts["adrs"])
+
+    status = rng.choice(DEBT_STATUSES)
+    created, updated = _timestamps(rng)
+    created_date = created.date()
+    target = created_date + timedelta(days=rng.randint(30, 540))
+    resolved = target + timedelta(days=rng.randint(-60, 120)) if status == "resolved" else None
+    systems = [app_name(seed, _power_law(rng, counts["business_apps"], 2.0)) for _ in range(rng.randint(1, 3))]
+    title = (f"Replace interim choice from {adr_title(seed, linked_adr)}" if linked_adr is not None
+             else f"Remediate {rng.choice(TAGS)} gap in {systems[0]}")
+    return {
+        "id": i + 1,
+        "debt_id": f"debt-{created_date.strftime('%Y%m%d')}-{i + 1:07d}",
+        "title": title[:500],
+        "description": f"{title}. Identified during architecture review.",
+        "linked_adr_id": linked_adr + 1 if linked_adr is not None else None,
+        "owner": rng.choice(TEAMS),
+        "priority": rng.choice(PRIORITIES),
+        "status": status,
+        "impact": rng.choice(["Slows delivery", "Increases operating cost", "Security exposure",
+                              "Blocks upgrade path", "Reduces resilience"]),
+        "effort_estimate": rng.choice(EFFORTS),
+        "created_date": created_date,
+        "target_resolution_date": target,
+        "actual_resolution_date": min(resolved, EPOCH.date()) if resolved else None,
+        "affected_systems": list(dict.fromkeys(systems)),
+        "tags": rng.sample(TAGS, rng.randint(1, 3)),
+        "created_at": created,
+        "updated_at": updated
+    }
+
+
+ROW_BUILDERS: Dict[str, Callable[[int, int, random.Random, Dict[str, int]], dict]] = {
+    "suppliers": supplier_row,
+    "products": product_row,
+    "business_apps": business_app_row,
+    "adrs": adr_row,
+    "tech_debt": tech_debt_row
+}
+
+
+def render_chunk(entity: str, start: int, end: int, seed: int, counts: Dict[str, int]):
+    """Build rows [start, end) of an entity as CSV text for COPY, returning (columns, csv_text)"""
+    builder = ROW_BUILDERS[entity]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = None
+    for i in range(start, end):
+        # Each row gets its own RNG stream so output is independent of chunking
+        row = builder(seed, i, random.Random(_salt(seed, entity) ^ i), counts)
+        if columns is None:
+            columns = list(row.keys())
+        # csv writes None as an unquoted empty field, which COPY ... CSV reads as NULL,
+        # and str() of datetimes/dates/UUIDs is already in a format PostgreSQL accepts
+        writer.writerow([json.dumps(value) if isinstance(value, (list, dict)) else value
+                         for value in (row[c] for c in columns)])
+    return columns, buffer.getvalue()
+
+
+def _connect(dsn: dict):
+    conn = psycopg2.connect(**dsn)
+    with conn.cursor() as cursor:
+        cursor.execute("SET synchronous_commit = off")
+    return conn
+
+
+def _load_chunk(args):
+    """Worker entry point: render one chunk and COPY it into its table"""
+    entity, start, end, seed, counts, dsn = args
+    columns, payload = render_chunk(entity, start, end, seed, counts)
+    conn = _connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {entity} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                io.StringIO(payload)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return end - start
+
+
+def _dsn() -> dict:
+    return {
+        "host": settings.database_host,
+        "port": settings.database_port,
+        "user": settings.database_user,
+        "password": settings.database_password,
+        "dbname": settings.database_name
+    }
+
+
+def generate(total: int, seed: int = 42, workers: Optional[int] = None,
+             progress: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, int]:
+    """
+    Replace all suppliers, products, apps, ADRs and tech debt with a synthetic
+    dataset of roughly `total` artifacts. Users are left untouched.
+    """
+    counts = plan(total)
+    dsn = _dsn()
+    workers = workers or os.cpu_count() or 4
+
+    conn = _connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE tech_debt, business_apps, adrs, products, suppliers RESTART IDENTITY CASCADE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Spawned (not forked) workers, so this is also safe from inside the threaded API server
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Entities load in FK order; chunks of one entity load in parallel
+        for entity, count in counts.items():
+            tasks = [(entity, start, min(start + CHUNK_SIZE, count), seed, counts, dsn)
+                     for start in range(0, count, CHUNK_SIZE)]
+            done = 0
+            for loaded in pool.map(_load_chunk, tasks):
+                done += loaded
+                if progress:
+                    progress(entity, done, count)
+
+    conn = _connect(dsn)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for entity in counts:
+                # Rows were inserted with explicit ids, so move sequences past them
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{entity}', 'id'), "
+                               f"COALESCE((SELECT MAX(id) FROM {entity}), 1))")
+                cursor.execute(f"ANALYZE {entity}")
+    finally:
+        conn.close()
+
+    # COPY bypasses the ORM write hooks, so geocode, count suggestions and bring the analytics cubes up to date here
+    from analytics import refresh_all_cubes
+    from database import SessionLocal
+    from services.db_adr_service import backfill_adr_links
+    from services.db_geo_service import geo_db_service
+    from services.db_suggest_service import rebuild_suggestions
+    with SessionLocal() as db:
+        geo_db_service.backfill(db)
+        backfill_adr_links(db.connection())
+        rebuild_suggestions(db.connection())
+        db.commit()
+    refresh_all_cubes()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic EA Direct portfolio")
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or an artifact count")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed; same seed gives identical data")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--yes", action="store_true", help="Do not ask before replacing existing data")
+    args = parser.parse_args()
+
+    total = parse_scale(args.scale)
+    counts = plan(total)
+    print("=" * 60)
+    print("EA Direct - Synthetic Data Generator")
+    print("=" * 60)
+    print(f"Database: {settings.database_url.split('@')[1]}")  # Hide password
+    print(f"Seed: {args.seed}  Workers: {args.workers or os.cpu_count()}")
+    for entity, count in counts.items():
+        print(f"  - {entity}: {count:,}")
+
+    if not args.yes:
+        answer = input("\nThis replaces all suppliers, products, apps, ADRs and tech debt. Continue? [y/N] ")
+        if answer.strip().lower() != "y":
+            print("Aborted.")
+            return
+
+    started = time.perf_counter()
+
+    def report(entity, done, count):
+        print(f"\r  {entity:<14} {done:>10,} / {count:,}", end="\n" if done == count else "", flush=True)
+
+    generate(total, seed=args.seed, workers=args.workers, progress=report)
+    elapsed = time.perf_counter() - started
+    print(f"\n✓ Generated {sum(counts.values()):,} artifacts in {elapsed:.1f}s "
+          f"({sum(counts.values()) / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
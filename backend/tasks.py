@@ -0,0 +1,122 @@
+"""Background job handlers (run by worker.py, enqueued by the API or on a schedule)"""
+from datetime import date
+from sqlalchemy.orm import Session
+import analytics
+from config import settings
+from database import SessionLocal
+from image_pipeline import UploadTooLarge, UnsupportedImage, process_profile_image, profile_image_variants, \
+    remove_profile_image
+from jobs import JobContext, PermanentJobError, job_handler, schedule_daily
+from services.db_archive_service import archive_db_service
+from services.db_geo_service import geo_db_service
+from services.db_tech_debt_trend_service import tech_debt_trend_db_service
+from services.db_user_service import user_service
+from storage import storage
+
+
+def incoming_upload_key(user_id: int, upload_id: str) -> str:
+    """Storage key a direct profile image upload is written to before processing"""
+    return f"incoming/{user_id}/{upload_id}"
+
+
+def attach_profile_image(db: Session, user, image_url: str):
+    """Point a user at a new profile image and drop the previous one unless it is shared"""
+    old_url = user.profile_image_url
+    user_service.update(db, user.id, profile_image_url=image_url)
+    if old_url and old_url != image_url and not user_service.count_by_profile_image(db, old_url):
+        remove_profile_image(old_url, storage)
+
+
+@job_handler("profile_image", concurrency=4, max_attempts=3)
+def process_direct_profile_upload(ctx: JobContext, user_id: int, upload_id: str):
+    """Build the variants of a directly uploaded image and attach it to the user"""
+    key = incoming_upload_key(user_id, upload_id)
+    try:
+        with storage.open(key) as fileobj:
+            image_url = process_profile_image(fileobj, storage)
+    except FileNotFoundError:
+        raise PermanentJobError("Upload not found")
+    except (UploadTooLarge, UnsupportedImage) as e:
+        storage.delete(key)
+        raise PermanentJobError(str(e))
+
+    with SessionLocal() as db:
+        user = user_service.get_by_id(db, user_id)
+        if not user:
+            raise PermanentJobError("User not found")
+        attach_profile_image(db, user, image_url)
+    storage.delete(key)
+    return {"profile_image_url": image_url, "profile_image_variants": profile_image_variants(image_url)}
+
+
+@job_handler("sample_data", concurrency=1, max_attempts=1)
+def generate_sample_data(ctx: JobContext):
+    """Replace all artifacts with the curated demo dataset"""
+    from generate_sample_data import generate_all_sample_data
+    ctx.progress(message="Generating sample data")
+    if not generate_all_sample_data():
+        raise PermanentJobError("Failed to generate sample data")
+    return {"message": "Sample data generated successfully"}
+
+
+@job_handler("synthetic_data", concurrency=1, max_attempts=2)
+def generate_synthetic_data(ctx: JobContext, total: int, seed: int = 42, workers: int | None = None):
+    """
+    Replace all artifacts with a synthetic dataset. Cancellation takes effect
+    once the chunks already handed to the loader processes have finished.
+    """
+    import synthetic_data
+    planned = synthetic_data.plan(total)
+    loaded = {entity: 0 for entity in planned}
+    planned_total = sum(planned.values())
+
+    def record_progress(entity, done, count):
+        loaded[entity] = done
+        ctx.progress(sum(loaded.values()) / planned_total * 100, message=f"Loading {entity}",
+                     planned=planned, loaded=loaded)
+
+    counts = synthetic_data.generate(total, seed=seed, workers=workers, progress=record_progress)
+    return {"seed": seed, "loaded": counts}
+
+
+@job_handler("refresh_analytics", concurrency=1, max_attempts=3)
+def refresh_analytics(ctx: JobContext, cube: str):
+    """Recompute an analytics cube after writes to its source tables"""
+    if cube not in analytics.CUBES:
+        raise PermanentJobError(f"Unknown cube: {cube}")
+    analytics.refresh_cube(cube)
+    return {"cube": cube}
+
+
+@job_handler("geocode_backfill", concurrency=1, max_attempts=3)
+def backfill_geocoding(ctx: JobContext, regeocode: bool = False, gazetteer: str | None = None):
+    """
+    Geocode suppliers and app locations that were written without the ORM, or
+    all of them again with regeocode (gazetteer names the gazetteer version
+    init_db queued the run for)
+    """
+    with SessionLocal() as db:
+        return geo_db_service.backfill(db, regeocode)
+
+
+@job_handler("tech_debt_snapshot", concurrency=1, max_attempts=3)
+def snapshot_tech_debt(ctx: JobContext, run_date: str):
+    """Record the day's tech debt counts and ages for the trend endpoints"""
+    with SessionLocal() as db:
+        rows = tech_debt_trend_db_service.take_snapshot(db, date.fromisoformat(run_date))
+    return {"snapshot_date": run_date, "rows": rows}
+
+
+@job_handler("archive", concurrency=1, max_attempts=3)
+def archive_cold_rows(ctx: JobContext, run_date: str):
+    """Move retired apps and closed tech debt that have long been unchanged to the archive tables"""
+    with SessionLocal() as db:
+        moved = archive_db_service.archive(db, {
+            "business_apps": settings.archive_retired_apps_after_days,
+            "tech_debt": settings.archive_closed_tech_debt_after_days
+        }, settings.archive_batch_size)
+    return {"run_date": run_date, "moved": moved}
+
+
+schedule_daily("tech_debt_snapshot", at=settings.tech_debt_snapshot_time)
+schedule_daily("archive", at=settings.archive_time)
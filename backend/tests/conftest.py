@@ -0,0 +1,41 @@
+"""
+Shared fixtures. Tests that need PostgreSQL run against TEST_DATABASE_URL -
+a database of their own, never the one DATABASE_* configures - inside a
+transaction rolled back afterwards, and are skipped when it is not set.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def test_engine():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy import create_engine
+    from db_models import Base
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(test_engine, monkeypatch):
+    """A session whose commits are savepoints of a transaction rolled back afterwards"""
+    from database import SessionLocal
+    from write_tracking import write_tracker
+    # Subscribers write through sessions of their own (analytics queues refresh jobs), outside the transaction
+    monkeypatch.setattr(write_tracker, "_subscribers", [])
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    session = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
@@ -0,0 +1,76 @@
+"""Near-duplicate name measures and clustering"""
+import pytest
+from dedup import Fingerprint, best_matches, find_clusters, normalize, search_fragments, similarity
+
+
+def score(a: str, b: str) -> float:
+    return similarity(Fingerprint(a), Fingerprint(b))
+
+
+def test_normalize_drops_legal_forms_accents_and_punctuation():
+    assert normalize("Microsoft Corp.") == ("microsoft",)
+    assert normalize("Société Générale SA") == ("societe", "generale")
+    assert normalize("Ernst & Young LLP") == ("ernst", "and", "young")
+    assert normalize("The Company") == ("the", "company")  # Nothing but legal forms: kept
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Microsoft", "Microsoft Corporation"),
+    ("Ernst & Young", "Ernst and Young LLP"),
+])
+def test_same_normalized_name(a, b):
+    assert score(a, b) == 1.0
+
+
+def test_typo_is_similar():
+    assert score("Microsft", "Microsoft") == pytest.approx(0.842, abs=1e-3)
+
+
+def test_different_numbers_never_match():
+    assert score("Windows 10", "Windows 11") == 0.0
+
+
+def test_shared_prefix_is_not_enough():
+    assert score("Dynamics 365 Sales", "Dynamics 365 Finance") < 0.8
+
+
+def test_unrelated():
+    assert score("Oracle", "SAP") == 0.0
+    assert score("", "SAP") == 0.0
+
+
+def test_minimum_short_circuits_to_zero():
+    assert similarity(Fingerprint("Microsft"), Fingerprint("Microsoft"), minimum=0.9) == 0.0
+
+
+def test_find_clusters():
+    records = [(1, "Microsoft"), (2, "Oracle"), (3, "Microsoft Corp."), (4, "Microsft"), (5, "Oracle Corporation"),
+               (6, "SAP")]
+    clusters, comparisons = find_clusters(records, 0.8)
+    assert [(cluster.members, cluster.score) for cluster in clusters] == [([1, 3, 4], 0.842), ([2, 5], 1.0)]
+    assert comparisons == 1  # Identical normalized names are not compared
+
+
+def test_clusters_join_only_when_their_first_members_match():
+    names = ["Northwind Traders", "Northwind Trader", "Northwind Trades", "Southwind Trades"]
+    clusters, _ = find_clusters(list(enumerate(names)), 0.75)
+    assert [cluster.members for cluster in clusters] == [[0, 1, 2]]
+
+
+def test_large_blocks_compare_neighbours_only():
+    words = ["Alpha", "Beta", "Gamma", "Delta", "Epsilon", "Zeta", "Eta", "Theta", "Iota", "Kappa"]
+    records = [(index, f"Acme Solutions {word}") for index, word in enumerate(words + ["Alpha"])]
+    clusters, windowed = find_clusters(records, 0.8, max_block=5, window=2)
+    _, every_pair = find_clusters(records, 0.8)
+    assert [cluster.members for cluster in clusters] == [[0, 10]]
+    assert windowed < every_pair
+
+
+def test_best_matches():
+    candidates = [(1, "Microsoft"), (2, "Oracle"), (3, "Microsoft Corporation")]
+    assert best_matches("Microsft", candidates, 0.8, 5) == [(1, 0.842), (3, 0.842)]
+    assert best_matches("Microsft", candidates, 0.8, 1) == [(1, 0.842)]
+
+
+def test_search_fragments():
+    assert search_fragments("Microsoft Corporation") == ["micr", "soft"]
@@ -0,0 +1,48 @@
+"""Merging near-duplicate suppliers and products"""
+import pytest
+from db_models import Product, Supplier
+from services.db_dedup_service import InvalidMerge, dedup_db_service
+
+
+def test_merge_fills_in_kept_supplier_and_moves_products(db):
+    keep = Supplier(name="Merge Test Acme Corporation", website=None, contact_email="sales@acme.example")
+    duplicate = Supplier(name="Merge Test ACME Corp", website="https://acme.example", contact_email="other@acme.example")
+    db.add_all([keep, duplicate])
+    db.flush()
+    db.add(Product(name="Acme Anvil", supplier_id=duplicate.id))
+    db.commit()
+    version = keep.lock_version
+
+    merged, moved = dedup_db_service.merge(db, "suppliers", str(keep.supplier_id), [str(duplicate.supplier_id)],
+                                           expected_version=version)
+
+    assert moved == {"products": 1}
+    assert merged.website == "https://acme.example"
+    assert merged.contact_email == "sales@acme.example"  # Only empty fields are filled in
+    assert merged.lock_version == version + 1
+    assert [product.name for product in merged.products] == ["Acme Anvil"]
+    assert db.query(Supplier).filter(Supplier.id == duplicate.id).first() is None
+
+
+def test_merge_rejects_the_kept_supplier_spelled_differently(db):
+    keep = Supplier(name="Merge Test Self Supplier")
+    db.add(keep)
+    db.commit()
+
+    with pytest.raises(InvalidMerge):
+        dedup_db_service.merge(db, "suppliers", str(keep.supplier_id), [str(keep.supplier_id).upper()])
+
+    assert db.query(Supplier).filter(Supplier.id == keep.id).first() is not None
+
+
+def test_merge_rejects_products_of_another_supplier(db):
+    first, second = Supplier(name="Merge Test First Supplier"), Supplier(name="Merge Test Second Supplier")
+    db.add_all([first, second])
+    db.flush()
+    keep, other = Product(name="Merge Test Widget", supplier_id=first.id), Product(name="Merge Test Widgets",
+                                                                                    supplier_id=second.id)
+    db.add_all([keep, other])
+    db.commit()
+
+    with pytest.raises(InvalidMerge):
+        dedup_db_service.merge(db, "products", str(keep.product_id), [str(other.product_id)])
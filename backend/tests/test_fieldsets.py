@@ -0,0 +1,22 @@
+"""Sparse fieldset (?fields=) parsing"""
+import pytest
+from fieldsets import SUPPLIER_FIELDS
+
+
+def test_absent_means_everything():
+    assert SUPPLIER_FIELDS.parse(None) is None
+
+
+def test_fields_in_order_without_repeats():
+    assert SUPPLIER_FIELDS.parse(" name, id,name ,") == ("name", "id")
+
+
+@pytest.mark.parametrize("value", ["", " , ", "id,bogus"])
+def test_invalid(value):
+    with pytest.raises(ValueError, match="Allowed values: id, name"):
+        SUPPLIER_FIELDS.parse(value)
+
+
+def test_unknown_fields_are_named():
+    with pytest.raises(ValueError, match="Invalid fields: bogus"):
+        SUPPLIER_FIELDS.parse("id,bogus")
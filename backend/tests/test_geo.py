@@ -0,0 +1,26 @@
+"""Map bounding-box parsing"""
+import pytest
+from services.db_geo_service import WORLD, parse_bbox
+
+
+def test_empty_is_the_whole_world():
+    assert parse_bbox(None) == WORLD
+    assert parse_bbox("") == WORLD
+
+
+def test_parse_bbox():
+    assert parse_bbox("-10.5,35,30,60") == (-10.5, 35.0, 30.0, 60.0)
+
+
+def test_longitudes_past_the_antimeridian_wrap():
+    assert parse_bbox("170,-10,190,10") == (170.0, -10.0, -170.0, 10.0)
+
+
+def test_boxes_wider_than_the_world_are_the_world():
+    assert parse_bbox("-200,-10,200,10") == (-180.0, -10.0, 180.0, 10.0)
+
+
+@pytest.mark.parametrize("value", ["1,2,3", "a,b,c,d", "0,10,10,5", "0,-100,10,10"])
+def test_invalid(value):
+    with pytest.raises(ValueError):
+        parse_bbox(value)
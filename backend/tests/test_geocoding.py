@@ -0,0 +1,57 @@
+"""Offline geocoding of addresses and location names"""
+import pytest
+from geocoding import geocode, normalize
+
+
+@pytest.mark.parametrize("text, name", [
+    ("One Microsoft Way, Redmond, WA 98052, USA", "Redmond"),
+    ("Sydney NSW 2000, Australia", "Sydney"),
+    ("Bahnhofstrasse 1, 8001 Zürich, CH", "Zurich"),
+    ("Somewhere, Toronto, CA", "Toronto"),
+    ("Washington, DC 20001", "Washington"),
+    ("Singapore", "Singapore"),
+])
+def test_known_city_wins(text, name):
+    assert geocode(text).name == name
+
+
+@pytest.mark.parametrize("text, state", [
+    ("Sacramento, CA", "California"),
+    ("Pleasanton, CA", "California"),
+    ("Boulder, CO", "Colorado"),
+    ("Springfield, IL", "Illinois"),
+    ("1 Main St, Springfield, IL", "Illinois"),
+    ("1 Capitol Mall, Sacramento, CA 95814, USA", "California"),
+    ("500 Pearl St, Boulder, CO 80302, USA", "Colorado"),
+    ("10 Elm St, Springfield, IL 62701, USA", "Illinois"),
+])
+def test_us_state_codes_are_not_countries(text, state):
+    place = geocode(text)
+    assert (place.name, place.kind, place.country) == (state, "state", "US")
+
+
+@pytest.mark.parametrize("text, country", [
+    ("Main St, Nowhere, U.S.", "United States"),
+    ("Nowhere, FR", "France"),
+    ("Nowhere, FR, USA", "United States"),
+    ("Unknown town, Israel", "Israel"),
+])
+def test_country(text, country):
+    place = geocode(text)
+    assert (place.name, place.kind) == (country, "country")
+
+
+def test_country_code_only_counts_as_the_last_part():
+    assert geocode("Nowhere, FR 75001") is None
+    assert geocode("Nowhere, FR, Somewhere") is None
+    assert geocode("EMEA").kind == "region"
+
+
+@pytest.mark.parametrize("text", [None, "", "Nowhere at all", "12345"])
+def test_unknown(text):
+    assert geocode(text) is None
+
+
+def test_normalize():
+    assert normalize("Zürich 8001") == "zurich"
+    assert normalize("  St.  Gallen ") == "st gallen"
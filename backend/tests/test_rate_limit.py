@@ -0,0 +1,45 @@
+"""In-process token buckets"""
+import pytest
+import rate_limit
+from rate_limit import MemoryBuckets
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_take_until_empty_then_refill(clock):
+    buckets = MemoryBuckets()
+    assert buckets.take("user:1", capacity=2, rate=1) is None
+    assert buckets.take("user:1", capacity=2, rate=1) is None
+    assert buckets.take("user:1", capacity=2, rate=1) == pytest.approx(1.0)
+    clock[0] += 0.5
+    assert buckets.take("user:1", capacity=2, rate=1) == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert buckets.take("user:1", capacity=2, rate=1) is None
+
+
+def test_refill_is_capped_at_capacity(clock):
+    buckets = MemoryBuckets()
+    assert buckets.take("ip:a", capacity=1, rate=1) is None
+    clock[0] += 60
+    assert buckets.take("ip:a", capacity=1, rate=1) is None
+    assert buckets.take("ip:a", capacity=1, rate=1) is not None
+
+
+def test_keys_are_independent(clock):
+    buckets = MemoryBuckets()
+    assert buckets.take("ip:a", capacity=1, rate=1) is None
+    assert buckets.take("ip:b", capacity=1, rate=1) is None
+
+
+def test_least_recently_used_key_dropped_beyond_max_keys(clock):
+    buckets = MemoryBuckets(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        buckets.take(key, capacity=2, rate=0.001)
+    # "a" was used again after "b", so "b" was dropped and starts full again
+    assert buckets.take("a", capacity=2, rate=0.001) is not None
+    assert buckets.take("b", capacity=1, rate=0.001) is None
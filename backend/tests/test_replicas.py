@@ -0,0 +1,23 @@
+"""WAL position (LSN) parsing for read-your-writes routing"""
+import pytest
+from replicas import format_lsn, parse_lsn
+
+
+def test_parse_lsn():
+    assert parse_lsn("16/B374D848") == (0x16 << 32) + 0xB374D848
+    assert parse_lsn("0/0") == 0
+    assert parse_lsn("16/b374d848") == parse_lsn("16/B374D848")
+
+
+def test_lsns_compare_as_positions():
+    assert parse_lsn("1/0") > parse_lsn("0/FFFFFFFF")
+
+
+@pytest.mark.parametrize("value", [None, "", "16", "16/", "/B374D848", "1/2/3", "zz/1", "123456789/0", "16/B374D848 "])
+def test_parse_lsn_rejects_malformed(value):
+    assert parse_lsn(value) is None
+
+
+@pytest.mark.parametrize("value", ["0/0", "16/B374D848", "FFFFFFFF/FFFFFFFF"])
+def test_format_lsn_round_trips(value):
+    assert format_lsn(parse_lsn(value)) == value
@@ -0,0 +1,37 @@
+"""If-Match parsing and version checks"""
+import pytest
+from versioning import VersionConflict, check_version, etag, parse_if_match
+
+
+@pytest.mark.parametrize("value, version", [
+    (None, None),
+    ("*", None),
+    (' * ', None),
+    ('"3"', 3),
+    ("3", 3),
+    (' "12" ', 12),
+])
+def test_parse_if_match(value, version):
+    assert parse_if_match(value) == version
+
+
+@pytest.mark.parametrize("value", ['W/"3"', '"3", "4"', '"abc"', '""', ""])
+def test_parse_if_match_rejects_anything_but_one_strong_tag(value):
+    with pytest.raises(ValueError):
+        parse_if_match(value)
+
+
+def test_etag_round_trips():
+    assert parse_if_match(etag(7)) == 7
+
+
+class Row:
+    lock_version = 4
+
+
+def test_check_version():
+    check_version(Row(), None)
+    check_version(Row(), 4)
+    with pytest.raises(VersionConflict) as conflict:
+        check_version(Row(), 3)
+    assert conflict.value.current_version == 4
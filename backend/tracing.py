@@ -0,0 +1,196 @@
+"""
+OpenTelemetry request tracing
+
+Creates spans for every HTTP request, database service method, SQL statement,
+model conversion, response-model validation and JSON encoding. Incoming W3C
+`traceparent` headers (forwarded by nginx) are honoured so spans join an
+upstream trace. Spans are written to a local JSON-lines file by default so
+tracing works offline; set TRACING_EXPORTER=otlp to send them to a collector.
+
+Tracing is disabled unless TRACING_ENABLED is set; while disabled, the
+decorators below return their targets unchanged and add no overhead.
+"""
+import functools
+import inspect
+from pathlib import Path
+from typing import Optional
+from opentelemetry import trace
+from opentelemetry.propagate import extract
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from fastapi.responses import JSONResponse
+from config import settings
+
+tracer = trace.get_tracer("ea-direct")
+
+
+def _create_exporter():
+    """Create the span exporter selected by TRACING_EXPORTER"""
+    if settings.tracing_exporter == "otlp":
+        # Endpoint is read from OTEL_EXPORTER_OTLP_ENDPOINT (default http://localhost:4318)
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+    if settings.tracing_exporter == "console":
+        return ConsoleSpanExporter()
+
+    path = Path(settings.tracing_file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return ConsoleSpanExporter(
+        out=open(path, "a", buffering=1),
+        formatter=lambda span: span.to_json(indent=None) + "\n"
+    )
+
+
+def setup_tracing(app, *engines):
+    """Install the tracer provider, request middleware and SQL statement hooks"""
+    if not settings.tracing_enabled:
+        return
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.tracing_service_name}))
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter(), max_queue_size=16384))
+    trace.set_tracer_provider(provider)
+
+    app.add_middleware(TracingMiddleware)
+    for engine in engines:
+        _instrument_engine(engine)
+    _instrument_response_serialization()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        method = scope["method"]
+
+        with tracer.start_as_current_span(
+            f"{method} {scope['path']}",
+            context=extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]}
+        ) as span:
+            if "x-request-id" in headers:
+                span.set_attribute("http.request_id", headers["x-request-id"])
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+
+            # The matched route is only known once routing has happened
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                span.update_name(f"{method} {route.path}")
+                span.set_attribute("http.route", route.path)
+
+
+def _instrument_engine(engine):
+    """Open a span around every SQL statement executed by the engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        context._otel_span = tracer.start_span(
+            f"SQL {operation}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": conn.dialect.name,
+                "db.statement": statement,
+                "db.executemany": executemany
+            }
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_otel_span", None)
+        if span is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+            context._otel_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _fail_sql_span(exception_context):
+        span = getattr(exception_context.execution_context, "_otel_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+            exception_context.execution_context._otel_span = None
+
+
+def _instrument_response_serialization():
+    """Wrap FastAPI's response-model validation step in a span"""
+    import fastapi.routing
+
+    # serialize_response is looked up as a module global on every request,
+    # so replacing it here covers all routes
+    serialize_response = fastapi.routing.serialize_response
+
+    @functools.wraps(serialize_response)
+    async def traced_serialize_response(*args, **kwargs):
+        with tracer.start_as_current_span("fastapi.serialize_response"):
+            return await serialize_response(*args, **kwargs)
+
+    fastapi.routing.serialize_response = traced_serialize_response
+
+
+class TracedJSONResponse(JSONResponse):
+    """JSONResponse that records JSON encoding time in its own span"""
+
+    def render(self, content) -> bytes:
+        with tracer.start_as_current_span("json.encode") as span:
+            body = super().render(content)
+            span.set_attribute("response.bytes", len(body))
+            return body
+
+
+def traced(name: Optional[str] = None):
+    """Decorator wrapping a function call in a span"""
+    def decorator(func):
+        if not settings.tracing_enabled:
+            return func
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_service(cls):
+    """Class decorator wrapping every public method of a service in a span"""
+    if not settings.tracing_enabled:
+        return cls
+    for attr_name, attr in list(vars(cls).items()):
+        if not attr_name.startswith("_") and inspect.isfunction(attr):
+            setattr(cls, attr_name, traced(f"{cls.__name__}.{attr_name}")(attr))
+    return cls
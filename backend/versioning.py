@@ -0,0 +1,52 @@
+"""
+Optimistic concurrency control for entity writes
+
+Users and architecture artifacts carry a lock_version column that SQLAlchemy
+(version_id_col) increments on every ORM update and checks in the same
+statement:
+
+    UPDATE adrs SET ..., lock_version = 4 WHERE adrs.id = 7 AND adrs.lock_version = 3
+
+A write committed by someone else between reading a row and writing it makes
+the statement match nothing, so it fails instead of being overwritten - and no
+row lock is held while the request runs. Clients send the version they edited
+as If-Match (GET, POST and PUT responses carry it as the ETag, and as
+lock_version in the body); a mismatch, found when the row is loaded or by the
+conditional UPDATE/DELETE, is answered with 412 Precondition Failed.
+"""
+import re
+from typing import Optional
+
+_ENTITY_TAG = re.compile(r'^"?(\d+)"?$')
+
+
+class VersionConflict(Exception):
+    """The stored version is not the one the client edited"""
+
+    def __init__(self, current_version: Optional[int] = None):
+        super().__init__("The resource was modified by another request")
+        self.current_version = current_version
+
+
+def check_version(obj, expected_version: Optional[int]):
+    """Raise VersionConflict unless there is no precondition or it matches the loaded row"""
+    if expected_version is not None and obj.lock_version != expected_version:
+        raise VersionConflict(obj.lock_version)
+
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """
+    The version in an If-Match header: None when absent or "*" (any current
+    version). Raises ValueError for anything but a single strong entity tag;
+    weak tags never match under If-Match.
+    """
+    if value is None or value.strip() == "*":
+        return None
+    match = _ENTITY_TAG.match(value.strip())
+    if not match:
+        raise ValueError('If-Match must be a single entity tag such as "3"')
+    return int(match.group(1))
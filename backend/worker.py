@@ -0,0 +1,82 @@
+"""
+Background job worker
+
+Runs queued jobs from the jobs table (see jobs.py). Start as many worker
+processes as needed, on any host that can reach the database:
+
+    python worker.py                          # all job types, JOB_WORKER_CONCURRENCY threads
+    python worker.py --concurrency 8
+    python worker.py --types profile_image    # dedicate a worker to some job types
+"""
+import argparse
+import signal
+import threading
+import time
+from config import settings
+from jobs import Worker, registered_types
+import tasks  # noqa: F401  (registers the job handlers)
+
+
+def run_thread(worker: Worker, stop: threading.Event):
+    """Claim and run jobs until stopped, sleeping while the queue is empty"""
+    while not stop.is_set():
+        try:
+            job = worker.claim()
+        except Exception as e:
+            print(f"⚠️  Claiming failed: {e}")
+            job = None
+        if job is None:
+            stop.wait(settings.job_poll_interval_seconds)
+            continue
+        print(f"▶ {job.job_type} {job.id} (attempt {job.attempts}/{job.max_attempts})")
+        started = time.perf_counter()
+        worker.run(job)
+        print(f"■ {job.job_type} {job.id} finished in {time.perf_counter() - started:.1f}s")
+
+
+def run_maintenance(worker: Worker, stop: threading.Event):
+    """Heartbeat running jobs, requeue jobs of workers that died and enqueue scheduled jobs"""
+    interval = max(settings.job_lease_seconds / 3, 1)
+    while not stop.wait(interval):
+        try:
+            worker.heartbeat()
+            requeued = worker.requeue_expired()
+            if requeued:
+                print(f"↻ Recovered {requeued} job(s) with expired leases")
+            scheduled = worker.enqueue_scheduled()
+            if scheduled:
+                print(f"⏰ Enqueued {scheduled} scheduled job(s)")
+        except Exception as e:
+            print(f"⚠️  Maintenance failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run EA Direct background jobs")
+    parser.add_argument("--concurrency", type=int, default=settings.job_worker_concurrency,
+                        help="Number of jobs this process runs at once")
+    parser.add_argument("--types", help="Comma-separated job types to handle (default: all)")
+    args = parser.parse_args()
+
+    job_types = args.types.split(",") if args.types else None
+    worker = Worker(job_types)
+    if not worker.job_types:
+        parser.error(f"No known job types. Available: {', '.join(registered_types())}")
+
+    stop = threading.Event()
+    # Finish the current jobs on SIGTERM/SIGINT instead of abandoning them to lease expiry
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    print(f"Worker {worker.worker_id}: {args.concurrency} thread(s), job types: {', '.join(worker.job_types)}")
+    threads = [threading.Thread(target=run_thread, args=(worker, stop), daemon=True)
+               for _ in range(args.concurrency)]
+    threads.append(threading.Thread(target=run_maintenance, args=(worker, stop), daemon=True))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Which tables a session's committed transaction wrote to
+
+One set of session listeners records the tables each transaction writes -
+flushed ORM objects, bulk ORM INSERT/UPDATE/DELETE, and tables named with
+note_writes() for raw SQL - and hands them to every subscriber once the
+transaction commits. Read-your-writes LSNs (replicas.py), analytics cube
+refreshes (analytics.py) and cache invalidation (cache.py) all subscribe
+here instead of each listening to the session on its own.
+"""
+from typing import Callable, List, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+# Table names written by the session's open transaction; present once it wrote anything
+_WRITTEN = "written_tables"
+
+Subscriber = Callable[[Session, Set[str]], None]
+
+
+class WriteTracker:
+    """Calls its subscribers with the tables written after each commit that wrote something"""
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+
+    def install(self, session_factory: sessionmaker):
+        """Track the sessions made by a factory"""
+        event.listen(session_factory, "after_flush", _note_flush)
+        event.listen(session_factory, "do_orm_execute", _note_bulk_write)
+        event.listen(session_factory, "after_commit", self._after_commit)
+        event.listen(session_factory, "after_rollback", _clear)
+
+    def subscribe(self, subscriber: Subscriber):
+        """
+        Call subscriber(session, tables) after each commit that wrote. tables
+        may be empty when the only writes were DML whose table is unknown
+        (Core statements on a Table); the transaction is already committed.
+        """
+        self._subscribers.append(subscriber)
+
+    def _after_commit(self, session: Session):
+        tables = session.info.pop(_WRITTEN, None)
+        if tables is None:
+            return
+        for subscriber in self._subscribers:
+            subscriber(session, tables)
+
+
+def note_writes(session: Session, *tables: str):
+    """Record writes the listeners cannot see, such as raw SQL DML, for the session's open transaction"""
+    session.info.setdefault(_WRITTEN, set()).update(tables)
+
+
+def _note_flush(session, flush_context):
+    written = session.info.setdefault(_WRITTEN, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            written.add(table.name)
+
+
+def _note_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        written = orm_execute_state.session.info.setdefault(_WRITTEN, set())
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            written.add(mapper.local_table.name)
+
+
+def _clear(session):
+    session.info.pop(_WRITTEN, None)
+
+
+write_tracker = WriteTracker()
@@ -2,6 +2,7 @@ import React from 'react'
 import { BrowserRouter as Router, Routes, Route, Link, NavLink, useLocation } from 'react-router-dom'
 import { FiHome, FiPackage, FiFileText, FiAlertTriangle, FiSearch, FiUsers, FiLogOut, FiShoppingBag } from 'react-icons/fi'
 import { AuthProvider, useAuth } from './contexts/AuthContext'
+import { profileImageSrcSet, storageUrl } from './api'
 import ProtectedRoute from './components/ProtectedRoute'
 import Breadcrumb from './components/Breadcrumb'
 import Login from './pages/Login'
@@ -76,7 +77,7 @@ function AppContent() {
               }}
               >
                 {user.profileImage ? (
-                  <img src={`/api${user.profileImage}`} alt={user.name} style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
+                  <img src={storageUrl(user.profileImage)} srcSet={profileImageSrcSet(user.profileImage)} sizes="40px" alt={user.name} style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
                 ) : (
                   user.name.split(' ').map(n => n[0]).join('').toUpperCase()
                 )}
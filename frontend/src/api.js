@@ -9,12 +9,42 @@ const api = axios.create({
   }
 })
 
+// Attach the access token issued at login to every request
+api.interceptors.request.use((config) => {
+  const storedUser = localStorage.getItem('user')
+  if (storedUser) {
+    try {
+      const { token } = JSON.parse(storedUser)
+      if (token) {
+        config.headers.Authorization = `Bearer ${token}`
+      }
+    } catch (error) {
+      // Ignore malformed stored user; AuthContext clears it on load
+    }
+  }
+  return config
+})
+
+// Updates send the lock_version they were made against; the server answers 412 if it has changed since
+const ifMatch = (version) => (version ? { 'If-Match': `"${version}"` } : {})
+
+export const isConflict = (error) => error.response?.status === 412
+
+export const CONFLICT_MESSAGE = 'This item was changed by someone else since you opened it. Reload to see their changes.'
+
+// Creating a supplier or business app answers 409 with the similarly named ones; create again with allowDuplicates
+export const similarItems = (error) =>
+  (error.response?.status === 409 && error.response.data?.detail?.duplicates) || null
+
 // ADR API
 export const adrApi = {
-  list: () => api.get('/adrs'),
+  list: (params) => api.get('/adrs', { params }),
   get: (id) => api.get(`/adrs/${id}`),
+  getBundle: (id) => api.get(`/adrs/${id}/bundle`),
+  getGraph: (id, params) => api.get(`/adrs/${id}/graph`, { params }),
+  getSupersession: (id) => api.get(`/adrs/${id}/supersession`),
   create: (data) => api.post('/adrs', data),
-  update: (id, data) => api.put(`/adrs/${id}`, data),
+  update: (id, data, version) => api.put(`/adrs/${id}`, data, { headers: ifMatch(version) }),
   delete: (id) => api.delete(`/adrs/${id}`),
   getHistory: (id) => api.get(`/adrs/${id}/history`),
   getTechDebt: (id) => api.get(`/adrs/${id}/tech-debt`)
@@ -22,21 +52,27 @@ export const adrApi = {
 
 // Business App API
 export const businessAppApi = {
-  list: () => api.get('/business-apps'),
+  list: (params) => api.get('/business-apps', { params }),
   get: (id) => api.get(`/business-apps/${id}`),
-  create: (data) => api.post('/business-apps', data),
-  update: (id, data) => api.put(`/business-apps/${id}`, data),
+  getBundle: (id) => api.get(`/business-apps/${id}/bundle`),
+  create: (data, allowDuplicates = false) =>
+    api.post('/business-apps', data, { params: allowDuplicates ? { allow_duplicates: true } : {} }),
+  update: (id, data, version) => api.put(`/business-apps/${id}`, data, { headers: ifMatch(version) }),
   delete: (id) => api.delete(`/business-apps/${id}`),
+  restore: (id) => api.post(`/business-apps/${id}/restore`),
+  merge: (id, duplicateIds, version) =>
+    api.post(`/business-apps/${id}/merge`, { duplicate_ids: duplicateIds }, { headers: ifMatch(version) }),
   getHistory: (id) => api.get(`/business-apps/${id}/history`)
 }
 
 // Tech Debt API
 export const techDebtApi = {
-  list: () => api.get('/tech-debt'),
+  list: (params) => api.get('/tech-debt', { params }),
   get: (id) => api.get(`/tech-debt/${id}`),
   create: (data) => api.post('/tech-debt', data),
-  update: (id, data) => api.put(`/tech-debt/${id}`, data),
+  update: (id, data, version) => api.put(`/tech-debt/${id}`, data, { headers: ifMatch(version) }),
   delete: (id) => api.delete(`/tech-debt/${id}`),
+  restore: (id) => api.post(`/tech-debt/${id}/restore`),
   getHistory: (id) => api.get(`/tech-debt/${id}/history`)
 }
 
@@ -51,21 +87,50 @@ export const searchApi = {
 
 // Supplier API
 export const supplierApi = {
-  list: () => api.get('/suppliers'),
+  // params: { include: 'products,app_counts', limit, offset }; the total is in the X-Total-Count header
+  list: (params) => api.get('/suppliers', { params }),
   get: (id) => api.get(`/suppliers/${id}`),
-  create: (data) => api.post('/suppliers', data),
-  update: (id, data) => api.put(`/suppliers/${id}`, data),
-  delete: (id) => api.delete(`/suppliers/${id}`)
+  create: (data, allowDuplicates = false) =>
+    api.post('/suppliers', data, { params: allowDuplicates ? { allow_duplicates: true } : {} }),
+  update: (id, data, version) => api.put(`/suppliers/${id}`, data, { headers: ifMatch(version) }),
+  delete: (id) => api.delete(`/suppliers/${id}`),
+  merge: (id, duplicateIds, version) =>
+    api.post(`/suppliers/${id}/merge`, { duplicate_ids: duplicateIds }, { headers: ifMatch(version) })
 }
 
 // Product API
 export const productApi = {
-  list: () => api.get('/products'),
+  list: (params) => api.get('/products', { params }),
   listBySupplier: (supplierId) => api.get(`/suppliers/${supplierId}/products`),
   get: (id) => api.get(`/products/${id}`),
   create: (data) => api.post('/products', data),
-  update: (id, data) => api.put(`/products/${id}`, data),
-  delete: (id) => api.delete(`/products/${id}`)
+  update: (id, data, version) => api.put(`/products/${id}`, data, { headers: ifMatch(version) }),
+  delete: (id) => api.delete(`/products/${id}`),
+  merge: (id, duplicateIds, version) =>
+    api.post(`/products/${id}/merge`, { duplicate_ids: duplicateIds }, { headers: ifMatch(version) })
+}
+
+// Exposure API (business apps per supplier/product; filters e.g. { status: 'active' })
+export const exposureApi = {
+  suppliers: (filters = {}) => api.get('/exposure/suppliers', { params: filters, paramsSerializer: { indexes: null } }),
+  supplier: (id, filters = {}) => api.get(`/exposure/suppliers/${id}`, { params: filters, paramsSerializer: { indexes: null } }),
+  products: (filters = {}) => api.get('/exposure/products', { params: filters, paramsSerializer: { indexes: null } })
+}
+
+// Map API (clustered points; bbox is "west,south,east,north", e.g. map.getBounds().toBBoxString())
+export const geoApi = {
+  suppliers: (bbox, zoom) => api.get('/geo/suppliers', { params: { bbox, zoom } }),
+  businessApps: (bbox, zoom) => api.get('/geo/business-apps', { params: { bbox, zoom } })
+}
+
+// Suggest API (type-ahead values of free-text fields: owner, technology, cloud_provider, tag, app_name)
+export const suggestApi = {
+  suggest: (field, prefix, limit = 10) => api.get('/suggest', { params: { field, prefix, limit } })
+}
+
+// Duplicates API (clusters of similarly named 'suppliers', 'products' or 'business-apps', to merge)
+export const duplicatesApi = {
+  report: (entityType, params) => api.get(`/duplicates/${entityType}`, { params })
 }
 
 // Dashboard API
@@ -73,4 +138,62 @@ export const dashboardApi = {
   getStats: () => api.get('/dashboard')
 }
 
+// Analytics API (cross-tab counts; pass dimension filters as params, e.g. { status: 'active' })
+export const analyticsApi = {
+  getCubes: () => api.get('/analytics/cubes'),
+  query: (cube, { groupBy = [], pivot, filters = {} } = {}) =>
+    api.get(`/analytics/${cube}`, { params: { group_by: groupBy.join(','), pivot, ...filters }, paramsSerializer: { indexes: null } }),
+  downloadCsv: (cube, { groupBy = [], pivot, filters = {} } = {}) =>
+    api.get(`/analytics/${cube}`, {
+      params: { group_by: groupBy.join(','), pivot, format: 'csv', ...filters },
+      paramsSerializer: { indexes: null },
+      responseType: 'blob'
+    })
+}
+
+// Admin diagnostics API
+export const adminApi = {
+  getQueryStats: (orderBy = 'total_ms', limit = 50) => api.get('/admin/query-stats', { params: { order_by: orderBy, limit } }),
+  getQueryPlans: () => api.get('/admin/query-stats/plans'),
+  resetQueryStats: () => api.delete('/admin/query-stats')
+}
+
+// Background jobs API
+export const jobApi = {
+  get: (id) => api.get(`/jobs/${id}`),
+  list: (params) => api.get('/jobs', { params }),
+  cancel: (id) => api.post(`/jobs/${id}/cancel`)
+}
+
+// Poll a background job until it finishes. Resolves with the job once it has
+// succeeded, rejects with its error if it failed or was cancelled.
+export const waitForJob = async (jobId, { interval = 1000, timeout = 300000, onProgress } = {}) => {
+  const deadline = Date.now() + timeout
+  while (Date.now() < deadline) {
+    const { data: job } = await jobApi.get(jobId)
+    if (job.status === 'succeeded') return job
+    if (job.status === 'failed' || job.status === 'cancelled') {
+      throw new Error(job.error || `Job ${job.status}`)
+    }
+    if (onProgress && job.progress) onProgress(job.progress)
+    await new Promise(resolve => setTimeout(resolve, interval))
+  }
+  throw new Error('Timed out waiting for background job')
+}
+
+// Stored files are either served by the API (relative URLs, local storage backend)
+// or straight from object storage (absolute URLs, S3 backend)
+export const storageUrl = (url) => (/^https?:\/\//.test(url) ? url : `/api${url}`)
+
+// Content-addressed profile images (.../profile_images/<hash>/<size>.jpg)
+// also exist at 32/64/128/400px as WebP; build a srcset so browsers fetch the smallest fit
+const PROFILE_IMAGE_SIZES = [32, 64, 128, 400]
+const PROFILE_IMAGE_PATTERN = /^(.*\/profile_images\/[0-9a-f]{64})\/\d+\.(jpg|webp)$/
+
+export const profileImageSrcSet = (url) => {
+  const match = PROFILE_IMAGE_PATTERN.exec(url || '')
+  if (!match) return undefined
+  return PROFILE_IMAGE_SIZES.map(size => `${storageUrl(`${match[1]}/${size}.webp`)} ${size}w`).join(', ')
+}
+
 export default api
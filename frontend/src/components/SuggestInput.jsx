@@ -0,0 +1,55 @@
+import React, { useEffect, useId, useState } from 'react'
+import { suggestApi } from '../api'
+
+// Wait for a pause in typing before asking the server
+const DEBOUNCE_MS = 150
+
+// A text input offering values already used for a field (see GET /suggest), most used first
+function SuggestInput({ field, value, ...inputProps }) {
+  const listId = useId()
+  const [suggestions, setSuggestions] = useState([])
+  // Nothing is fetched for fields the user never visits
+  const [focused, setFocused] = useState(false)
+
+  useEffect(() => {
+    if (!focused) return
+    let cancelled = false
+    const timer = setTimeout(async () => {
+      try {
+        const response = await suggestApi.suggest(field, value || '')
+        if (!cancelled) {
+          setSuggestions(response.data.suggestions.map((suggestion) => suggestion.value))
+        }
+      } catch (err) {
+        console.error('Failed to load suggestions:', err)
+      }
+    }, DEBOUNCE_MS)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [field, value, focused])
+
+  return (
+    <>
+      <input
+        type="text"
+        {...inputProps}
+        value={value}
+        list={listId}
+        autoComplete="off"
+        onFocus={(e) => {
+          setFocused(true)
+          inputProps.onFocus?.(e)
+        }}
+      />
+      <datalist id={listId}>
+        {suggestions.map((suggestion) => (
+          <option key={suggestion} value={suggestion} />
+        ))}
+      </datalist>
+    </>
+  )
+}
+
+export default SuggestInput
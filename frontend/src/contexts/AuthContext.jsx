@@ -38,6 +38,11 @@ export const AuthProvider = ({ children }) => {
         body: JSON.stringify({ email, password })
       })
 
+      if (response.status === 429) {
+        const retryAfter = response.headers.get('Retry-After')
+        return { success: false, error: `Too many login attempts. Try again in ${retryAfter || 'a few'} seconds.` }
+      }
+
       const data = await response.json()
 
       if (!response.ok || !data.success) {
@@ -51,7 +56,8 @@ export const AuthProvider = ({ children }) => {
         name: data.user.name,
         role: data.user.role,
         authProvider: data.user.auth_provider,
-        profileImage: data.user.profile_image_url
+        profileImage: data.user.profile_image_url,
+        token: data.access_token
       }
 
       setUser(userData)
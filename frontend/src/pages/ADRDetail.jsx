@@ -7,6 +7,9 @@ function ADRDetail() {
   const navigate = useNavigate()
   const [adr, setAdr] = useState(null)
   const [techDebt, setTechDebt] = useState([])
+  const [relatedAdrs, setRelatedAdrs] = useState([])
+  const [referencedBy, setReferencedBy] = useState([])
+  const [supersession, setSupersession] = useState(null)
   const [history, setHistory] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
@@ -14,14 +17,20 @@ function ADRDetail() {
 
   useEffect(() => {
     loadADR()
-    loadTechDebt()
   }, [id])
 
   const loadADR = async () => {
     try {
       setLoading(true)
-      const response = await adrApi.get(id)
-      setAdr(response.data)
+      const [response, supersessionResponse] = await Promise.all([
+        adrApi.getBundle(id),
+        adrApi.getSupersession(id)
+      ])
+      setAdr(response.data.adr)
+      setTechDebt(response.data.tech_debt)
+      setRelatedAdrs(response.data.related_adrs)
+      setReferencedBy(response.data.referenced_by)
+      setSupersession(supersessionResponse.data)
       setError(null)
     } catch (err) {
       setError('Failed to load ADR')
@@ -31,15 +40,6 @@ function ADRDetail() {
     }
   }
 
-  const loadTechDebt = async () => {
-    try {
-      const response = await adrApi.getTechDebt(id)
-      setTechDebt(response.data)
-    } catch (err) {
-      console.error('Failed to load tech debt:', err)
-    }
-  }
-
   const loadHistory = async () => {
     try {
       const response = await adrApi.getHistory(id)
@@ -76,8 +76,26 @@ function ADRDetail() {
   if (error) return <div className="error">{error}</div>
   if (!adr) return <div className="error">ADR not found</div>
 
+  // Titles of the ADRs in this one's supersession chain, for its supersedes list
+  const chainTitles = Object.fromEntries((supersession?.chain || []).map((entry) => [entry.id, entry.title]))
+  const currentDecisions = (supersession?.current || []).filter((current) => current.id !== id)
+  const isCurrent = (supersession?.current || []).some((current) => current.id === id)
+
   return (
     <div>
+      {!isCurrent && currentDecisions.length > 0 && (
+        <div className="card" style={{ background: '#fef3c7', borderColor: '#fbbf24' }}>
+          <strong>Superseded.</strong> Current decision{currentDecisions.length > 1 ? 's' : ''}:{' '}
+          {currentDecisions.map((current) => (
+            <Link key={current.id} to={`/adrs/${current.id}`}>
+              <span className="tag" style={{ cursor: 'pointer', background: '#dbeafe', color: '#1e40af' }} title={current.id}>
+                {current.title}
+              </span>
+            </Link>
+          ))}
+        </div>
+      )}
+
       <div className="card">
         <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'flex-start', marginBottom: '1rem' }}>
           <div>
@@ -91,13 +109,49 @@ function ADRDetail() {
                 ))}
               </div>
             )}
-            {adr.related_adrs && adr.related_adrs.length > 0 && (
+            {relatedAdrs.length > 0 && (
               <div style={{ marginTop: '0.5rem' }}>
                 <strong style={{ fontSize: '0.875rem' }}>Related ADRs: </strong>
-                {adr.related_adrs.map((relatedAdr, index) => (
-                  <Link key={index} to={`/adrs/${relatedAdr}`}>
+                {relatedAdrs.map((relatedAdr) => (
+                  <Link key={relatedAdr.id} to={`/adrs/${relatedAdr.id}`}>
+                    <span className="tag" style={{ cursor: 'pointer', background: '#dbeafe', color: '#1e40af' }} title={relatedAdr.id}>
+                      {relatedAdr.title}
+                    </span>
+                  </Link>
+                ))}
+              </div>
+            )}
+            {adr.supersedes && adr.supersedes.length > 0 && (
+              <div style={{ marginTop: '0.5rem' }}>
+                <strong style={{ fontSize: '0.875rem' }}>Supersedes: </strong>
+                {adr.supersedes.map((supersededId) => (
+                  <Link key={supersededId} to={`/adrs/${supersededId}`}>
+                    <span className="tag" style={{ cursor: 'pointer', background: '#f3f4f6', color: '#4b5563' }} title={supersededId}>
+                      {chainTitles[supersededId] || supersededId}
+                    </span>
+                  </Link>
+                ))}
+              </div>
+            )}
+            {adr.amends && adr.amends.length > 0 && (
+              <div style={{ marginTop: '0.5rem' }}>
+                <strong style={{ fontSize: '0.875rem' }}>Amends: </strong>
+                {adr.amends.map((amendedId) => (
+                  <Link key={amendedId} to={`/adrs/${amendedId}`}>
                     <span className="tag" style={{ cursor: 'pointer', background: '#dbeafe', color: '#1e40af' }}>
-                      {relatedAdr}
+                      {amendedId}
+                    </span>
+                  </Link>
+                ))}
+              </div>
+            )}
+            {referencedBy.length > 0 && (
+              <div style={{ marginTop: '0.5rem' }}>
+                <strong style={{ fontSize: '0.875rem' }}>Referenced by: </strong>
+                {referencedBy.map((referencingAdr) => (
+                  <Link key={referencingAdr.id} to={`/adrs/${referencingAdr.id}`}>
+                    <span className="tag" style={{ cursor: 'pointer', background: '#dbeafe', color: '#1e40af' }} title={referencingAdr.id}>
+                      {referencingAdr.title}
                     </span>
                   </Link>
                 ))}
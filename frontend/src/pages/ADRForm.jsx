@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
-import { adrApi } from '../api'
+import { adrApi, isConflict, CONFLICT_MESSAGE } from '../api'
 
 function ADRForm() {
   const { id } = useParams()
@@ -18,11 +18,14 @@ function ADRForm() {
     consequences: '',
     stakeholders: [],
     related_adrs: [],
+    supersedes: [],
+    amends: [],
     status: 'proposed'
   })
 
   const [stakeholderInput, setStakeholderInput] = useState('')
   const [relatedAdrInput, setRelatedAdrInput] = useState('')
+  const [linkInputs, setLinkInputs] = useState({ supersedes: '', amends: '' })
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
 
@@ -36,7 +39,7 @@ function ADRForm() {
     try {
       setLoading(true)
       const response = await adrApi.get(id)
-      setFormData(response.data)
+      setFormData({ ...response.data, supersedes: response.data.supersedes || [], amends: response.data.amends || [] })
     } catch (err) {
       setError('Failed to load ADR')
       console.error(err)
@@ -146,6 +149,24 @@ function ADRForm() {
     }))
   }
 
+  const addLinkedAdr = (field) => {
+    const value = linkInputs[field].trim()
+    if (value) {
+      setFormData(prev => ({
+        ...prev,
+        [field]: [...prev[field], value]
+      }))
+      setLinkInputs(prev => ({ ...prev, [field]: '' }))
+    }
+  }
+
+  const removeLinkedAdr = (field, index) => {
+    setFormData(prev => ({
+      ...prev,
+      [field]: prev[field].filter((_, i) => i !== index)
+    }))
+  }
+
   const handleSubmit = async (e) => {
     e.preventDefault()
     setLoading(true)
@@ -153,14 +174,14 @@ function ADRForm() {
 
     try {
       if (isEdit) {
-        await adrApi.update(id, formData)
+        await adrApi.update(id, formData, formData.lock_version)
         navigate(`/adrs/${id}`)
       } else {
         const response = await adrApi.create(formData)
         navigate(`/adrs/${response.data.id}`)
       }
     } catch (err) {
-      setError('Failed to save ADR')
+      setError(isConflict(err) ? CONFLICT_MESSAGE : 'Failed to save ADR')
       console.error(err)
       setLoading(false)
     }
@@ -258,6 +279,29 @@ function ADRForm() {
             </div>
           </div>
 
+          {[['supersedes', 'Supersedes ADRs'], ['amends', 'Amends ADRs']].map(([field, label]) => (
+            <div className="form-group" key={field}>
+              <label>{label}</label>
+              <div style={{ display: 'flex', gap: '0.5rem', marginBottom: '0.5rem' }}>
+                <input
+                  type="text"
+                  value={linkInputs[field]}
+                  onChange={(e) => setLinkInputs(prev => ({ ...prev, [field]: e.target.value }))}
+                  placeholder="ADR ID, e.g., 20251115-microservices-architecture"
+                  onKeyPress={(e) => e.key === 'Enter' && (e.preventDefault(), addLinkedAdr(field))}
+                />
+                <button type="button" className="button-sm button" onClick={() => addLinkedAdr(field)}>Add</button>
+              </div>
+              <div>
+                {formData[field].map((adr, index) => (
+                  <span key={index} className="tag" style={{ cursor: 'pointer' }} onClick={() => removeLinkedAdr(field, index)}>
+                    {adr} ✕
+                  </span>
+                ))}
+              </div>
+            </div>
+          ))}
+
           <hr style={{ margin: '2rem 0', border: 'none', borderTop: '2px solid #e2e8f0' }} />
 
           <div style={{ marginBottom: '1.5rem' }}>
@@ -14,7 +14,7 @@ function ADRList() {
   const loadADRs = async () => {
     try {
       setLoading(true)
-      const response = await adrApi.list()
+      const response = await adrApi.list({ fields: 'id,title,status' })
       setAdrs(response.data)
       setError(null)
     } catch (err) {
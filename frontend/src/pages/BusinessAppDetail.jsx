@@ -6,6 +6,7 @@ function BusinessAppDetail() {
   const { id } = useParams()
   const navigate = useNavigate()
   const [app, setApp] = useState(null)
+  const [related, setRelated] = useState({ product: null, supplier: null, dependencies: [], dependents: [], locations: [] })
   const [history, setHistory] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
@@ -18,8 +19,10 @@ function BusinessAppDetail() {
   const loadApp = async () => {
     try {
       setLoading(true)
-      const response = await businessAppApi.get(id)
-      setApp(response.data)
+      const response = await businessAppApi.getBundle(id)
+      const { app: appData, ...relatedData } = response.data
+      setApp(appData)
+      setRelated(relatedData)
       setError(null)
     } catch (err) {
       setError('Failed to load business application')
@@ -51,10 +54,23 @@ function BusinessAppDetail() {
     }
   }
 
+  const handleRestore = async () => {
+    try {
+      await businessAppApi.restore(id)
+      loadApp()
+    } catch (err) {
+      alert(err.response?.data?.detail || 'Failed to restore application')
+      console.error(err)
+    }
+  }
+
   if (loading) return <div className="loading">Loading application...</div>
   if (error) return <div className="error">{error}</div>
   if (!app) return <div className="error">Application not found</div>
 
+  const dependencyApps = Object.fromEntries(related.dependencies.map(dep => [dep.id, dep]))
+  const places = Object.fromEntries(related.locations.map(loc => [loc.location, loc.place]))
+
   return (
     <div>
       <div className="card">
@@ -68,14 +84,24 @@ function BusinessAppDetail() {
           </span>
         </div>
 
+        {app.archived_at && (
+          <div className="error" style={{ marginBottom: '1rem' }}>
+            Archived on {new Date(app.archived_at).toLocaleDateString()}. Restore it to make changes.
+          </div>
+        )}
+
         <div className="button-group">
-          <Link to={`/business-apps/${id}/edit`}>
-            <button className="button">Edit</button>
-          </Link>
+          {app.archived_at ? (
+            <button className="button" onClick={handleRestore}>Restore</button>
+          ) : (
+            <Link to={`/business-apps/${id}/edit`}>
+              <button className="button">Edit</button>
+            </Link>
+          )}
           <button className="button-secondary" onClick={loadHistory}>
             {showHistory ? 'Hide History' : 'Show History'}
           </button>
-          <button className="button-danger" onClick={handleDelete}>Delete</button>
+          {!app.archived_at && <button className="button-danger" onClick={handleDelete}>Delete</button>}
           <Link to="/business-apps">
             <button className="button-secondary">Back to List</button>
           </Link>
@@ -135,7 +161,7 @@ function BusinessAppDetail() {
               <strong style={{ color: 'var(--text-secondary)' }}>Geographic Locations</strong>
               <div style={{ marginTop: '0.5rem', display: 'flex', flexWrap: 'wrap', gap: '0.5rem' }}>
                 {app.geographic_locations.map((loc, index) => (
-                  <span key={index} className="badge">{loc}</span>
+                  <span key={index} className="badge" title={places[loc] ? `Mapped to ${places[loc]}` : undefined}>{loc}</span>
                 ))}
               </div>
             </div>
@@ -174,8 +200,33 @@ function BusinessAppDetail() {
         </div>
       )}
 
+      {/* Product & Supplier */}
+      {related.product && (
+        <div className="card">
+          <h3 style={{ marginBottom: '1rem', fontSize: '1.125rem' }}>Product & Supplier</h3>
+          <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fit, minmax(200px, 1fr))', gap: '1rem' }}>
+            <div>
+              <strong style={{ color: 'var(--text-secondary)' }}>Product</strong>
+              <p style={{ marginTop: '0.25rem' }}>
+                {related.product.name}{related.product.version ? ` ${related.product.version}` : ''}
+              </p>
+            </div>
+            {related.supplier && (
+              <div>
+                <strong style={{ color: 'var(--text-secondary)' }}>Supplier</strong>
+                <p style={{ marginTop: '0.25rem' }}>
+                  {related.supplier.website ? (
+                    <a href={related.supplier.website} target="_blank" rel="noopener noreferrer">{related.supplier.name}</a>
+                  ) : related.supplier.name}
+                </p>
+              </div>
+            )}
+          </div>
+        </div>
+      )}
+
       {/* Technical Information */}
-      {((app.technologies && app.technologies.length > 0) || (app.dependencies && app.dependencies.length > 0)) && (
+      {((app.technologies && app.technologies.length > 0) || (app.dependencies && app.dependencies.length > 0) || related.dependents.length > 0) && (
         <div className="card">
           <h3 style={{ marginBottom: '1rem', fontSize: '1.125rem' }}>Technical Information</h3>
           {app.technologies && app.technologies.length > 0 && (
@@ -193,7 +244,25 @@ function BusinessAppDetail() {
               <strong style={{ color: 'var(--text-secondary)' }}>Dependencies</strong>
               <div style={{ marginTop: '0.5rem', display: 'flex', flexWrap: 'wrap', gap: '0.5rem' }}>
                 {app.dependencies.map((dep, index) => (
-                  <span key={index} className="badge">{dep}</span>
+                  dependencyApps[dep] ? (
+                    <Link key={index} to={`/business-apps/${dep}`}>
+                      <span className="badge">{dependencyApps[dep].name}</span>
+                    </Link>
+                  ) : (
+                    <span key={index} className="badge">{dep}</span>
+                  )
+                ))}
+              </div>
+            </div>
+          )}
+          {related.dependents.length > 0 && (
+            <div style={{ marginTop: app.dependencies && app.dependencies.length > 0 ? '1rem' : '0' }}>
+              <strong style={{ color: 'var(--text-secondary)' }}>Used By</strong>
+              <div style={{ marginTop: '0.5rem', display: 'flex', flexWrap: 'wrap', gap: '0.5rem' }}>
+                {related.dependents.map((dependent) => (
+                  <Link key={dependent.id} to={`/business-apps/${dependent.id}`}>
+                    <span className="badge">{dependent.name}</span>
+                  </Link>
                 ))}
               </div>
             </div>
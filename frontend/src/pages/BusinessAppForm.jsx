@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react'
-import { useParams, useNavigate } from 'react-router-dom'
-import { businessAppApi, productApi } from '../api'
+import { Link, useParams, useNavigate } from 'react-router-dom'
+import { businessAppApi, productApi, isConflict, similarItems, CONFLICT_MESSAGE } from '../api'
+import SuggestInput from '../components/SuggestInput'
 
 function BusinessAppForm() {
   const { id } = useParams()
@@ -30,6 +31,8 @@ function BusinessAppForm() {
   const [depInput, setDepInput] = useState('')
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
+  // Similarly named apps the server found; submitting again creates the app anyway
+  const [similar, setSimilar] = useState(null)
 
   useEffect(() => {
     loadProducts()
@@ -40,7 +43,7 @@ function BusinessAppForm() {
 
   const loadProducts = async () => {
     try {
-      const response = await productApi.list()
+      const response = await productApi.list({ fields: 'id,name,supplier_name' })
       setProducts(response.data)
     } catch (err) {
       console.error('Failed to load products', err)
@@ -71,6 +74,7 @@ function BusinessAppForm() {
   const handleChange = (e) => {
     const { name, value } = e.target
     setFormData(prev => ({ ...prev, [name]: value }))
+    if (name === 'name') setSimilar(null)
   }
 
   const addGeographicLocation = () => {
@@ -138,13 +142,18 @@ function BusinessAppForm() {
       }
 
       if (isEdit) {
-        await businessAppApi.update(id, payload)
+        await businessAppApi.update(id, payload, formData.lock_version)
       } else {
-        await businessAppApi.create(payload)
+        await businessAppApi.create(payload, similar !== null)
       }
       navigate('/business-apps')
     } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to save application')
+      const duplicates = similarItems(err)
+      if (duplicates) {
+        setSimilar(duplicates)
+        return
+      }
+      setError(isConflict(err) ? CONFLICT_MESSAGE : err.response?.data?.detail || 'Failed to save application')
       console.error(err)
     } finally {
       setLoading(false)
@@ -174,8 +183,8 @@ function BusinessAppForm() {
 
           <div className="form-group">
             <label>Application Name *</label>
-            <input
-              type="text"
+            <SuggestInput
+              field="app_name"
               name="name"
               value={formData.name}
               onChange={handleChange}
@@ -219,8 +228,8 @@ function BusinessAppForm() {
 
           <div className="form-group">
             <label>Architectural Owner *</label>
-            <input
-              type="text"
+            <SuggestInput
+              field="owner"
               name="architectural_owner"
               value={formData.architectural_owner}
               onChange={handleChange}
@@ -232,8 +241,8 @@ function BusinessAppForm() {
 
           <div className="form-group">
             <label>Business Owner</label>
-            <input
-              type="text"
+            <SuggestInput
+              field="owner"
               name="business_owner"
               value={formData.business_owner}
               onChange={handleChange}
@@ -244,8 +253,8 @@ function BusinessAppForm() {
 
           <div className="form-group">
             <label>Product Owner</label>
-            <input
-              type="text"
+            <SuggestInput
+              field="owner"
               name="product_owner"
               value={formData.product_owner}
               onChange={handleChange}
@@ -256,8 +265,8 @@ function BusinessAppForm() {
 
           <div className="form-group">
             <label>System Owner</label>
-            <input
-              type="text"
+            <SuggestInput
+              field="owner"
               name="system_owner"
               value={formData.system_owner}
               onChange={handleChange}
@@ -346,8 +355,8 @@ function BusinessAppForm() {
           {formData.hosting_type === 'cloud' && (
             <div className="form-group">
               <label>Cloud Provider</label>
-              <input
-                type="text"
+              <SuggestInput
+                field="cloud_provider"
                 name="cloud_provider"
                 value={formData.cloud_provider}
                 onChange={handleChange}
@@ -403,8 +412,8 @@ function BusinessAppForm() {
           <div className="form-group">
             <label>Technologies</label>
             <div style={{ display: 'flex', gap: '0.5rem' }}>
-              <input
-                type="text"
+              <SuggestInput
+                field="technology"
                 value={techInput}
                 onChange={(e) => setTechInput(e.target.value)}
                 onKeyPress={(e) => e.key === 'Enter' && (e.preventDefault(), addTechnology())}
@@ -435,8 +444,8 @@ function BusinessAppForm() {
           <div className="form-group">
             <label>Dependencies</label>
             <div style={{ display: 'flex', gap: '0.5rem' }}>
-              <input
-                type="text"
+              <SuggestInput
+                field="app_name"
                 value={depInput}
                 onChange={(e) => setDepInput(e.target.value)}
                 onKeyPress={(e) => e.key === 'Enter' && (e.preventDefault(), addDependency())}
@@ -466,9 +475,22 @@ function BusinessAppForm() {
         </div>
 
         <div className="card">
+          {similar && (
+            <div className="warning">
+              Applications with similar names already exist:
+              <ul>
+                {similar.map(app => (
+                  <li key={app.id}>
+                    <Link to={`/business-apps/${app.id}`} target="_blank">{app.name}</Link> ({app.status}, {app.architectural_owner})
+                  </li>
+                ))}
+              </ul>
+              Create it anyway if it is a different application.
+            </div>
+          )}
           <div className="button-group">
             <button type="submit" className="button" disabled={loading}>
-              {loading ? 'Saving...' : (isEdit ? 'Update Application' : 'Create Application')}
+              {loading ? 'Saving...' : (isEdit ? 'Update Application' : (similar ? 'Create Anyway' : 'Create Application'))}
             </button>
             <button type="button" className="button-secondary" onClick={() => navigate('/business-apps')} disabled={loading}>
               Cancel
@@ -7,15 +7,20 @@ function BusinessAppList() {
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [statusFilter, setStatusFilter] = useState('all')
+  const [showArchived, setShowArchived] = useState(false)
 
   useEffect(() => {
     loadApps()
-  }, [])
+  }, [showArchived])
 
   const loadApps = async () => {
     try {
       setLoading(true)
-      const response = await businessAppApi.list()
+      const response = await businessAppApi.list({
+        fields: 'id,name,description,status,architectural_owner,resilience_category,geographic_locations,' +
+          'hosting_type,cloud_provider,development_type,technologies,archived_at',
+        include_archived: showArchived
+      })
       setApps(response.data)
       setError(null)
     } catch (err) {
@@ -68,6 +73,11 @@ function BusinessAppList() {
             </div>
           </div>
         )}
+
+        <label style={{ display: 'flex', alignItems: 'center', gap: '0.5rem', marginTop: '1rem' }}>
+          <input type="checkbox" checked={showArchived} onChange={(e) => setShowArchived(e.target.checked)} />
+          Include archived (long-retired) applications
+        </label>
       </div>
 
       {filteredApps.length === 0 ? (
@@ -156,7 +166,7 @@ function BusinessAppList() {
                     )}
                   </div>
                   <span className={`badge badge-${app.status}`}>
-                    {app.status}
+                    {app.status}{app.archived_at && ' (archived)'}
                   </span>
                 </div>
               </div>
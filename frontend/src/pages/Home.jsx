@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import { Link, useLocation } from 'react-router-dom'
 import { FiPackage, FiFileText, FiAlertTriangle, FiShoppingBag, FiBox, FiDatabase, FiMapPin, FiRefreshCw } from 'react-icons/fi'
-import { dashboardApi, supplierApi } from '../api'
+import { dashboardApi, supplierApi, exposureApi, waitForJob } from '../api'
 import axios from 'axios'
 import SupplierMap from '../components/SupplierMap'
 
@@ -9,6 +9,7 @@ function Home() {
   const location = useLocation()
   const [stats, setStats] = useState(null)
   const [suppliers, setSuppliers] = useState([])
+  const [topSuppliers, setTopSuppliers] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [generatingSample, setGeneratingSample] = useState(false)
@@ -43,8 +44,14 @@ function Home() {
 
   const loadSuppliers = async () => {
     try {
-      const response = await supplierApi.list()
+      const [response, exposure] = await Promise.all([
+        supplierApi.list({ fields: 'id,latitude' }),
+        exposureApi.suppliers({ status: 'active' })
+      ])
       setSuppliers(response.data)
+      // Most depended-on suppliers (active applications using their products)
+      const exposed = exposure.data.filter(s => s.app_count > 0).slice(0, 5)
+      setTopSuppliers(exposed.length ? Object.fromEntries(exposed.map(s => [s.name, s.app_count])) : null)
     } catch (err) {
       console.error('Failed to load suppliers', err)
     }
@@ -69,6 +76,9 @@ function Home() {
       setSampleMessage(null)
       const response = await axios.post('/api/sample-data/generate')
       setSampleMessage({ type: 'success', text: response.data.message })
+      // Generation runs as a background job; wait for it before reloading
+      const job = await waitForJob(response.data.job_id)
+      setSampleMessage({ type: 'success', text: job.result.message })
       // Reload dashboard and suppliers to show new data
       setTimeout(() => {
         loadDashboard()
@@ -76,7 +86,7 @@ function Home() {
         setSampleMessage(null)
       }, 2000)
     } catch (err) {
-      setSampleMessage({ type: 'error', text: 'Failed to generate sample data' })
+      setSampleMessage({ type: 'error', text: err.response?.data?.detail || err.message || 'Failed to generate sample data' })
       console.error(err)
     } finally {
       setGeneratingSample(false)
@@ -203,6 +213,7 @@ function Home() {
           value={stats.totals.suppliers}
           link="/suppliers"
           color="#64748b"
+          items={topSuppliers}
         />
         <StatCard
           icon={FiBox}
@@ -213,7 +224,7 @@ function Home() {
       </div>
 
       {/* Supplier Map */}
-      {suppliers.filter(s => s.address).length > 0 && (
+      {suppliers.some(s => s.latitude != null) && (
         <div className="card" style={{ marginBottom: '1.5rem' }}>
           <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '1rem' }}>
             <h3 style={{ margin: 0, display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
@@ -237,7 +248,7 @@ function Home() {
               </Link>
             </div>
           </div>
-          <SupplierMap suppliers={suppliers} />
+          <SupplierMap refreshKey={suppliers} />
         </div>
       )}
 
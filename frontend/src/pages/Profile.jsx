@@ -2,6 +2,7 @@ import React, { useState, useCallback } from 'react'
 import { useAuth } from '../contexts/AuthContext'
 import { useNavigate } from 'react-router-dom'
 import Cropper from 'react-easy-crop'
+import { profileImageSrcSet, storageUrl, waitForJob } from '../api'
 
 function Profile() {
   const { user, logout } = useAuth()
@@ -104,20 +105,41 @@ function Profile() {
     try {
       const croppedBlob = await getCroppedImg(selectedImage, croppedAreaPixels)
 
+      const postJson = async (url, body) => {
+        const response = await fetch(url, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify(body)
+        })
+        if (!response.ok) {
+          const errorData = await response.json()
+          throw new Error(errorData.detail || 'Failed to upload image')
+        }
+        return response.json()
+      }
+
+      // 1. Get a pre-signed upload so the file goes straight to storage
+      const { upload_id: uploadId, upload } = await postJson(
+        `/api/users/${user.id}/profile-image/upload-url`, { content_type: 'image/jpeg' }
+      )
+
       const formData = new FormData()
+      Object.entries(upload.fields).forEach(([name, value]) => formData.append(name, value))
       formData.append('file', croppedBlob, 'profile.jpg')
 
-      const response = await fetch(`/api/users/${user.id}/profile-image`, {
-        method: 'POST',
+      const uploadResponse = await fetch(storageUrl(upload.url), {
+        method: upload.method,
         body: formData
       })
-
-      if (!response.ok) {
-        const errorData = await response.json()
-        throw new Error(errorData.detail || 'Failed to upload image')
+      if (!uploadResponse.ok) {
+        throw new Error('Failed to upload image')
       }
 
-      const data = await response.json()
+      // 2. Ask the API to process it, then wait for the resized variants
+      const { job_id: jobId } = await postJson(
+        `/api/users/${user.id}/profile-image/complete`, { upload_id: uploadId }
+      )
+      const { result: data } = await waitForJob(jobId, { interval: 500, timeout: 60000 })
 
       // Update user in local storage
       const userToStore = {
@@ -271,7 +293,9 @@ function Profile() {
             }}>
               {user.profileImage ? (
                 <img
-                  src={`/api${user.profileImage}`}
+                  src={storageUrl(user.profileImage)}
+                  srcSet={profileImageSrcSet(user.profileImage)}
+                  sizes="100px"
                   alt={user.name}
                   style={{ width: '100%', height: '100%', objectFit: 'cover' }}
                   onError={(e) => {
@@ -1,29 +1,41 @@
 import React, { useState, useEffect } from 'react'
-import { supplierApi, productApi } from '../api'
+import { supplierApi, productApi, isConflict, similarItems, CONFLICT_MESSAGE } from '../api'
+
+const PAGE_SIZE = 50
 
 function SupplierManagement() {
+  // Supplier cards (with nested products and app counts), loaded a page at a time
   const [suppliers, setSuppliers] = useState([])
-  const [products, setProducts] = useState([])
+  const [totalSuppliers, setTotalSuppliers] = useState(0)
+  // All suppliers, for the product form's supplier picker
+  const [supplierOptions, setSupplierOptions] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [view, setView] = useState('list') // 'list', 'addSupplier', 'editSupplier', 'addProduct', 'editProduct'
   const [selectedSupplier, setSelectedSupplier] = useState(null)
   const [selectedProduct, setSelectedProduct] = useState(null)
   const [formData, setFormData] = useState({})
+  // Similarly named suppliers the server found; submitting again creates the supplier anyway
+  const [similar, setSimilar] = useState(null)
 
   useEffect(() => {
     loadData()
   }, [])
 
+  const fetchSuppliers = (offset, limit) =>
+    supplierApi.list({ include: 'products,app_counts', offset, limit })
+
   const loadData = async () => {
     try {
       setLoading(true)
-      const [suppliersRes, productsRes] = await Promise.all([
-        supplierApi.list(),
-        productApi.list()
+      // Reload as many suppliers as are shown, so editing does not collapse the list
+      const [suppliersRes, optionsRes] = await Promise.all([
+        fetchSuppliers(0, Math.max(PAGE_SIZE, suppliers.length)),
+        supplierApi.list({ fields: 'id,name' })
       ])
       setSuppliers(suppliersRes.data)
-      setProducts(productsRes.data)
+      setTotalSuppliers(Number(suppliersRes.headers['x-total-count']))
+      setSupplierOptions(optionsRes.data)
       setError(null)
     } catch (err) {
       setError('Failed to load data')
@@ -33,14 +45,30 @@ function SupplierManagement() {
     }
   }
 
+  const loadMoreSuppliers = async () => {
+    try {
+      const response = await fetchSuppliers(suppliers.length, PAGE_SIZE)
+      setSuppliers([...suppliers, ...response.data])
+      setTotalSuppliers(Number(response.headers['x-total-count']))
+    } catch (err) {
+      setError('Failed to load more suppliers')
+    }
+  }
+
   const handleSubmitSupplier = async (e) => {
     e.preventDefault()
     try {
-      await supplierApi.create(formData)
+      await supplierApi.create(formData, similar !== null)
       setFormData({})
+      setSimilar(null)
       setView('list')
       loadData()
     } catch (err) {
+      const duplicates = similarItems(err)
+      if (duplicates) {
+        setSimilar(duplicates)
+        return
+      }
       setError('Failed to create supplier')
     }
   }
@@ -48,13 +76,13 @@ function SupplierManagement() {
   const handleUpdateSupplier = async (e) => {
     e.preventDefault()
     try {
-      await supplierApi.update(selectedSupplier, formData)
+      await supplierApi.update(selectedSupplier, formData, formData.lock_version)
       setFormData({})
       setSelectedSupplier(null)
       setView('list')
       loadData()
     } catch (err) {
-      setError('Failed to update supplier')
+      setError(isConflict(err) ? CONFLICT_MESSAGE : 'Failed to update supplier')
     }
   }
 
@@ -66,7 +94,8 @@ function SupplierManagement() {
       website: supplier.website || '',
       contact_email: supplier.contact_email || '',
       contact_phone: supplier.contact_phone || '',
-      address: supplier.address || ''
+      address: supplier.address || '',
+      lock_version: supplier.lock_version
     })
     setView('editSupplier')
   }
@@ -87,13 +116,13 @@ function SupplierManagement() {
   const handleUpdateProduct = async (e) => {
     e.preventDefault()
     try {
-      await productApi.update(selectedProduct, formData)
+      await productApi.update(selectedProduct, formData, formData.lock_version)
       setFormData({})
       setSelectedProduct(null)
       setView('list')
       loadData()
     } catch (err) {
-      setError('Failed to update product')
+      setError(isConflict(err) ? CONFLICT_MESSAGE : 'Failed to update product')
     }
   }
 
@@ -106,7 +135,8 @@ function SupplierManagement() {
       supplier_id: product.supplier_id,
       product_url: product.product_url || '',
       support_url: product.support_url || '',
-      license_type: product.license_type || ''
+      license_type: product.license_type || '',
+      lock_version: product.lock_version
     })
     setView('editProduct')
   }
@@ -147,7 +177,7 @@ function SupplierManagement() {
         <form onSubmit={handleSubmitSupplier}>
           <div className="form-group">
             <label>Name *</label>
-            <input required value={formData.name || ''} onChange={(e) => setFormData({...formData, name: e.target.value})} />
+            <input required value={formData.name || ''} onChange={(e) => {setFormData({...formData, name: e.target.value}); setSimilar(null)}} />
           </div>
           <div className="form-group">
             <label>Description</label>
@@ -169,8 +199,17 @@ function SupplierManagement() {
             <label>Address</label>
             <textarea value={formData.address || ''} onChange={(e) => setFormData({...formData, address: e.target.value})} placeholder="Full address for map display" />
           </div>
-          <button type="submit" className="button">Create Supplier</button>
-          <button type="button" className="button-secondary" onClick={() => {setView('list'); setFormData({})}}>Cancel</button>
+          {similar && (
+            <div className="warning">
+              Suppliers with similar names already exist:
+              <ul>
+                {similar.map(s => (<li key={s.id}>{s.name} ({s.product_count} products)</li>))}
+              </ul>
+              Create it anyway if it is a different supplier, or add its products to the existing one.
+            </div>
+          )}
+          <button type="submit" className="button">{similar ? 'Create Anyway' : 'Create Supplier'}</button>
+          <button type="button" className="button-secondary" onClick={() => {setView('list'); setFormData({}); setSimilar(null)}}>Cancel</button>
         </form>
       </div>
     )
@@ -216,7 +255,7 @@ function SupplierManagement() {
     const supplierPreSelected = selectedSupplier !== null
     return (
       <div className="card">
-        <h2>Add New Product{supplierPreSelected && ` to ${suppliers.find(s => s.id === selectedSupplier)?.name}`}</h2>
+        <h2>Add New Product{supplierPreSelected && ` to ${supplierOptions.find(s => s.id === selectedSupplier)?.name}`}</h2>
         <form onSubmit={handleSubmitProduct}>
           <div className="form-group">
             <label>Supplier *</label>
@@ -228,7 +267,7 @@ function SupplierManagement() {
               style={supplierPreSelected ? {backgroundColor: '#f0f0f0', cursor: 'not-allowed'} : {}}
             >
               <option value="">Select a supplier</option>
-              {suppliers.map(s => (<option key={s.id} value={s.id}>{s.name}</option>))}
+              {supplierOptions.map(s => (<option key={s.id} value={s.id}>{s.name}</option>))}
             </select>
             {supplierPreSelected && (
               <small style={{color: '#666', marginTop: '0.25rem', display: 'block'}}>
@@ -276,7 +315,7 @@ function SupplierManagement() {
             <label>Supplier *</label>
             <select required value={formData.supplier_id || ''} onChange={(e) => setFormData({...formData, supplier_id: e.target.value})}>
               <option value="">Select a supplier</option>
-              {suppliers.map(s => (<option key={s.id} value={s.id}>{s.name}</option>))}
+              {supplierOptions.map(s => (<option key={s.id} value={s.id}>{s.name}</option>))}
             </select>
           </div>
           <div className="form-group">
@@ -330,9 +369,10 @@ function SupplierManagement() {
                   {supplier.description && <p>{supplier.description}</p>}
                   {supplier.website && <p><strong>Website:</strong> <a href={supplier.website} target="_blank" rel="noopener noreferrer">{supplier.website}</a></p>}
                   {supplier.contact_email && <p><strong>Email:</strong> {supplier.contact_email}</p>}
+                  <p><strong>Used by:</strong> {supplier.app_count} application(s)</p>
 
                   <div style={{display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginTop: '1rem', marginBottom: '0.5rem'}}>
-                    <h4 style={{margin: 0}}>Products ({products.filter(p => p.supplier_id === supplier.id).length})</h4>
+                    <h4 style={{margin: 0}}>Products ({supplier.products.length})</h4>
                     <button
                       className="button"
                       style={{padding: '0.25rem 0.5rem', fontSize: '0.85em'}}
@@ -342,12 +382,13 @@ function SupplierManagement() {
                     </button>
                   </div>
                   <ul style={{listStyle: 'none', padding: 0}}>
-                    {products.filter(p => p.supplier_id === supplier.id).map(product => (
+                    {supplier.products.map(product => (
                       <li key={product.id} style={{padding: '0.5rem', background: 'white', marginBottom: '0.5rem', borderRadius: '4px', display: 'flex', justifyContent: 'space-between', alignItems: 'center'}}>
                         <div>
                           <strong>{product.name}</strong> {product.version && `v${product.version}`}
                           {product.description && <div style={{fontSize: '0.9em', color: '#666'}}>{product.description}</div>}
                           {product.license_type && <div style={{fontSize: '0.85em', color: '#999'}}>License: {product.license_type}</div>}
+                          <div style={{fontSize: '0.85em', color: '#999'}}>Used by {product.app_count} application(s)</div>
                         </div>
                         <div style={{display: 'flex', gap: '0.5rem'}}>
                           <button className="button-secondary" style={{padding: '0.25rem 0.5rem', fontSize: '0.9em'}} onClick={() => handleEditProduct(product)}>Edit</button>
@@ -366,6 +407,12 @@ function SupplierManagement() {
           ))}
         </div>
 
+        {suppliers.length < totalSuppliers && (
+          <button className="button-secondary" style={{marginTop: '1rem'}} onClick={loadMoreSuppliers}>
+            Show more suppliers ({totalSuppliers - suppliers.length} remaining)
+          </button>
+        )}
+
         {suppliers.length === 0 && (
           <p>No suppliers found. Add your first supplier to get started!</p>
         )}
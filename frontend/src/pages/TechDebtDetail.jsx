@@ -63,6 +63,16 @@ function TechDebtDetail() {
     }
   }
 
+  const handleRestore = async () => {
+    try {
+      await techDebtApi.restore(id)
+      loadTechDebt()
+    } catch (err) {
+      alert(err.response?.data?.detail || 'Failed to restore tech debt item')
+      console.error(err)
+    }
+  }
+
   const getPriorityColor = (priority) => {
     const colors = {
       'critical': 'badge-danger',
@@ -106,14 +116,24 @@ function TechDebtDetail() {
           </div>
         </div>
 
+        {debt.archived_at && (
+          <div className="error" style={{ marginBottom: '1rem' }}>
+            Archived on {new Date(debt.archived_at).toLocaleDateString()}. Restore it to make changes.
+          </div>
+        )}
+
         <div className="button-group">
-          <Link to={`/tech-debt/${id}/edit`}>
-            <button className="button">Edit</button>
-          </Link>
+          {debt.archived_at ? (
+            <button className="button" onClick={handleRestore}>Restore</button>
+          ) : (
+            <Link to={`/tech-debt/${id}/edit`}>
+              <button className="button">Edit</button>
+            </Link>
+          )}
           <button className="button-secondary" onClick={loadHistory}>
             {showHistory ? 'Hide History' : 'Show History'}
           </button>
-          <button className="button-danger" onClick={handleDelete}>Delete</button>
+          {!debt.archived_at && <button className="button-danger" onClick={handleDelete}>Delete</button>}
           <Link to="/tech-debt">
             <button className="button-secondary">Back to List</button>
           </Link>
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import { useParams, useNavigate, useSearchParams } from 'react-router-dom'
-import { techDebtApi, adrApi } from '../api'
+import { techDebtApi, adrApi, isConflict, CONFLICT_MESSAGE } from '../api'
+import SuggestInput from '../components/SuggestInput'
 
 function TechDebtForm() {
   const { id } = useParams()
@@ -38,7 +39,7 @@ function TechDebtForm() {
 
   const loadAdrs = async () => {
     try {
-      const response = await adrApi.list()
+      const response = await adrApi.list({ fields: 'id,title' })
       setAdrs(response.data)
     } catch (err) {
       console.error('Failed to load ADRs:', err)
@@ -119,14 +120,14 @@ function TechDebtForm() {
 
     try {
       if (isEdit) {
-        await techDebtApi.update(id, submitData)
+        await techDebtApi.update(id, submitData, formData.lock_version)
         navigate(`/tech-debt/${id}`)
       } else {
         const response = await techDebtApi.create(submitData)
         navigate(`/tech-debt/${response.data.id}`)
       }
     } catch (err) {
-      setError('Failed to save tech debt item')
+      setError(isConflict(err) ? CONFLICT_MESSAGE : 'Failed to save tech debt item')
       console.error(err)
       setLoading(false)
     }
@@ -223,8 +224,8 @@ function TechDebtForm() {
 
           <div className="form-group">
             <label htmlFor="owner">Owner *</label>
-            <input
-              type="text"
+            <SuggestInput
+              field="owner"
               id="owner"
               name="owner"
               value={formData.owner}
@@ -307,8 +308,8 @@ function TechDebtForm() {
           <div className="form-group">
             <label>Tags</label>
             <div style={{ display: 'flex', gap: '0.5rem', marginBottom: '0.5rem' }}>
-              <input
-                type="text"
+              <SuggestInput
+                field="tag"
                 value={tagInput}
                 onChange={(e) => setTagInput(e.target.value)}
                 placeholder="e.g., security, performance, scalability"
@@ -8,15 +8,19 @@ function TechDebtList() {
   const [error, setError] = useState(null)
   const [filterPriority, setFilterPriority] = useState('all')
   const [filterStatus, setFilterStatus] = useState('all')
+  const [showArchived, setShowArchived] = useState(false)
 
   useEffect(() => {
     loadTechDebt()
-  }, [])
+  }, [showArchived])
 
   const loadTechDebt = async () => {
     try {
       setLoading(true)
-      const response = await techDebtApi.list()
+      const response = await techDebtApi.list({
+        fields: 'id,title,description,owner,priority,status,linked_adr_id,target_resolution_date,archived_at',
+        include_archived: showArchived
+      })
       setDebts(response.data)
       setError(null)
     } catch (err) {
@@ -99,6 +103,11 @@ function TechDebtList() {
             </select>
           </div>
         </div>
+
+        <label style={{ display: 'flex', alignItems: 'center', gap: '0.5rem' }}>
+          <input type="checkbox" checked={showArchived} onChange={(e) => setShowArchived(e.target.checked)} />
+          Include archived (long-closed) items
+        </label>
       </div>
 
       {filteredDebts.length === 0 ? (
@@ -123,6 +132,9 @@ function TechDebtList() {
                       <span className={`badge ${getStatusColor(debt.status)}`}>
                         {debt.status}
                       </span>
+                      {debt.archived_at && (
+                        <span className="tag">Archived</span>
+                      )}
                       {debt.owner && (
                         <span className="tag">Owner: {debt.owner}</span>
                       )}